@@ -1,6 +1,45 @@
 from django.apps import AppConfig
+from django.core import checks
+
+
+def check_shared_cache(
+    **kwargs: object,  # noqa: ARG001
+) -> list[checks.CheckMessage]:
+    """
+    With a cache local to each process, the `movies.cache` versions only
+    see the writes of their own worker: the others serve their cached
+    responses and lookup tables until these expire, and the lists are
+    served without `ETag` / `Last-Modified` (see `movies.conditional`).
+    """
+    from movies.cache import get_cache_settings, is_cache_shared  # noqa: PLC0415
+    from movies.lookups import get_max_age, is_lookup_enabled  # noqa: PLC0415
+
+    if is_cache_shared():
+        return []
+    cache_settings = get_cache_settings()
+    issues = ["lists are served without ETag and Last-Modified"]
+    if is_lookup_enabled():
+        issues.append(f"lookup tables are up to {get_max_age()}s stale")
+    if cache_settings["ENABLED"]:
+        issues.append(f"cached responses are up to {cache_settings['TIMEOUT']}s stale")
+    return [
+        checks.Warning(
+            f"The cache is local to each process: {', '.join(issues)}.",
+            hint=(
+                "Configure a cache shared by the workers (e.g. Redis or "
+                "Memcached) with CACHE_BACKEND, or run a single process."
+            ),
+            obj=cache_settings["CACHE_ALIAS"],
+            id="movies.W001",
+        ),
+    ]
 
 
 class MoviesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "movies"
+
+    def ready(self) -> None:
+        from movies import querystats, signals  # noqa: F401, PLC0415
+
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
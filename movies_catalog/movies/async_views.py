@@ -0,0 +1,246 @@
+"""
+Async read-only views, served under `api/async/`.
+
+They return the same representations as `list` / `retrieve` of
+`MovieViewSet` and `AgeRatingViewSet` (`include`, `fields`, the movie
+filters, search and ordering, page number pagination), read through the
+async ORM. Under ASGI a request waiting for the database or a slow client
+does not hold a worker thread. Response caching, conditional requests and
+keyset pagination stay on the DRF viewsets: `?pagination=cursor` is
+rejected rather than ignored.
+"""
+
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from movies.fieldsets import get_concrete_field_names, parse_fields
+from movies.filters import MovieFilterSet, MovieOrderingFilter, MovieSearchFilter
+from movies.includes import MOVIE_RELATIONS, parse_include
+from movies.models import AgeRating, Movie
+from movies.pagination import PAGINATION_MODE_CURSOR, PAGINATION_MODE_QUERY_PARAM
+from movies.renderers import FastJSONRenderer
+from movies.serializers import (
+    AgeRatingDetailSerializer,
+    AgeRatingSerializer,
+    MovieDetailSerializerExtended,
+    MovieSerializer,
+)
+from movies.serializers.age_rating import get_movies_preview_prefetch
+from movies.snapshots import (
+    aprefetch_missing_relations,
+    get_snapshot_columns,
+    select_relations,
+)
+
+PAGE_QUERY_PARAM = "page"
+
+
+async def apaginate(request: Request, queryset: QuerySet) -> tuple[list, dict]:
+    """
+    Rows of the requested page and the `PageNumberPagination` envelope.
+    """
+    page_size = api_settings.PAGE_SIZE
+    try:
+        number = int(request.query_params.get(PAGE_QUERY_PARAM, 1))
+    except ValueError:
+        number = 0
+    count = await queryset.acount()
+    last = max(1, -(-count // page_size))
+    if not 1 <= number <= last:
+        msg = "Invalid page."
+        raise NotFound(msg)
+
+    offset = (number - 1) * page_size
+    rows = [
+        row
+        # `aiterator()` runs `prefetch_related()` lookups once per chunk
+        async for row in queryset[offset : offset + page_size].aiterator(
+            chunk_size=page_size,
+        )
+    ]
+    url = request.build_absolute_uri()
+    if number == 1:
+        previous = None
+    elif number == 2:  # noqa: PLR2004
+        previous = remove_query_param(url, PAGE_QUERY_PARAM)
+    else:
+        previous = replace_query_param(url, PAGE_QUERY_PARAM, number - 1)
+    return rows, {
+        "count": count,
+        "next": (
+            replace_query_param(url, PAGE_QUERY_PARAM, number + 1)
+            if number < last
+            else None
+        ),
+        "previous": previous,
+    }
+
+
+class AsyncReadView(View):
+    http_method_names = ("get", "options")
+    renderer_class = FastJSONRenderer
+
+    async def get(self, request: HttpRequest, **kwargs: object) -> HttpResponse:
+        drf_request = Request(request)
+        try:
+            if "pk" in kwargs:
+                data = await self.retrieve(drf_request, kwargs["pk"])
+            else:
+                data = await self.list(drf_request)
+        except APIException as exc:
+            detail = exc.detail
+            return self.render(
+                detail if isinstance(detail, dict | list) else {"detail": detail},
+                exc.status_code,
+            )
+        return self.render(data)
+
+    def render(
+        self,
+        data: object,
+        status_code: int = status.HTTP_200_OK,
+    ) -> HttpResponse:
+        renderer = self.renderer_class()
+        content_type = renderer.media_type
+        # JSON is always UTF-8, its renderers have no charset
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        return HttpResponse(
+            renderer.render(data),
+            status=status_code,
+            content_type=content_type,
+        )
+
+    async def list(self, request: Request) -> dict:
+        raise NotImplementedError
+
+    async def retrieve(self, request: Request, pk: object) -> dict:
+        raise NotImplementedError
+
+    async def aget_object(self, queryset: QuerySet, pk: object) -> object:
+        try:
+            return await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist as exc:
+            msg = f"No {queryset.model._meta.object_name} matches the given query."  # noqa: SLF001
+            raise NotFound(msg) from exc
+
+
+class AsyncMovieView(AsyncReadView):
+    # after `MovieFilterSet`, as on `MovieViewSet`
+    filter_backends = (MovieSearchFilter, MovieOrderingFilter)
+
+    def get_relations(
+        self,
+        request: Request,
+        fields: frozenset[str] | None,
+    ) -> list[str]:
+        return [
+            name
+            for name in parse_include(request, MOVIE_RELATIONS)
+            if fields is None or name in fields
+        ]
+
+    def get_queryset(self, request: Request, fields: frozenset[str] | None) -> QuerySet:
+        relations = self.get_relations(request, fields)
+        qs = select_relations(Movie.objects.all(), relations)
+        if fields is not None:
+            qs = qs.only(
+                *get_concrete_field_names(Movie, fields),
+                *get_snapshot_columns(relations),
+            )
+        return qs
+
+    def get_serializer(
+        self,
+        request: Request,
+        fields: frozenset[str] | None,
+        *args: object,
+        **kwargs: object,
+    ) -> MovieSerializer:
+        includes = parse_include(request, MOVIE_RELATIONS)
+        if includes:
+            return MovieDetailSerializerExtended(
+                *args,
+                include=includes,
+                fields=fields,
+                context={"request": request},
+                **kwargs,
+            )
+        return MovieSerializer(
+            *args,
+            fields=fields,
+            context={"request": request},
+            **kwargs,
+        )
+
+    def filter_queryset(self, request: Request, queryset: QuerySet) -> QuerySet:
+        filterset = MovieFilterSet(
+            request.query_params,
+            queryset=queryset,
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        queryset = filterset.qs
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        return queryset
+
+    async def list(self, request: Request) -> dict:
+        mode = request.query_params.get(PAGINATION_MODE_QUERY_PARAM)
+        if mode == PAGINATION_MODE_CURSOR:
+            raise ValidationError(
+                {
+                    PAGINATION_MODE_QUERY_PARAM: [
+                        "Cursor pagination is only served by `/api/movies/`.",
+                    ],
+                },
+            )
+        fields = parse_fields(request)
+        qs = self.filter_queryset(request, self.get_queryset(request, fields))
+        rows, envelope = await apaginate(request, qs)
+        await aprefetch_missing_relations(rows, self.get_relations(request, fields))
+        serializer = self.get_serializer(request, fields, rows, many=True)
+        return {**envelope, "results": serializer.data}
+
+    async def retrieve(self, request: Request, pk: object) -> dict:
+        fields = parse_fields(request)
+        movie = await self.aget_object(self.get_queryset(request, fields), pk)
+        await aprefetch_missing_relations([movie], self.get_relations(request, fields))
+        return self.get_serializer(request, fields, movie).data
+
+
+class AsyncAgeRatingView(AsyncReadView):
+    async def list(self, request: Request) -> dict:
+        fields = parse_fields(request)
+        qs = AgeRating.objects.all()
+        if fields is not None:
+            qs = qs.only(*get_concrete_field_names(AgeRating, fields))
+        rows, envelope = await apaginate(request, qs)
+        serializer = AgeRatingSerializer(
+            rows,
+            many=True,
+            fields=fields,
+            context={"request": request},
+        )
+        return {**envelope, "results": serializer.data}
+
+    async def retrieve(self, request: Request, pk: object) -> dict:
+        fields = parse_fields(request)
+        qs = AgeRating.objects.all()
+        if fields is None or {"movies", "movies_next"} & fields:
+            qs = qs.prefetch_related(get_movies_preview_prefetch())
+        if fields is not None:
+            qs = qs.only(*get_concrete_field_names(AgeRating, fields))
+        age_rating = await self.aget_object(qs, pk)
+        return AgeRatingDetailSerializer(
+            age_rating,
+            fields=fields,
+            context={"request": request},
+        ).data
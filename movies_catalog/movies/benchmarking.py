@@ -0,0 +1,134 @@
+"""
+Helpers of the `bench_*` management commands.
+"""
+
+import random
+import statistics
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from movies.cache import NAMESPACE_MOVIES, bump_versions
+from movies.counters import recount
+from movies.models import AgeRating, Genre, Movie
+from movies.models.summary import summarize
+from movies.snapshots import refresh_snapshots
+
+SEED_AGE_RATINGS = ("G", "PG", "PG-13", "R", "NC-17")
+SEED_GENRES = 20
+SEED_MAX_GENRES_PER_MOVIE = 5
+SEED_BATCH_SIZE = 1000
+
+_WORDS = ("good", "bad", "long", "story", "hero", "night", "city", "love", "war")
+
+
+def seed_catalog(
+    movies: int,
+    *,
+    genres: int = SEED_GENRES,
+    age_ratings: tuple[str, ...] = SEED_AGE_RATINGS,
+    max_genres_per_movie: int = SEED_MAX_GENRES_PER_MOVIE,
+    seed: int = 0,
+) -> int:
+    """
+    Add generated movies until the catalog has at least `movies` of them.
+    Returns the number of created movies.
+
+    Movies get 0 to `max_genres_per_movie` genres, popular genres being
+    picked more often (Zipf-like), and some have no age rating.
+    """
+    missing = movies - Movie.objects.count()
+    if missing <= 0:
+        return 0
+
+    rnd = random.Random(seed)  # noqa: S311
+    with transaction.atomic():
+        ratings = [
+            AgeRating.objects.get_or_create(
+                name=name,
+                defaults={"description": f"Rated {name}"},
+            )[0]
+            for name in age_ratings
+        ]
+        genre_objects = list(Genre.objects.order_by("id")[:genres])
+        # `bulk_create()` does not `save()`, the summary is set here
+        genre_objects += Genre.objects.bulk_create(
+            Genre(
+                name=f"Genre {number}",
+                description=f"Genre number {number}",
+                summary=summarize(f"Genre number {number}"),
+            )
+            for number in range(len(genre_objects), genres)
+        )
+        weights = [1 / rank for rank in range(1, len(genre_objects) + 1)]
+
+        created = Movie.objects.bulk_create(
+            (
+                Movie(
+                    title=" ".join(rnd.choices(_WORDS, k=3)).title(),
+                    description=" ".join(rnd.choices(_WORDS, k=30)),
+                    release_date=date(1970, 1, 1)
+                    + timedelta(days=rnd.randrange(20_000)),
+                    duration=rnd.randrange(60, 200),
+                    age_rating=rnd.choice((*ratings, None)),
+                )
+                for _ in range(missing)
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        Movie.genres.through.objects.bulk_create(
+            (
+                Movie.genres.through(movie_id=movie.pk, genre_id=genre.pk)
+                for movie in created
+                for genre in {
+                    *rnd.choices(
+                        genre_objects,
+                        weights,
+                        k=rnd.randint(0, max_genres_per_movie),
+                    ),
+                }
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        refresh_snapshots((movie.pk for movie in created), SEED_BATCH_SIZE)
+        recount(AgeRating)
+        recount(Genre)
+    # bulk writes send no model signals, new movies only change the lists
+    bump_versions(NAMESPACE_MOVIES)
+    return len(created)
+
+
+def time_calls(func: Callable[[], object], repeat: int) -> list[float]:
+    """
+    Wall time of `repeat` calls, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def median_ms(timings: list[float]) -> float:
+    return statistics.median(timings) * 1000
+
+
+def summarize_timings(timings: list[float]) -> dict[str, float]:
+    """
+    Latency percentiles and sequential throughput of `timings` (seconds).
+    """
+    if len(timings) > 1:
+        cuts = statistics.quantiles(timings, n=100, method="inclusive")
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = timings[0]
+    return {
+        "p50_ms": round(p50 * 1000, 3),
+        "p90_ms": round(p90 * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "rps": round(len(timings) / sum(timings), 1),
+    }
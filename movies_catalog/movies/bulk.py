@@ -0,0 +1,255 @@
+"""
+Batched writes for many movies at once.
+
+Every row of a bulk request replaces the movie it matches:
+by `id` when given, otherwise by the natural key `(title, release_date)`;
+rows that match nothing are created. Fields missing from a row are reset
+to their defaults, `genres` are only touched when present in the row.
+
+All lookups are done with one `IN` query per table, and the writes are
+one `bulk_create` + one `bulk_update` for movies and one `bulk_create`
++ one delete for the genre links, inside a single transaction.
+
+The natural key has no unique constraint (existing movies may share
+one), so on Postgres requests matching by it take an advisory lock
+first: two requests creating the same movie would both insert it.
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from movies import signals
+from movies.counters import count_genre_links
+from movies.models import AgeRating, Genre, Movie
+from movies.serializers.movie_bulk import MovieBulkItemSerializer
+
+BULK_BATCH_SIZE = 1000
+BULK_MAX_ROWS = 10_000
+# `pg_advisory_xact_lock()` key serializing the matches by natural key
+NATURAL_KEY_LOCK_KEY = 0x6D6F7677
+
+MOVIE_BULK_FIELDS = (
+    "title",
+    "description",
+    "release_date",
+    "duration",
+    "age_rating_id",
+    "updated_at",
+)
+
+MovieGenreLink = Movie.genres.through
+
+
+@dataclass
+class BulkWriteResult:
+    created: list[int] = field(default_factory=list)
+    updated: list[int] = field(default_factory=list)
+    errors: list[dict] = field(default_factory=list)
+
+    def add_error(self, index: int, errors: dict) -> None:
+        self.errors.append({"index": index, "errors": errors})
+
+
+def _natural_key(data: dict) -> tuple:
+    return data["title"], data.get("release_date")
+
+
+def _validate_rows(rows: list, result: BulkWriteResult) -> dict[int, dict]:
+    valid = {}
+    for index, row in enumerate(rows):
+        serializer = MovieBulkItemSerializer(data=row)
+        if serializer.is_valid():
+            valid[index] = serializer.validated_data
+        else:
+            result.add_error(index, serializer.errors)
+    return valid
+
+
+def _resolve_references(
+    valid: dict[int, dict],
+    result: BulkWriteResult,
+) -> tuple[dict[int, int | None], dict[int, str | None]]:
+    """
+    Check foreign keys and `id`s of all rows in one query per table,
+    return the id of the movie each row updates (`None` to create one)
+    and the stored age rating of the matched movies.
+    """
+    age_ratings = {data["age_rating"] for data in valid.values()} - {None}
+    genre_ids = {pk for data in valid.values() for pk in data.get("genres", ())}
+    movie_ids = {data["id"] for data in valid.values() if "id" in data}
+    natural_keys = {_natural_key(data) for data in valid.values() if "id" not in data}
+
+    known_age_ratings = set(
+        AgeRating.objects.filter(name__in=age_ratings).values_list("name", flat=True),
+    )
+    known_genre_ids = set(
+        Genre.objects.filter(id__in=genre_ids).values_list("id", flat=True),
+    )
+    age_ratings_by_movie = dict(
+        Movie.objects.filter(id__in=movie_ids).values_list("id", "age_rating_id"),
+    )
+    known_movie_ids = set(age_ratings_by_movie)
+    movie_ids_by_key = {}
+    for pk, title, release_date, age_rating_id in (
+        Movie.objects.filter(title__in={title for title, _ in natural_keys})
+        .order_by("-id")
+        .values_list("id", "title", "release_date", "age_rating_id")
+    ):
+        # the oldest movie wins when the natural key is ambiguous
+        movie_ids_by_key[title, release_date] = pk
+        age_ratings_by_movie[pk] = age_rating_id
+
+    targets = {}
+    seen_ids = set()
+    seen_keys = set()
+    for index, data in list(valid.items()):
+        errors = {}
+        if (
+            data["age_rating"] is not None
+            and data["age_rating"] not in known_age_ratings
+        ):
+            errors["age_rating"] = [
+                f'Invalid pk "{data["age_rating"]}" - object does not exist.',
+            ]
+        missing_genres = sorted(set(data.get("genres", ())) - known_genre_ids)
+        if missing_genres:
+            errors["genres"] = [
+                f'Invalid pk "{pk}" - object does not exist.' for pk in missing_genres
+            ]
+        if "id" in data:
+            target = data["id"]
+            if target not in known_movie_ids:
+                errors["id"] = [f'Invalid pk "{target}" - object does not exist.']
+        else:
+            key = _natural_key(data)
+            target = movie_ids_by_key.get(key)
+            if key in seen_keys:
+                errors["title"] = ["Duplicate row for this title and release date."]
+            seen_keys.add(key)
+        if target is not None and target in seen_ids:
+            errors.setdefault("id", []).append("Duplicate row for this movie.")
+        seen_ids.add(target)
+        if errors:
+            result.add_error(index, errors)
+            del valid[index]
+        else:
+            targets[index] = target
+    return targets, age_ratings_by_movie
+
+
+def _lock_natural_keys() -> None:
+    # until the end of the transaction, other databases lock on write
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [NATURAL_KEY_LOCK_KEY])
+
+
+def _write_genre_links(
+    genres_by_movie: dict[int, set[int]],
+) -> tuple[set[tuple[int, int]], set[tuple[int, int]]]:
+    """
+    Replace the genre links of the movies, returns the `(movie_id, genre_id)`
+    links added and removed.
+    """
+    if not genres_by_movie:
+        return set(), set()
+    existing = {}
+    for link_id, movie_id, genre_id in MovieGenreLink.objects.filter(
+        movie_id__in=genres_by_movie,
+    ).values_list("id", "movie_id", "genre_id"):
+        existing[movie_id, genre_id] = link_id
+
+    wanted = {
+        (movie_id, genre_id)
+        for movie_id, genre_ids in genres_by_movie.items()
+        for genre_id in genre_ids
+    }
+    stale = {key: link_id for key, link_id in existing.items() if key not in wanted}
+    if stale:
+        MovieGenreLink.objects.filter(id__in=stale.values()).delete()
+    added = wanted - existing.keys()
+    MovieGenreLink.objects.bulk_create(
+        [
+            MovieGenreLink(movie_id=movie_id, genre_id=genre_id)
+            for movie_id, genre_id in added
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return added, set(stale)
+
+
+def write_movie_genres(movie: Movie, genres: Iterable[Genre]) -> None:
+    """
+    Replace the genre links of a movie: one query for the current links,
+    at most one delete and one `bulk_create` however many change.
+
+    Like other direct link writes this sends no `m2m_changed`: the genre
+    counters are updated here, saving the movie afterwards (or
+    `refresh_movie_snapshot()` for a new one) covers the rest.
+    """
+    added, removed = _write_genre_links({movie.pk: {genre.pk for genre in genres}})
+    count_genre_links(movie, {genre_id for _, genre_id in added}, 1)
+    count_genre_links(movie, {genre_id for _, genre_id in removed}, -1)
+
+
+def bulk_upsert_movies(rows: list) -> BulkWriteResult:
+    result = BulkWriteResult()
+    valid = _validate_rows(rows, result)
+
+    with transaction.atomic():
+        if any("id" not in data for data in valid.values()):
+            _lock_natural_keys()
+        targets, stored_age_ratings = _resolve_references(valid, result)
+
+        to_create = []
+        to_update = []
+        genres_by_index = {}
+        # `bulk_update` does not apply `auto_now`
+        now = timezone.now()
+        for index, data in valid.items():
+            movie = Movie(
+                id=targets[index],
+                title=data["title"],
+                description=data.get("description", ""),
+                release_date=data.get("release_date"),
+                duration=data.get("duration"),
+                age_rating_id=data["age_rating"],
+                updated_at=now,
+            )
+            (to_update if movie.id else to_create).append(movie)
+            if "genres" in data:
+                genres_by_index[index] = (movie, set(data["genres"]))
+
+        Movie.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        Movie.objects.bulk_update(
+            to_update,
+            fields=MOVIE_BULK_FIELDS,
+            batch_size=BULK_BATCH_SIZE,
+        )
+        _, unlinked = _write_genre_links(
+            {movie.id: genre_ids for movie, genre_ids in genres_by_index.values()},
+        )
+        movie_ids = {movie.id for movie in (*to_create, *to_update)}
+        signals.movies_bulk_changed.send(
+            sender=Movie,
+            movie_ids=movie_ids,
+            age_rating_ids={movie.age_rating_id for movie in to_create}
+            | {movie.age_rating_id for movie in to_update}
+            | {stored_age_ratings[movie.id] for movie in to_update},
+            # the durations and release dates of all their genres may change
+            genre_ids=set(
+                MovieGenreLink.objects.filter(movie_id__in=movie_ids).values_list(
+                    "genre_id",
+                    flat=True,
+                ),
+            )
+            | {genre_id for _, genre_id in unlinked},
+        )
+
+    result.created = [movie.id for movie in to_create]
+    result.updated = [movie.id for movie in to_update]
+    result.errors.sort(key=lambda error: error["index"])
+    return result
@@ -0,0 +1,188 @@
+"""
+Response cache for the read-only API actions.
+
+Cached entries are keyed by the full request URL (with normalized query
+params) and by the current version of every namespace the response
+depends on, e.g. `movies` for any movie list or `movies:15` for the
+details of one movie. Model signals bump the versions of the touched
+namespaces, so stale entries are never read again and simply expire.
+
+The cache backend is any configured Django cache alias, see
+`MOVIES_RESPONSE_CACHE` in the settings.
+"""
+
+import hashlib
+import logging
+import time
+from collections.abc import Callable, Iterable
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "KEY_PREFIX": "movies-api",
+    "TIMEOUT": 300,
+}
+
+CACHE_STATUS_HEADER = "X-Cache"
+
+NAMESPACE_MOVIES = "movies"
+NAMESPACE_AGE_RATINGS = "age-ratings"
+NAMESPACE_GENRES = "genres"
+
+
+def get_cache_settings() -> dict:
+    return {
+        **DEFAULT_SETTINGS,
+        **getattr(settings, "MOVIES_RESPONSE_CACHE", {}),
+    }
+
+
+def get_cache() -> BaseCache:
+    return caches[get_cache_settings()["CACHE_ALIAS"]]
+
+
+def is_cache_shared() -> bool:
+    """
+    Whether the worker processes share the cache, and so the versions.
+    """
+    return not isinstance(get_cache(), LocMemCache)
+
+
+def object_namespace(namespace: str, pk: object) -> str:
+    return f"{namespace}:{pk}"
+
+
+def _version_key(namespace: str) -> str:
+    return f"{get_cache_settings()['KEY_PREFIX']}:version:{namespace}"
+
+
+def _new_version() -> str:
+    return str(time.time_ns())
+
+
+def get_versions(namespaces: Iterable[str]) -> dict[str, str]:
+    """
+    Current version token of every namespace, created on first use.
+    """
+    cache = get_cache()
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        # `add` keeps the token of a concurrent request that was faster
+        cache.add(key, _new_version(), timeout=None)
+        found[key] = cache.get(key)
+    return {namespace: found[key] for key, namespace in keys.items()}
+
+
+def bump_versions(*namespaces: str) -> None:
+    version = _new_version()
+    get_cache().set_many(
+        {_version_key(namespace): version for namespace in namespaces},
+        timeout=None,
+    )
+
+
+class ResponseCacheStats:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, *, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else None,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+# per worker process counters
+cache_stats = ResponseCacheStats()
+
+
+def build_cache_key(request: Request, versions: dict[str, str]) -> str:
+    query = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    material = "\n".join(
+        (
+            # responses embed absolute links, so host and scheme matter
+            f"{request.scheme}://{request.get_host()}{request.path}",
+            repr(query),
+            repr(sorted(versions.items())),
+        ),
+    )
+    digest = hashlib.sha256(material.encode()).hexdigest()
+    return f"{get_cache_settings()['KEY_PREFIX']}:response:{digest}"
+
+
+class CachedResponseMixin:
+    """
+    Serve `list` and `retrieve` from the response cache.
+
+    Views declare what a response depends on in `get_cache_namespaces`.
+    """
+
+    def get_cache_namespaces(self) -> tuple[str, ...]:
+        raise NotImplementedError
+
+    def list(self, request: Request, *args: object, **kwargs: object) -> Response:
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request: Request, *args: object, **kwargs: object) -> Response:
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(
+        self,
+        handler: Callable[..., Response],
+        request: Request,
+        *args: object,
+        **kwargs: object,
+    ) -> Response:
+        cache_settings = get_cache_settings()
+        if not cache_settings["ENABLED"]:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = build_cache_key(request, get_versions(self.get_cache_namespaces()))
+        data = cache.get(key)
+        if data is not None:
+            cache_stats.record(hit=True)
+            log.debug("Response cache hit for %s", request.get_full_path())
+            response = Response(data)
+            response[CACHE_STATUS_HEADER] = "HIT"
+            return response
+
+        cache_stats.record(hit=False)
+        log.debug("Response cache miss for %s", request.get_full_path())
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=cache_settings["TIMEOUT"])
+        response[CACHE_STATUS_HEADER] = "MISS"
+        return response
@@ -0,0 +1,158 @@
+"""
+Precomputed pages of the default movie list.
+
+Most of the traffic is `/api/movies/?include=1`, page by page in `id`
+order. `CatalogPageEntry` holds every movie as that list renders it, so
+those pages are one index range scan of the entries (plus the `COUNT(*)`
+of the page-number pagination) instead of reading the movies, their age
+ratings and their genres.
+
+`movies.signals` refreshes the entries of the movies touched by a write
+(of movies, genre links, age ratings or genres) once per transaction,
+after the commit. A failed refresh is logged and leaves the entries
+stale: `refresh_catalog_pages` rebuilds them, run it before turning
+`MOVIES_CATALOG_PAGES` on and after changing the movie serializers.
+
+A summary table and not a Postgres materialized view, which can only be
+refreshed as a whole.
+"""
+
+from collections.abc import Iterable
+from functools import cache, partial
+from itertools import batched
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from movies.includes import INCLUDE_QUERY_PARAM, MOVIE_RELATIONS
+from movies.models import CatalogPageEntry, Movie
+from movies.pagination import PAGINATION_MODE_PAGE, PAGINATION_MODE_QUERY_PARAM
+from movies.serializers.movie import MovieDetailSerializerExtended
+
+CATALOG_BATCH_SIZE = 1000
+
+# query params of the requests served from the entries
+CATALOG_QUERY_PARAMS = frozenset(
+    (
+        INCLUDE_QUERY_PARAM,
+        PageNumberPagination.page_query_param,
+        PAGINATION_MODE_QUERY_PARAM,
+        "ordering",
+    ),
+)
+
+
+def is_catalog_enabled() -> bool:
+    return getattr(settings, "MOVIES_CATALOG_PAGES", False)
+
+
+def _get_serializer(
+    movies: Iterable[Movie] | None = None,
+) -> MovieDetailSerializerExtended:
+    return MovieDetailSerializerExtended(movies, many=True, include=MOVIE_RELATIONS)
+
+
+@cache
+def get_entry_fields() -> tuple[str, ...]:
+    """
+    Names of the values stored in `CatalogPageEntry.data`.
+    """
+    return tuple(
+        name
+        for name, field in _get_serializer().child.fields.items()
+        if not field.write_only
+    )
+
+
+def refresh_entries(
+    movie_ids: Iterable[int],
+    batch_size: int = CATALOG_BATCH_SIZE,
+) -> int:
+    """
+    Rebuild the entries of the movies, four queries per batch at most;
+    entries of deleted movies are removed. Returns how many changed.
+    """
+    changed = 0
+    for batch in batched(movie_ids, batch_size, strict=False):
+        stored = dict(
+            CatalogPageEntry.objects.filter(pk__in=batch).values_list("pk", "data"),
+        )
+        movies = (
+            Movie.objects.filter(pk__in=batch)
+            .select_related("age_rating")
+            .prefetch_related("genres")
+        )
+        entries = [
+            CatalogPageEntry(movie_id=item["id"], data=list(item.values()))
+            for item in _get_serializer(movies).data
+        ]
+        written = [entry for entry in entries if stored.get(entry.pk) != entry.data]
+        CatalogPageEntry.objects.bulk_create(
+            written,
+            update_conflicts=True,
+            unique_fields=("movie",),
+            update_fields=("data",),
+        )
+        deleted = stored.keys() - {entry.pk for entry in entries}
+        if deleted:
+            CatalogPageEntry.objects.filter(pk__in=deleted).delete()
+        changed += len(written) + len(deleted)
+    return changed
+
+
+# movies written in the current transaction of each connection
+_pending_movie_ids: WeakKeyDictionary[BaseDatabaseWrapper, set] = WeakKeyDictionary()
+
+
+def _refresh_pending(connection: BaseDatabaseWrapper) -> None:
+    if movie_ids := _pending_movie_ids.pop(connection, None):
+        refresh_entries(sorted(movie_ids))
+
+
+def entries_changed(movie_ids: Iterable[int]) -> None:
+    """
+    Refresh the entries of the movies after the commit.
+    """
+    if not is_catalog_enabled():
+        return
+    connection = transaction.get_connection()
+    _pending_movie_ids.setdefault(connection, set()).update(movie_ids)
+    # a callback per write, Django drops those of rolled back savepoints:
+    # the first to run refreshes the movies of the whole transaction, the
+    # others find nothing left. Movies of a rolled back transaction are
+    # refreshed after the next commit, from what is stored.
+    transaction.on_commit(partial(_refresh_pending, connection), robust=True)
+
+
+class CatalogPagesMixin:
+    """
+    Serves the `include=1` list pages in `id` order from `CatalogPageEntry`.
+    """
+
+    def is_catalog_request(self, request: Request) -> bool:
+        params = request.query_params
+        return (
+            is_catalog_enabled()
+            and type(self.paginator) is PageNumberPagination
+            and params.keys() <= CATALOG_QUERY_PARAMS
+            and params.get(PAGINATION_MODE_QUERY_PARAM, PAGINATION_MODE_PAGE)
+            == PAGINATION_MODE_PAGE
+            and params.get("ordering", "id") == "id"
+            and self.get_includes() == frozenset(MOVIE_RELATIONS)
+        )
+
+    def list(self, request: Request, *args: object, **kwargs: object) -> Response:
+        if not self.is_catalog_request(request):
+            return super().list(request, *args, **kwargs)
+        fields = get_entry_fields()
+        page = self.paginate_queryset(
+            CatalogPageEntry.objects.values_list("data", flat=True),
+        )
+        return self.get_paginated_response(
+            [dict(zip(fields, values, strict=True)) for values in page],
+        )
@@ -0,0 +1,122 @@
+"""
+ETag / Last-Modified support for the read-only API actions.
+
+Validators are computed without running the main query or the serializer:
+details use the `updated_at` row versions, lists use the collection
+versions kept by `movies.cache`. A matching `If-None-Match` or
+`If-Modified-Since` short-circuits to 304 Not Modified.
+
+The collection versions need a cache shared by the worker processes;
+with a per process cache the lists are served without validators.
+"""
+
+import hashlib
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from movies.cache import get_versions, is_cache_shared
+
+
+def build_etag(request: Request, validators: tuple) -> str:
+    """
+    Strong ETag of one representation: the same data rendered
+    for another URL, query or media type gets its own tag.
+    """
+    query = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    material = "\n".join(
+        (
+            f"{request.scheme}://{request.get_host()}{request.path}",
+            repr(query),
+            request.accepted_media_type or "",
+            repr(validators),
+        ),
+    )
+    return quote_etag(hashlib.sha256(material.encode()).hexdigest())
+
+
+def get_collection_validators(
+    namespaces: tuple[str, ...],
+) -> tuple[tuple, datetime | None] | None:
+    if not is_cache_shared():
+        # the versions of this worker miss the writes of the others,
+        # it would answer 304 for stale lists
+        return None
+    versions = get_versions(namespaces)
+    # version tokens are `time.time_ns()` of the last change
+    last_modified = max(int(version) for version in versions.values()) / 1e9
+    return (
+        tuple(sorted(versions.items())),
+        datetime.fromtimestamp(last_modified, tz=UTC),
+    )
+
+
+class ConditionalGetMixin:
+    """
+    Adds `ETag` and `Last-Modified` to `list` and `retrieve`.
+
+    `get_list_validators` / `get_object_validators` return the values
+    the representation depends on and its modification time, or `None`
+    when the object does not exist or the validators are not reliable.
+    """
+
+    def get_list_validators(self) -> tuple[tuple, datetime | None] | None:
+        return get_collection_validators(self.get_cache_namespaces())
+
+    def get_object_validators(self) -> tuple[tuple, datetime | None] | None:
+        raise NotImplementedError
+
+    def list(self, request: Request, *args: object, **kwargs: object) -> Response:
+        return self.get_conditional_response(
+            self.get_list_validators(),
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(self, request: Request, *args: object, **kwargs: object) -> Response:
+        return self.get_conditional_response(
+            self.get_object_validators(),
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def get_conditional_response(
+        self,
+        validators: tuple[tuple, datetime | None] | None,
+        handler: Callable[..., Response],
+        request: Request,
+        *args: object,
+        **kwargs: object,
+    ) -> HttpResponseBase:
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        values, modified_at = validators
+        etag = build_etag(request, values)
+        last_modified = int(modified_at.timestamp()) if modified_at else None
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in {status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED}:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
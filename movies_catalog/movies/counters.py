@@ -0,0 +1,265 @@
+"""
+Movie counters of age ratings and genres (`MovieCounters`).
+
+Movie saves and deletes and genre link changes of a movie apply their
+difference to the counters with `F()` expressions, no `COUNT` is run:
+one `UPDATE` per touched age rating / genre. Writes that do not know
+the previous state (genre side link changes, bulk writes) recount the
+touched rows instead, and `reconcile_movie_counters` fixes any drift
+left by writes around the ORM.
+
+`latest_release_date` cannot be decremented: removing the movie that
+set it recomputes it with a subquery in the same `UPDATE`.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+
+from movies.models import AgeRating, Genre, Movie
+from movies.models.counters import COUNTER_FIELDS, MovieCounters
+
+# `Movie` lookup of the movies of each counted model
+COUNTED_MODELS: dict[type[MovieCounters], str] = {
+    AgeRating: "age_rating",
+    Genre: "genres",
+}
+
+# what a movie adds to the counters: `(duration, release_date)`
+Facts = tuple[int | None, date | None]
+
+_FACT_FIELDS = ("age_rating_id", "duration", "release_date")
+
+
+def get_stored_facts(movie: Movie) -> tuple[str | None, Facts] | None:
+    """
+    `(age_rating_id, facts)` of `movie` as stored, `None` when unknown.
+    """
+    values = getattr(movie, "_loaded_values", {})
+    if not all(name in values for name in _FACT_FIELDS):
+        return None
+    return values["age_rating_id"], (values["duration"], values["release_date"])
+
+
+def get_current_facts(movie: Movie) -> tuple[str | None, Facts]:
+    return movie.age_rating_id, (movie.duration, movie.release_date)
+
+
+def set_stored_facts(movie: Movie, age_rating_id: str | None, facts: Facts) -> None:
+    values = dict(zip(_FACT_FIELDS, (age_rating_id, *facts), strict=True))
+    movie._loaded_values = {**getattr(movie, "_loaded_values", {}), **values}  # noqa: SLF001
+
+
+@dataclass
+class _Delta:
+    count: int = 0
+    duration_total: int = 0
+    duration_count: int = 0
+    newest_date: date | None = None
+    removed_dates: set[date] = field(default_factory=set)
+
+    def add(self, facts: Facts, sign: int) -> None:
+        duration, release_date = facts
+        self.count += sign
+        if duration is not None:
+            self.duration_total += sign * duration
+            self.duration_count += sign
+        if release_date is None:
+            return
+        if sign < 0:
+            self.removed_dates.add(release_date)
+        elif self.newest_date is None or release_date > self.newest_date:
+            self.newest_date = release_date
+
+    def get_signature(self) -> tuple:
+        return (
+            self.count,
+            self.duration_total,
+            self.duration_count,
+            self.newest_date,
+            frozenset(self.removed_dates),
+        )
+
+    def get_updates(self, lookup: str) -> dict:
+        updates = {}
+        if self.count:
+            updates["movie_count"] = F("movie_count") + self.count
+        if self.duration_total:
+            updates["duration_total"] = F("duration_total") + self.duration_total
+        if self.duration_count:
+            updates["duration_count"] = F("duration_count") + self.duration_count
+
+        latest = F("latest_release_date")
+        if self.removed_dates:
+            # the current rows, the movie writes are already done
+            latest = Case(
+                When(
+                    latest_release_date__in=self.removed_dates,
+                    then=Subquery(
+                        Movie.objects.filter(
+                            **{lookup: OuterRef("pk")},
+                            release_date__isnull=False,
+                        )
+                        .order_by("-release_date")
+                        .values("release_date")[:1],
+                    ),
+                ),
+                default=latest,
+            )
+        if self.newest_date is not None:
+            latest = Case(
+                When(latest_release_date__gte=self.newest_date, then=latest),
+                default=Value(self.newest_date),
+            )
+        if self.removed_dates or self.newest_date is not None:
+            updates["latest_release_date"] = latest
+        return updates
+
+
+class CounterChanges:
+    """
+    Collects what movies add to / remove from age ratings and genres,
+    `apply()` writes it.
+    """
+
+    def __init__(self) -> None:
+        self.deltas: dict[type[MovieCounters], dict[object, _Delta]] = {
+            model: defaultdict(_Delta) for model in COUNTED_MODELS
+        }
+
+    def add(
+        self,
+        model: type[MovieCounters],
+        keys: Iterable[object],
+        facts: Facts,
+        sign: int = 1,
+    ) -> None:
+        for key in keys:
+            if key is not None:
+                self.deltas[model][key].add(facts, sign)
+
+    def remove(
+        self,
+        model: type[MovieCounters],
+        keys: Iterable[object],
+        facts: Facts,
+    ) -> None:
+        self.add(model, keys, facts, -1)
+
+    def apply(self) -> None:
+        for model, deltas in self.deltas.items():
+            # one `UPDATE` for the rows with the same change,
+            # e.g. all genres of a movie
+            groups = defaultdict(list)
+            for key, delta in deltas.items():
+                groups[delta.get_signature()].append((key, delta))
+            for group in groups.values():
+                updates = group[0][1].get_updates(COUNTED_MODELS[model])
+                if updates:
+                    model.objects.filter(pk__in=[key for key, _ in group]).update(
+                        **updates,
+                    )
+
+
+def load_stored_facts(movie: Movie) -> None:
+    """
+    Read the stored values of a movie that is saved without being loaded.
+    """
+    if movie.pk is None or get_stored_facts(movie) is not None:
+        return
+    row = Movie.objects.filter(pk=movie.pk).values_list(*_FACT_FIELDS).first()
+    if row is not None:
+        set_stored_facts(movie, row[0], row[1:])
+
+
+def get_genre_ids(movie: Movie) -> list[int]:
+    return list(
+        Movie.genres.through.objects.filter(movie_id=movie.pk).values_list(
+            "genre_id",
+            flat=True,
+        ),
+    )
+
+
+def count_saved_movie(movie: Movie, *, created: bool) -> None:
+    stored = None if created else get_stored_facts(movie)
+    current = get_current_facts(movie)
+    if stored != current:
+        changes = CounterChanges()
+        changes.add(AgeRating, [current[0]], current[1])
+        if stored is not None:
+            changes.remove(AgeRating, [stored[0]], stored[1])
+            if stored[1] != current[1]:
+                genre_ids = get_genre_ids(movie)
+                changes.remove(Genre, genre_ids, stored[1])
+                changes.add(Genre, genre_ids, current[1])
+        changes.apply()
+    set_stored_facts(movie, *current)
+
+
+def count_deleted_movie(movie: Movie, genre_ids: Iterable[int]) -> None:
+    age_rating_id, facts = get_stored_facts(movie) or get_current_facts(movie)
+    changes = CounterChanges()
+    changes.remove(AgeRating, [age_rating_id], facts)
+    changes.remove(Genre, genre_ids, facts)
+    changes.apply()
+
+
+def count_genre_links(movie: Movie, genre_ids: Iterable[int], sign: int) -> None:
+    """
+    `genre_ids` were linked to (`sign=1`) or unlinked from (`-1`) `movie`.
+    """
+    _, facts = get_stored_facts(movie) or get_current_facts(movie)
+    changes = CounterChanges()
+    changes.add(Genre, genre_ids, facts, sign)
+    changes.apply()
+
+
+def recount(model: type[MovieCounters], keys: Iterable[object] | None = None) -> int:
+    """
+    Recompute the counters of `model` rows (all of them by default)
+    from the movies. Returns how many were off.
+    """
+    queryset = model.objects.all()
+    if keys is not None:
+        queryset = queryset.filter(pk__in=keys)
+    drifted = [group for group in _annotate_counts(queryset) if _set_counts(group)]
+    model.objects.bulk_update(drifted, COUNTER_FIELDS, batch_size=1000)
+    return len(drifted)
+
+
+def _annotate_counts(queryset: QuerySet) -> QuerySet:
+    return queryset.annotate(
+        counted_movies=Count("movies"),
+        counted_duration_total=Sum("movies__duration"),
+        counted_duration_count=Count("movies__duration"),
+        counted_latest_release_date=Max("movies__release_date"),
+    ).only("pk", *COUNTER_FIELDS)
+
+
+def _set_counts(group: MovieCounters) -> bool:
+    counted = (
+        group.counted_movies,
+        group.counted_duration_total or 0,
+        group.counted_duration_count,
+        group.counted_latest_release_date,
+    )
+    if counted == tuple(getattr(group, name) for name in COUNTER_FIELDS):
+        return False
+    for name, value in zip(COUNTER_FIELDS, counted, strict=True):
+        setattr(group, name, value)
+    return True
@@ -0,0 +1,420 @@
+"""
+Read-only fast path for list responses.
+
+A serializer is compiled once into a `RowPlan`: the columns to read with
+`QuerySet.values()` and a converter per field. Nested foreign keys are
+joined into the same query, many-to-many relations are loaded with one
+batched query; both are read from `Movie.relations_snapshot` instead when
+`MOVIES_RELATIONS_SNAPSHOT` is on, and from the `movies.lookups` tables
+(without the join, only the ids of the many-to-many links are queried)
+when `MOVIES_LOOKUP_TABLES` is on. This skips model instantiation and
+DRF's per-field `to_representation` machinery while producing exactly
+the same data. Serializers with fields the plan does not know (method
+fields, hyperlinks, dotted sources, ...) keep using the regular path.
+
+Toggled with the `MOVIES_FAST_LIST` setting.
+"""
+
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Field as ModelField
+from django.db.models import Model
+from rest_framework import ISO_8601, serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from movies import lookups
+from movies.snapshots import (
+    SNAPSHOT_FIELD,
+    is_snapshot_enabled,
+    is_snapshot_field,
+    read_snapshot,
+)
+
+# `to_representation` of these returns database values unchanged
+PASSTHROUGH_REPRESENTATIONS = frozenset(
+    (
+        serializers.BooleanField.to_representation,
+        serializers.CharField.to_representation,
+        serializers.IntegerField.to_representation,
+    ),
+)
+
+
+class UnsupportedSerializerError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class _Step:
+    name: str
+    column: str
+    convert: Callable[[object], object] | None = None
+    relation: "_Relation | None" = None
+
+
+class RowPlan:
+    def __init__(self, steps: list[_Step]) -> None:
+        self.steps = steps
+        self.columns = tuple(
+            dict.fromkeys(
+                column
+                for step in steps
+                for column in (
+                    step.column,
+                    *(step.relation.columns if step.relation else ()),
+                )
+            ),
+        )
+
+    def represent(self, rows: list[dict]) -> list[dict]:
+        """
+        Serializer data for `rows` of `QuerySet.values(*plan.columns)`.
+        """
+        steps = [
+            (
+                step.name,
+                step.column,
+                step.relation.load(rows, step.column)
+                if step.relation is not None
+                else step.convert,
+            )
+            for step in self.steps
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in steps:
+                value = row[column]
+                item[name] = (
+                    value if value is None or convert is None else convert(value)
+                )
+            data.append(item)
+        return data
+
+
+class _ForeignKeyRelation:
+    """
+    Related columns joined into the main query, like `select_related()`.
+    """
+
+    def __init__(self, field: ModelField, plan: RowPlan) -> None:
+        self.lookups = {f"{field.name}__{column}": column for column in plan.columns}
+        self.columns = tuple(self.lookups)
+        self.field = field
+        self.plan = plan
+
+    def load(self, rows: list[dict], column: str) -> Callable[[object], dict]:
+        related = {}
+        for row in rows:
+            key = row[column]
+            if key is not None and key not in related:
+                related[key] = {
+                    name: row[lookup] for lookup, name in self.lookups.items()
+                }
+        data = self.plan.represent(list(related.values()))
+        return dict(zip(related, data, strict=True)).get
+
+    def fetch(self, keys: set) -> Callable[[object], dict]:
+        """
+        The related rows of `keys` in one query, without the join.
+        """
+        target = self.field.target_field.attname
+        rows = list(
+            self.field.related_model._default_manager.filter(  # noqa: SLF001
+                **{f"{target}__in": keys},
+            ).values(target, *self.plan.columns),
+        )
+        data = self.plan.represent(rows)
+        return dict(zip((row[target] for row in rows), data, strict=True)).get
+
+
+class _ManyToManyRelation:
+    """
+    One query over the through table, like `prefetch_related()`.
+    """
+
+    columns = ()
+
+    def __init__(self, field: ModelField, plan: RowPlan) -> None:
+        through = field.remote_field.through
+        self.field = field
+        self.manager = through._default_manager  # noqa: SLF001
+        self.source = through._meta.get_field(field.m2m_field_name()).attname  # noqa: SLF001
+        target = field.m2m_reverse_field_name()
+        self.lookups = {f"{target}__{column}": column for column in plan.columns}
+        # same order as `prefetch_related()`: the related model's ordering
+        ordering = field.related_model._meta.ordering  # noqa: SLF001
+        if not all(isinstance(name, str) for name in ordering):
+            raise UnsupportedSerializerError(field)
+        self.ordering = [
+            f"-{target}__{name[1:]}" if name.startswith("-") else f"{target}__{name}"
+            for name in ordering
+        ]
+        self.plan = plan
+
+    def load(self, rows: list[dict], column: str) -> Callable[[object], list]:
+        return self.fetch({row[column] for row in rows})
+
+    def fetch(self, keys: set) -> Callable[[object], list]:
+        if not keys:
+            return lambda _: []
+        groups = defaultdict(list)
+        rows = list(
+            self.manager.filter(**{f"{self.source}__in": keys})
+            .order_by(*self.ordering)
+            .values(self.source, *self.lookups),
+        )
+        data = self.plan.represent(
+            [
+                {column: row[lookup] for lookup, column in self.lookups.items()}
+                for row in rows
+            ],
+        )
+        for row, item in zip(rows, data, strict=True):
+            groups[row[self.source]].append(item)
+        return lambda key: groups.get(key) or []
+
+
+class _LookupRelation:
+    """
+    Related rows from the `movies.lookups` table of the relation.
+    """
+
+    columns = ()
+
+    def __init__(self, field: ModelField, plan: RowPlan) -> None:
+        self.table = lookups.EMBEDDED_TABLES[field.name]
+        self.many = field.many_to_many
+        self.plan = plan
+
+    def load(self, rows: list[dict], column: str) -> Callable[[object], object]:
+        return self.fetch({row[column] for row in rows} - {None})
+
+    def fetch(self, keys: set) -> Callable[[object], object]:
+        related = self.table.get()
+        if self.many:
+            links = lookups.get_genre_ids(keys, related) if keys else {}
+            linked = {pk for ids in links.values() for pk in ids}
+            data = self._represent(related, linked)
+            return lambda key: [data[pk] for pk in links.get(key, ())]
+        return self._represent(related, keys).get
+
+    def _represent(self, related: dict, keys: set) -> dict:
+        keys = [key for key in keys if key in related]
+        data = self.plan.represent(
+            [
+                {column: getattr(related[key], column) for column in self.plan.columns}
+                for key in keys
+            ],
+        )
+        return dict(zip(keys, data, strict=True))
+
+
+class _SnapshotRelation:
+    """
+    The relation as stored in `Movie.relations_snapshot`, rows without
+    a snapshot fall back to one query of `relation`.
+    """
+
+    columns = (SNAPSHOT_FIELD,)
+
+    def __init__(
+        self,
+        name: str,
+        relation: "_ForeignKeyRelation | _ManyToManyRelation | _LookupRelation",
+    ) -> None:
+        self.name = name
+        self.relation = relation
+
+    def load(self, rows: list[dict], column: str) -> Callable[[object], object]:
+        stored = {}
+        missing = set()
+        for row in rows:
+            key = row[column]
+            if key is None or key in stored:
+                continue
+            snapshot = row[SNAPSHOT_FIELD]
+            if snapshot is None:
+                missing.add(key)
+            else:
+                stored[key] = read_snapshot(snapshot, self.name)
+        if not missing:
+            return stored.get
+        fallback = self.relation.fetch(missing)
+        return lambda key: stored[key] if key in stored else fallback(key)
+
+
+_Relation = (
+    _ForeignKeyRelation | _ManyToManyRelation | _LookupRelation | _SnapshotRelation
+)
+
+
+def _get_model_field(model: type[Model], source: str) -> ModelField:
+    if "." in source or source == "*":
+        raise UnsupportedSerializerError(source)
+    try:
+        return model._meta.get_field(source)  # noqa: SLF001
+    except LookupError as exc:
+        raise UnsupportedSerializerError(source) from exc
+
+
+def _compile_step(
+    model: type[Model],
+    name: str,
+    field: serializers.Field,
+) -> _Step:
+    model_field = _get_model_field(model, field.source)
+
+    if isinstance(field, serializers.ListSerializer):
+        if not model_field.many_to_many or model_field.auto_created:
+            raise UnsupportedSerializerError(name)
+        return _Step(
+            name,
+            model._meta.pk.attname,  # noqa: SLF001
+            relation=_with_stored(
+                model,
+                field,
+                _ManyToManyRelation(model_field, compile_plan(field.child)),
+            ),
+        )
+    if isinstance(field, serializers.ModelSerializer):
+        if not (model_field.many_to_one or model_field.one_to_one):
+            raise UnsupportedSerializerError(name)
+        return _Step(
+            name,
+            model_field.attname,
+            relation=_with_stored(
+                model,
+                field,
+                _ForeignKeyRelation(model_field, compile_plan(field)),
+            ),
+        )
+    if not model_field.concrete or model_field.many_to_many:
+        raise UnsupportedSerializerError(name)
+    return _Step(name, model_field.attname, _get_converter(name, field))
+
+
+def _with_stored(
+    model: type[Model],
+    field: serializers.Serializer,
+    relation: _ForeignKeyRelation | _ManyToManyRelation,
+) -> _Relation:
+    if not is_snapshot_field(model, field):
+        return relation
+    if lookups.is_lookup_enabled():
+        relation = _LookupRelation(relation.field, relation.plan)
+    if is_snapshot_enabled():
+        return _SnapshotRelation(field.source, relation)
+    return relation
+
+
+def _get_converter(
+    name: str,
+    field: serializers.Field,
+) -> Callable[[object], object] | None:
+    """
+    `to_representation` of a not `None` column value, `None` for as is.
+    """
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field and field.pk_field.to_representation
+    if isinstance(field, serializers.RelatedField | serializers.Serializer):
+        raise UnsupportedSerializerError(name)
+    if type(field).to_representation in PASSTHROUGH_REPRESENTATIONS:
+        return None
+    if (
+        type(field) is serializers.DateField
+        and getattr(field, "format", api_settings.DATE_FORMAT) == ISO_8601
+    ):
+        return date.isoformat
+    return field.to_representation
+
+
+def _get_plan_key(serializer: serializers.Serializer) -> tuple:
+    return (
+        type(serializer),
+        tuple(
+            (
+                name,
+                type(field),
+                _get_plan_key(field)
+                if isinstance(field, serializers.Serializer)
+                else None,
+            )
+            for name, field in serializer.fields.items()
+        ),
+    )
+
+
+_plans: dict[tuple, RowPlan] = {}
+
+
+def compile_plan(serializer: serializers.Serializer) -> RowPlan:
+    """
+    Plan of a `ModelSerializer` (or a `many=True` one), built once per
+    serializer class and set of fields.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if not isinstance(serializer, serializers.ModelSerializer):
+        raise UnsupportedSerializerError(serializer)
+
+    key = (
+        _get_plan_key(serializer),
+        is_snapshot_enabled(),
+        lookups.is_lookup_enabled(),
+    )
+    plan = _plans.get(key)
+    if plan is None:
+        model = serializer.Meta.model
+        plan = _plans[key] = RowPlan(
+            [
+                _compile_step(model, name, field)
+                for name, field in serializer.fields.items()
+                if not field.write_only
+            ],
+        )
+    return plan
+
+
+def is_fast_list_enabled() -> bool:
+    return getattr(settings, "MOVIES_FAST_LIST", True)
+
+
+class FastListMixin:
+    """
+    Serves `list` from `QuerySet.values()` through a compiled `RowPlan`.
+    """
+
+    def get_fast_list_columns(self, plan: RowPlan) -> tuple[str, ...]:
+        columns = dict.fromkeys(plan.columns)
+        # keyset cursors are built from the ordering values of the rows
+        get_ordering = getattr(self.paginator, "get_ordering", None)
+        if get_ordering is not None:
+            columns.update(
+                dict.fromkeys(name.lstrip("-") for name in get_ordering(self.request)),
+            )
+        return tuple(columns)
+
+    def list(self, request: Request, *args: object, **kwargs: object) -> Response:
+        if not is_fast_list_enabled():
+            return super().list(request, *args, **kwargs)
+        try:
+            plan = compile_plan(self.get_serializer())
+        except UnsupportedSerializerError:
+            return super().list(request, *args, **kwargs)
+
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .values(*self.get_fast_list_columns(plan))
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.represent(page))
+        return Response(plan.represent(list(queryset)))
@@ -0,0 +1,98 @@
+"""
+Sparse fieldsets: `?fields=id,title` returns only the listed fields.
+
+The view narrows the SQL to the matching columns with `.only()` and skips
+joins and prefetches for relations that were not requested.
+"""
+
+from collections.abc import Iterable
+
+from django.db.models import Model, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.serializers import Serializer
+
+FIELDS_QUERY_PARAM = "fields"
+
+
+def parse_fields(request: Request) -> frozenset[str] | None:
+    value = request.query_params.get(FIELDS_QUERY_PARAM)
+    if not value:
+        return None
+    return frozenset(filter(None, (name.strip() for name in value.split(","))))
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Accepts `fields=` to drop every other serializer field.
+    """
+
+    def __init__(
+        self,
+        *args: object,
+        fields: Iterable[str] | None = None,
+        **kwargs: object,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        fields = set(fields)
+        unknown = fields - set(self.fields)
+        if unknown:
+            message = (
+                f"Unknown fields: {', '.join(sorted(unknown))}. "
+                f"Available: {', '.join(self.fields)}."
+            )
+            raise ValidationError({FIELDS_QUERY_PARAM: [message]})
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Passes `?fields=` of `list` / `retrieve` to the serializer.
+    """
+
+    sparse_fieldset_actions = ("list", "retrieve")
+
+    def get_requested_fields(self) -> frozenset[str] | None:
+        if self.action not in self.sparse_fieldset_actions:
+            return None
+        return parse_fields(self.request)
+
+    def is_field_requested(self, name: str) -> bool:
+        fields = self.get_requested_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args: object, **kwargs: object) -> Serializer:
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def narrow_queryset(self, queryset: QuerySet, *columns: str) -> QuerySet:
+        """
+        Select only the columns of the requested fields and `columns`.
+        """
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset
+        return queryset.only(
+            *get_concrete_field_names(queryset.model, fields),
+            *columns,
+        )
+
+
+def get_concrete_field_names(model: type[Model], names: Iterable[str]) -> list[str]:
+    concrete = {
+        field.name
+        for field in model._meta.concrete_fields  # noqa: SLF001
+    }
+    # model properties computed from columns
+    computed = getattr(model, "computed_field_columns", {})
+    columns = [model._meta.pk.name]  # noqa: SLF001
+    for name in names:
+        if name in concrete:
+            columns.append(name)
+        columns.extend(computed.get(name, ()))
+    return columns
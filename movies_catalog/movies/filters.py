@@ -0,0 +1,187 @@
+import django_filters
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connections
+from django.db.models import Count, F, Q, QuerySet
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from movies.models import Movie
+
+MovieGenreLink = Movie.genres.through
+
+# text search configuration of `search_vector`, see `0010_movie_search_vector`
+SEARCH_CONFIG = "english"
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+class MovieFilterSet(django_filters.FilterSet):
+    """
+    Every filter here is served by an index, see `Movie.Meta.indexes`
+    and `0011_movie_filter_indexes` for the genre links.
+    """
+
+    release_date = django_filters.DateFromToRangeFilter(
+        label="Release date range: `release_date_after` / `release_date_before`",
+    )
+    duration = django_filters.RangeFilter(
+        label="Duration range in minutes: `duration_min` / `duration_max`",
+    )
+    age_rating = CharInFilter(
+        field_name="age_rating",
+        lookup_expr="in",
+        label="Any of the comma separated age ratings",
+    )
+    genres = NumberInFilter(
+        method="filter_genres_any",
+        label="Has any of the comma separated genre ids",
+    )
+    genres_all = NumberInFilter(
+        method="filter_genres_all",
+        label="Has all of the comma separated genre ids",
+    )
+
+    class Meta:
+        model = Movie
+        fields = (
+            "release_date",
+            "duration",
+            "age_rating",
+            "genres",
+            "genres_all",
+        )
+
+    # Both genre filters are semi-joins on the `(genre_id, movie_id)` index
+    # of the through table: no duplicated movies, no `DISTINCT`.
+
+    def filter_genres_any(
+        self,
+        queryset: QuerySet,
+        name: str,  # noqa: ARG002
+        value: list[int],
+    ) -> QuerySet:
+        return queryset.filter(
+            id__in=MovieGenreLink.objects.filter(genre_id__in=value).values(
+                "movie_id",
+            ),
+        )
+
+    def filter_genres_all(
+        self,
+        queryset: QuerySet,
+        name: str,  # noqa: ARG002
+        value: list[int],
+    ) -> QuerySet:
+        genre_ids = set(value)
+        return queryset.filter(
+            id__in=MovieGenreLink.objects.filter(genre_id__in=genre_ids)
+            .values("movie_id")
+            .annotate(genres_count=Count("genre_id"))
+            .filter(genres_count=len(genre_ids))
+            .values("movie_id"),
+        )
+
+
+class MovieOrderingFilter(OrderingFilter):
+    """
+    `?ordering=` limited to indexed columns, always tie-broken by `id`
+    so that pages are stable.
+    """
+
+    ordering_fields = (
+        "id",
+        "title",
+        "release_date",
+        "duration",
+    )
+
+    def get_ordering(
+        self,
+        request: Request,
+        queryset: QuerySet,
+        view: APIView,
+    ) -> list[str] | None:
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not {"id", "-id", "pk", "-pk"} & set(ordering):
+            descending = ordering[-1].startswith("-")
+            ordering = [*ordering, "-id" if descending else "id"]
+        return ordering
+
+
+def search_movies(
+    queryset: QuerySet,
+    term: str,
+    config: str = SEARCH_CONFIG,
+) -> QuerySet:
+    """
+    The movies matching `term` in their title or description, unordered.
+
+    On Postgres uses the GIN-indexed `search_vector` (websearch syntax:
+    `"exact phrase" -excluded`) or'ed with the trigram index on `title`
+    for typos. Other databases fall back to case-insensitive `LIKE`.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(
+            Q(title__icontains=term) | Q(description__icontains=term),
+        )
+    query = SearchQuery(term, config=config, search_type="websearch")
+    return queryset.filter(Q(search_vector=query) | Q(title__trigram_similar=term))
+
+
+class MovieSearchFilter(BaseFilterBackend):
+    """
+    Ranked `?search=` over movie title and description, see `search_movies()`.
+    On Postgres the results are ordered by relevance.
+    """
+
+    search_param = "search"
+    search_config = SEARCH_CONFIG
+
+    def get_search_term(self, request: Request) -> str:
+        return request.query_params.get(self.search_param, "").strip()
+
+    def filter_queryset(
+        self,
+        request: Request,
+        queryset: QuerySet,
+        view: APIView,  # noqa: ARG002
+    ) -> QuerySet:
+        term = self.get_search_term(request)
+        if not term:
+            return queryset
+        queryset = search_movies(queryset, term, self.search_config)
+        if connections[queryset.db].vendor != "postgresql":
+            return queryset
+
+        query = SearchQuery(term, config=self.search_config, search_type="websearch")
+        return queryset.annotate(
+            search_rank=(
+                SearchRank(F("search_vector"), query) + TrigramSimilarity("title", term)
+            ),
+        ).order_by("-search_rank", "id")
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict]:  # noqa: ARG002
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Full-text search in title and description, "
+                    "tolerant to typos in the title. "
+                    "Results are ordered by relevance."
+                ),
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,321 @@
+"""
+Streaming import of catalog dumps, see the `import_movies` command.
+
+A dump is CSV (a header row, `genres` separated by `|`) or NDJSON (one
+object per line, `genres` a list) with the fields of
+`MovieImportRowSerializer`. Rows are read lazily and imported in batches,
+each batch in its own transaction:
+
+- missing age ratings and genres are created by name, existing ones are
+  kept as they are; genres under a Postgres advisory lock, so parallel
+  imports do not create the same genre twice,
+- movies are always inserted, with their relations snapshot, and linked
+  to their genres: with `COPY` on Postgres (psycopg 3), `bulk_create`
+  elsewhere.
+
+Model signals do not run: `finish_import()` recounts the age ratings and
+genres of the imported movies once at the end, and the catalog pages
+are refreshed per batch.
+"""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import BinaryIO, TextIO
+
+from django.db import DatabaseError, connection, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from movies import catalog
+from movies.cache import (
+    NAMESPACE_AGE_RATINGS,
+    NAMESPACE_GENRES,
+    NAMESPACE_MOVIES,
+    bump_versions,
+)
+from movies.counters import recount
+from movies.models import AgeRating, Genre, Movie
+from movies.serializers.movie_bulk import MovieImportRowSerializer
+from movies.snapshots import build_snapshot
+
+IMPORT_BATCH_SIZE = 1000
+GENRE_SEPARATOR = "|"
+# `pg_advisory_xact_lock()` key serializing the creation of genres
+GENRES_LOCK_KEY = 0x6D6F7669
+
+# CSV columns that are `None` when empty
+CSV_NULLABLE_FIELDS = ("release_date", "duration", "age_rating")
+
+MOVIE_COPY_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "release_date",
+    "duration",
+    "age_rating",
+    "updated_at",
+    "relations_snapshot",
+)
+
+MovieGenreLink = Movie.genres.through
+
+# `(line number, row)`, the row is the undecodable text of a broken line
+Row = tuple[int, dict | str]
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    imported: int = 0
+    rejected: list[dict] = field(default_factory=list)
+    # the counted rows the imported movies reference
+    age_ratings: set[str] = field(default_factory=set)
+    genres: set[int] = field(default_factory=set)
+
+    def reject(self, line: int, row: dict | str, errors: dict) -> None:
+        self.rejected.append({"line": line, "row": row, "errors": errors})
+
+
+def iter_csv_rows(
+    file: TextIO,
+    genre_separator: str = GENRE_SEPARATOR,
+) -> Iterator[Row]:
+    reader = csv.DictReader(file)
+    # read the header, `line_num` then counts the lines read before a row
+    if reader.fieldnames is None:
+        return
+    while True:
+        # rows span lines when quoted values hold line breaks: their first
+        line = reader.line_num + 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        # values of columns beyond the header are under `None`
+        data = {name: value for name, value in row.items() if name is not None}
+        for name in CSV_NULLABLE_FIELDS:
+            if data.get(name) == "":
+                data[name] = None
+        genres = data.get("genres")
+        if genres is not None:
+            data["genres"] = [
+                name.strip() for name in genres.split(genre_separator) if name.strip()
+            ]
+        yield line, data
+
+
+def iter_ndjson_rows(file: BinaryIO) -> Iterator[Row]:
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError:
+            yield line, text.decode(errors="replace").rstrip("\r\n")
+
+
+def _upsert_age_ratings(names: set[str]) -> dict[str, AgeRating]:
+    age_ratings = AgeRating.objects.in_bulk(names) if names else {}
+    missing = names - age_ratings.keys()
+    if missing:
+        # a parallel import may have created some of them meanwhile
+        AgeRating.objects.bulk_create(
+            [AgeRating(name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        bump_versions(NAMESPACE_AGE_RATINGS)
+        age_ratings = AgeRating.objects.in_bulk(names)
+    return age_ratings
+
+
+def _get_genres(names: set[str]) -> dict[str, Genre]:
+    # in the genre ordering, the oldest genre wins when names repeat
+    genres = {}
+    for genre in Genre.objects.filter(name__in=names):
+        if genre.name not in genres or genre.pk < genres[genre.name].pk:
+            genres[genre.name] = genre
+    return genres
+
+
+def _upsert_genres(names: set[str]) -> dict[str, Genre]:
+    if not names:
+        return {}
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [GENRES_LOCK_KEY])
+        genres = _get_genres(names)
+        missing = names - genres.keys()
+        if missing:
+            Genre.objects.bulk_create([Genre(name=name) for name in sorted(missing)])
+            transaction.on_commit(lambda: bump_versions(NAMESPACE_GENRES))
+            genres = _get_genres(names)
+    return genres
+
+
+def _validate_rows(
+    rows: Iterable[Row],
+    result: ImportResult,
+) -> list[tuple[int, dict, dict]]:
+    """
+    `(line, row, validated data)` of the valid rows, the others are rejected.
+    """
+    valid = []
+    # one instance: building the fields of a serializer costs more than
+    # validating a row
+    serializer = MovieImportRowSerializer()
+    for line, row in rows:
+        if not isinstance(row, dict):
+            message = "Invalid JSON." if isinstance(row, str) else "Expected an object."
+            result.reject(line, row, {"non_field_errors": [message]})
+            continue
+        try:
+            valid.append((line, row, serializer.run_validation(row)))
+        except ValidationError as exc:
+            result.reject(line, row, as_serializer_error(exc))
+    return valid
+
+
+def _build_movies(
+    valid: list[dict],
+) -> tuple[list[Movie], list[list[int]]]:
+    """
+    Unsaved movies of the rows and the genre ids of each.
+    """
+    age_ratings = _upsert_age_ratings(
+        {data["age_rating"] for data in valid} - {None},
+    )
+    genres = _upsert_genres({name for data in valid for name in data.get("genres", ())})
+    # snapshots list the genres in their ordering, as `_get_genres()` read them
+    position = {genre.pk: index for index, genre in enumerate(genres.values())}
+
+    movies = []
+    genre_ids = []
+    # `COPY` does not apply `auto_now`
+    now = timezone.now()
+    for data in valid:
+        age_rating = age_ratings.get(data["age_rating"])
+        movie_genres = sorted(
+            {genres[name] for name in data.get("genres", ())},
+            key=lambda genre: position[genre.pk],
+        )
+        movies.append(
+            Movie(
+                title=data["title"],
+                description=data.get("description", ""),
+                release_date=data.get("release_date"),
+                duration=data.get("duration"),
+                age_rating=age_rating,
+                updated_at=now,
+                relations_snapshot=build_snapshot(age_rating, movie_genres),
+            ),
+        )
+        genre_ids.append([genre.pk for genre in movie_genres])
+    return movies, genre_ids
+
+
+def can_copy() -> bool:
+    return connection.vendor == "postgresql" and is_psycopg3
+
+
+def _copy_rows(table: str, columns: Iterable[str], rows: Iterable[list]) -> None:
+    quote_name = connection.ops.quote_name
+    sql = f"COPY {quote_name(table)} ({', '.join(map(quote_name, columns))}) FROM STDIN"
+    # `copy()` is psycopg's own, its errors are not wrapped by Django
+    with (
+        connection.cursor() as cursor,
+        connection.wrap_database_errors,
+        cursor.copy(sql) as copy,
+    ):
+        for row in rows:
+            copy.write_row(row)
+
+
+def _copy_movies(movies: list[Movie], genre_ids: list[list[int]]) -> None:
+    # ids up front, `COPY` returns nothing
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+            "FROM generate_series(1, %s)",
+            [Movie._meta.db_table, Movie._meta.pk.column, len(movies)],  # noqa: SLF001
+        )
+        for movie, (pk,) in zip(movies, cursor.fetchall(), strict=True):
+            movie.pk = pk
+    fields = [Movie._meta.get_field(name) for name in MOVIE_COPY_FIELDS]  # noqa: SLF001
+    _copy_rows(
+        Movie._meta.db_table,  # noqa: SLF001
+        [model_field.column for model_field in fields],
+        (
+            [
+                model_field.get_db_prep_save(
+                    getattr(movie, model_field.attname),
+                    connection,
+                )
+                for model_field in fields
+            ]
+            for movie in movies
+        ),
+    )
+    _copy_rows(
+        MovieGenreLink._meta.db_table,  # noqa: SLF001
+        ("movie_id", "genre_id"),
+        (
+            [movie.pk, pk]
+            for movie, pks in zip(movies, genre_ids, strict=True)
+            for pk in pks
+        ),
+    )
+
+
+def _insert_movies(movies: list[Movie], genre_ids: list[list[int]]) -> None:
+    Movie.objects.bulk_create(movies)
+    MovieGenreLink.objects.bulk_create(
+        [
+            MovieGenreLink(movie_id=movie.pk, genre_id=pk)
+            for movie, pks in zip(movies, genre_ids, strict=True)
+            for pk in pks
+        ],
+    )
+
+
+def import_batch(rows: list[Row]) -> ImportResult:
+    """
+    Validate and insert a batch of rows. The valid rows are inserted all
+    together or, on a database error, rejected all together.
+    """
+    result = ImportResult(rows=len(rows))
+    valid = _validate_rows(rows, result)
+    if not valid:
+        return result
+    movies, genre_ids = _build_movies([data for _, _, data in valid])
+    try:
+        with transaction.atomic():
+            if can_copy():
+                _copy_movies(movies, genre_ids)
+            else:
+                _insert_movies(movies, genre_ids)
+            transaction.on_commit(lambda: bump_versions(NAMESPACE_MOVIES))
+    except DatabaseError as exc:
+        for line, row, _ in valid:
+            result.reject(line, row, {"non_field_errors": [str(exc)]})
+        return result
+    if catalog.is_catalog_enabled():
+        catalog.refresh_entries([movie.pk for movie in movies])
+
+    result.imported = len(movies)
+    result.age_ratings = {movie.age_rating_id for movie in movies} - {None}
+    result.genres = {pk for pks in genre_ids for pk in pks}
+    return result
+
+
+def finish_import(age_ratings: set[str], genres: set[int]) -> None:
+    """
+    Recount the age ratings and genres of the imported movies.
+    """
+    recount(AgeRating, age_ratings)
+    recount(Genre, genres)
+    bump_versions(NAMESPACE_AGE_RATINGS, NAMESPACE_GENRES)
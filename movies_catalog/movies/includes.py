@@ -0,0 +1,32 @@
+from collections.abc import Iterable
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+INCLUDE_QUERY_PARAM = "include"
+# `?include=1` keeps its original meaning: embed every relation
+INCLUDE_ALL_VALUES = frozenset({"1", "true", "all"})
+
+MOVIE_RELATIONS = ("age_rating", "genres")
+
+
+def parse_include(request: Request, relations: Iterable[str]) -> frozenset[str]:
+    """
+    Relations to embed: `?include=age_rating,genres`, `?include=1` for all.
+    """
+    value = request.query_params.get(INCLUDE_QUERY_PARAM, "").strip()
+    if not value:
+        return frozenset()
+    relations = frozenset(relations)
+    if value.lower() in INCLUDE_ALL_VALUES:
+        return relations
+
+    names = frozenset(filter(None, (name.strip() for name in value.split(","))))
+    unknown = names - relations
+    if unknown:
+        message = (
+            f"Unknown relations: {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(sorted(relations))}, or 1 for all."
+        )
+        raise ValidationError({INCLUDE_QUERY_PARAM: [message]})
+    return names
@@ -0,0 +1,58 @@
+"""
+Internal endpoints for operators, served to `INTERNAL_IPS` only.
+
+`/internal/db-pools/` reports the database connections of the worker
+process that answers: the psycopg pool statistics of pooled aliases,
+`CONN_MAX_AGE` of the others. Pools are per process, so a deployment
+opens up to `workers x max_size` connections per alias; sample a few
+responses (the `pid` differs) to size `DB_POOL_MAX_SIZE` for the
+gunicorn / uvicorn worker count.
+"""
+
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpRequest, JsonResponse
+from django.views.decorators.http import require_GET
+
+
+def get_pool_stats(alias: str) -> dict:
+    connection = connections[alias]
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        return {
+            "pooled": False,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+        }
+    # psycopg only reports the counters that are not zero
+    stats = pool.get_stats()
+    return {
+        "pooled": True,
+        "min_size": stats["pool_min"],
+        "max_size": stats["pool_max"],
+        "size": stats["pool_size"],
+        "in_use": stats["pool_size"] - stats["pool_available"],
+        "available": stats["pool_available"],
+        "waiting": stats["requests_waiting"],
+        "requests": stats.get("requests_num", 0),
+        "queued": stats.get("requests_queued", 0),
+        "wait_ms": stats.get("requests_wait_ms", 0),
+        # requests that got no connection within the pool `timeout`
+        "timeouts": stats.get("requests_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+        "connection_errors": stats.get("connections_errors", 0),
+    }
+
+
+@require_GET
+def db_pools(request: HttpRequest) -> JsonResponse:
+    if request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS:
+        raise Http404
+    return JsonResponse(
+        {
+            "pid": os.getpid(),
+            "databases": {alias: get_pool_stats(alias) for alias in connections},
+        },
+    )
@@ -0,0 +1,191 @@
+"""
+In-process lookup tables of the small, rarely changing models.
+
+A `LookupTable` keeps every row of its model in the worker process,
+shared by all requests, together with the `movies.cache` versions of its
+namespaces. Each read checks the versions (one cache `get_many`) and
+reloads the rows with one query when a write bumped them, so the tables
+are never staler than the response cache. With a cache local to each
+process, the versions only see the writes of their own worker: the rows
+are also reloaded once they are `MOVIES_LOOKUP_TABLES_MAX_AGE` seconds
+old.
+
+Age ratings and genres are used for:
+
+- the age rating and genre lists, instead of a query per request,
+- the `include=` relations of movies, instead of the `age_rating` join
+  and the genres query: the movies only need their genre ids, read from
+  the through table.
+
+Toggled with the `MOVIES_LOOKUP_TABLES` setting.
+"""
+
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+from movies.cache import (
+    NAMESPACE_AGE_RATINGS,
+    NAMESPACE_GENRES,
+    NAMESPACE_MOVIES,
+    get_versions,
+)
+from movies.models import AgeRating, Genre, Movie
+from movies.serializers.age_rating_base import AgeRatingNestedSerializer
+from movies.serializers.genre_base import GenreNestedSerializer
+
+DEFAULT_MAX_AGE = 60
+
+
+def is_lookup_enabled() -> bool:
+    return getattr(settings, "MOVIES_LOOKUP_TABLES", False)
+
+
+def get_max_age() -> float:
+    return getattr(settings, "MOVIES_LOOKUP_TABLES_MAX_AGE", DEFAULT_MAX_AGE)
+
+
+@dataclass(frozen=True)
+class _Loaded:
+    versions: dict[str, str]
+    loaded_at: float
+    rows: dict[object, Model]
+
+
+class LookupTable:
+    """
+    All rows of `model` by pk, in the model ordering, reloaded when the
+    version of one of `namespaces` changes or when they are older than
+    `get_max_age()`. `fields` limits the columns.
+    """
+
+    def __init__(
+        self,
+        model: type[Model],
+        namespaces: Iterable[str],
+        fields: Iterable[str] | None = None,
+    ) -> None:
+        self.model = model
+        self.namespaces = tuple(namespaces)
+        self.fields = None if fields is None else tuple(fields)
+        self._loaded: _Loaded | None = None
+
+    def get(self) -> dict[object, Model]:
+        """
+        The current rows; treat them as read only, they are shared.
+        """
+        versions = get_versions(self.namespaces)
+        now = time.monotonic()
+        loaded = self._loaded
+        if (
+            loaded is None
+            or loaded.versions != versions
+            or now - loaded.loaded_at >= get_max_age()
+        ):
+            # versions before rows: a concurrent write bumps them again
+            loaded = self._loaded = _Loaded(versions, now, self._load())
+        return loaded.rows
+
+    async def aget(self) -> dict[object, Model]:
+        return await sync_to_async(self.get)()
+
+    def _load(self) -> dict[object, Model]:
+        # the primary: a lagging replica would be cached until the next write
+        qs = self.model._default_manager.using(DEFAULT_DB_ALIAS)  # noqa: SLF001
+        if self.fields is not None:
+            qs = qs.only(*self.fields)
+        return {row.pk: row for row in qs}
+
+
+# whole rows, with the movie counters
+AGE_RATINGS = LookupTable(AgeRating, (NAMESPACE_AGE_RATINGS, NAMESPACE_MOVIES))
+GENRES = LookupTable(Genre, (NAMESPACE_GENRES, NAMESPACE_MOVIES))
+
+# what the nested serializers embed in movies, movie writes keep them
+EMBEDDED_TABLES: dict[str, LookupTable] = {
+    "age_rating": LookupTable(
+        AgeRating,
+        (NAMESPACE_AGE_RATINGS,),
+        AgeRatingNestedSerializer.Meta.fields,
+    ),
+    "genres": LookupTable(
+        Genre,
+        (NAMESPACE_GENRES,),
+        GenreNestedSerializer.Meta.fields,
+    ),
+}
+
+
+def get_genre_ids(movie_ids: Iterable[int], genres: dict) -> dict[int, list]:
+    """
+    Ids of the `genres` rows linked to the movies, in their order, one
+    query over the through table.
+    """
+    position = {pk: index for index, pk in enumerate(genres)}
+    links = defaultdict(list)
+    for movie_id, genre_id in Movie.genres.through.objects.filter(
+        movie_id__in=movie_ids,
+    ).values_list("movie_id", "genre_id"):
+        if genre_id in position:
+            links[movie_id].append(genre_id)
+    for genre_ids in links.values():
+        genre_ids.sort(key=position.__getitem__)
+    return links
+
+
+def attach_relations(movies: Iterable[Movie], relations: Iterable[str]) -> None:
+    """
+    Set the embedded `relations` of the movies from the lookup tables, as
+    `select_related()` / `prefetch_related()` would. Movies that have them
+    loaded already are left alone.
+    """
+    movies = list(movies)
+    relations = set(relations)
+    if "age_rating" in relations:
+        _attach_age_ratings(movies)
+    if "genres" in relations:
+        _attach_genres(movies)
+
+
+def _attach_age_ratings(movies: list[Movie]) -> None:
+    field = Movie._meta.get_field("age_rating")  # noqa: SLF001
+    if pending := [movie for movie in movies if not field.is_cached(movie)]:
+        age_ratings = EMBEDDED_TABLES["age_rating"].get()
+        for movie in pending:
+            field.set_cached_value(movie, age_ratings.get(movie.age_rating_id))
+
+
+def _attach_genres(movies: list[Movie]) -> None:
+    if pending := [
+        movie
+        for movie in movies
+        if "genres" not in getattr(movie, "_prefetched_objects_cache", {})
+    ]:
+        genres = EMBEDDED_TABLES["genres"].get()
+        links = get_genre_ids([movie.pk for movie in pending], genres)
+        for movie in pending:
+            linked = [genres[pk] for pk in links.get(movie.pk, ())]
+            _set_prefetched_genres(movie, linked)
+
+
+def _set_prefetched_genres(movie: Movie, genres: list[Genre]) -> None:
+    # what `prefetch_related_objects()` stores
+    qs = movie.genres.get_queryset()
+    qs._result_cache = genres  # noqa: SLF001
+    qs._prefetch_done = True  # noqa: SLF001
+    if not hasattr(movie, "_prefetched_objects_cache"):
+        movie._prefetched_objects_cache = {}  # noqa: SLF001
+    movie._prefetched_objects_cache["genres"] = qs  # noqa: SLF001
+
+
+async def aattach_relations(
+    movies: Iterable[Movie],
+    relations: Iterable[str],
+) -> None:
+    await sync_to_async(attach_relations)(list(movies), relations)
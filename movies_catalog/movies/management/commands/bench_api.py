@@ -0,0 +1,275 @@
+import json
+import subprocess
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+
+from movies.benchmarking import summarize_timings
+from movies.models import AgeRating, Movie
+from movies.querystats import record_queries
+
+# a request of a scenario: method, path and JSON body
+Call = tuple[str, str, object]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    # prepares the n-th request, not timed
+    prepare: Callable[[int], Call]
+
+
+def _get(path: str) -> Callable[[int], Call]:
+    return lambda _: ("get", path, None)
+
+
+def _movie_body(number: int) -> dict:
+    return {
+        "title": f"Benchmark movie {number}",
+        "description": "Created by bench_api",
+        "release_date": "2020-01-01",
+        "duration": 100,
+        "age_rating": AgeRating.objects.values_list("pk", flat=True).first(),
+    }
+
+
+def _new_movie_path(number: int) -> str:
+    movie = Movie.objects.create(title=f"Benchmark movie {number}")
+    return f"/api/movies/{movie.pk}/"
+
+
+def _new_age_rating_path(number: int) -> str:
+    age_rating = AgeRating.objects.create(name=f"B{number}")
+    return f"/api/age-ratings/{age_rating.pk}/"
+
+
+def get_scenarios() -> list[Scenario]:
+    movie_ids = list(Movie.objects.order_by("?").values_list("pk", flat=True)[:100])
+    age_rating = AgeRating.objects.order_by("pk").first()
+    if not movie_ids or age_rating is None:
+        msg = "The catalog is empty, run `seed_catalog` first"
+        raise CommandError(msg)
+
+    def movie_path(number: int, query: str = "") -> str:
+        return f"/api/movies/{movie_ids[number % len(movie_ids)]}/{query}"
+
+    return [
+        Scenario("movies.list", _get("/api/movies/")),
+        Scenario("movies.list include=1", _get("/api/movies/?include=1")),
+        Scenario(
+            "movies.list include=age_rating",
+            _get("/api/movies/?include=age_rating"),
+        ),
+        Scenario(
+            "movies.list cursor page_size=100 include=1",
+            _get("/api/movies/?pagination=cursor&page_size=100&include=1"),
+        ),
+        Scenario(
+            "movies.list filter+ordering",
+            _get("/api/movies/?duration_min=90&ordering=-release_date&include=1"),
+        ),
+        Scenario("movies.list search", _get("/api/movies/?search=hero")),
+        Scenario("movies.retrieve", lambda n: ("get", movie_path(n), None)),
+        Scenario(
+            "movies.retrieve include=1",
+            lambda n: ("get", movie_path(n, "?include=1"), None),
+        ),
+        Scenario("movies.create", lambda n: ("post", "/api/movies/", _movie_body(n))),
+        Scenario("movies.update", lambda n: ("put", movie_path(n), _movie_body(n))),
+        Scenario(
+            "movies.partial_update",
+            lambda n: ("patch", movie_path(n), {"duration": 90 + n % 60}),
+        ),
+        Scenario("movies.destroy", lambda n: ("delete", _new_movie_path(n), None)),
+        Scenario(
+            "movies.bulk 100 rows",
+            lambda n: (
+                "post",
+                "/api/movies/bulk/",
+                [_movie_body(n * 100 + row) for row in range(100)],
+            ),
+        ),
+        Scenario("movies.export ndjson", _get("/api/movies/export/?include=1")),
+        Scenario("age_ratings.list", _get("/api/age-ratings/")),
+        Scenario(
+            "age_ratings.retrieve",
+            _get(f"/api/age-ratings/{age_rating.pk}/"),
+        ),
+        Scenario(
+            "age_ratings.create",
+            lambda n: ("post", "/api/age-ratings/", {"name": f"C{n}"}),
+        ),
+        Scenario(
+            "age_ratings.update",
+            lambda _: (
+                "put",
+                f"/api/age-ratings/{age_rating.pk}/",
+                {"name": age_rating.pk, "description": age_rating.description},
+            ),
+        ),
+        Scenario(
+            "age_ratings.partial_update",
+            lambda _: (
+                "patch",
+                f"/api/age-ratings/{age_rating.pk}/",
+                {"description": age_rating.description},
+            ),
+        ),
+        Scenario(
+            "age_ratings.destroy",
+            lambda n: ("delete", _new_age_rating_path(n), None),
+        ),
+        Scenario(
+            "age_ratings.movies",
+            _get(f"/api/age-ratings/{age_rating.pk}/movies/"),
+        ),
+    ]
+
+
+def _get_revision() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        "Latency percentiles, throughput and queries per request of every "
+        "MovieViewSet / AgeRatingViewSet action, with and without `include`. "
+        "Run `seed_catalog` first. Writes are rolled back, the response "
+        "cache is disabled. Results are written as JSON, `--compare` "
+        "fails on regressions against an earlier run."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--only",
+            default="",
+            help="run the scenarios whose name contains this text",
+        )
+        parser.add_argument("--output", type=Path, help="write results here")
+        parser.add_argument("--compare", type=Path, help="earlier results")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="allowed relative p50 slowdown for --compare",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        requests, warmup = options["requests"], options["warmup"]
+        with (
+            override_settings(
+                MOVIES_RESPONSE_CACHE={"ENABLED": False},
+                ALLOWED_HOSTS=["testserver"],
+            ),
+            transaction.atomic(),
+        ):
+            scenarios = [
+                scenario
+                for scenario in get_scenarios()
+                if options["only"] in scenario.name
+            ]
+            results = {
+                scenario.name: self.run_scenario(scenario, requests, warmup)
+                for scenario in scenarios
+            }
+            transaction.set_rollback(True)
+
+        report = {
+            "meta": {
+                "revision": _get_revision(),
+                "created_at": datetime.now(tz=UTC).isoformat(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "movies": Movie.objects.count(),
+                "requests": requests,
+            },
+            "results": results,
+        }
+        if options["output"] is not None:
+            options["output"].write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["compare"] is not None:
+            self.compare(
+                results,
+                json.loads(options["compare"].read_text()),
+                options["threshold"],
+            )
+
+    def run_scenario(self, scenario: Scenario, requests: int, warmup: int) -> dict:
+        client = Client()
+        timings, queries = [], []
+        for number in range(warmup + requests):
+            method, path, body = scenario.prepare(number)
+            kwargs = {}
+            if body is not None:
+                kwargs = {"data": json.dumps(body), "content_type": "application/json"}
+            with record_queries() as stats:
+                started = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:  # noqa: PLR2004
+                msg = (
+                    f"{scenario.name}: {method.upper()} {path} "
+                    f"responded with {response.status_code}"
+                )
+                raise CommandError(msg)
+            if number >= warmup:
+                timings.append(elapsed)
+                queries.append(stats.count)
+
+        result = {
+            **summarize_timings(timings),
+            "queries": round(sum(queries) / len(queries), 2),
+            "max_queries": max(queries),
+        }
+        self.stdout.write(
+            f"{scenario.name:<44} p50 {result['p50_ms']:8.2f} ms  "
+            f"p99 {result['p99_ms']:8.2f} ms  {result['rps']:8.1f} req/s  "
+            f"{result['queries']:6.2f} queries",
+        )
+        return result
+
+    def compare(self, results: dict, baseline: dict, threshold: float) -> None:
+        regressions = []
+        for name, result in results.items():
+            before = baseline["results"].get(name)
+            if before is None:
+                continue
+            change = result["p50_ms"] / before["p50_ms"] - 1
+            self.stdout.write(
+                f"{name:<44} p50 {before['p50_ms']:8.2f} -> "
+                f"{result['p50_ms']:8.2f} ms ({change:+.0%}), queries "
+                f"{before['max_queries']} -> {result['max_queries']}",
+            )
+            if change > threshold:
+                regressions.append(f"{name}: p50 {change:+.0%}")
+            if result["max_queries"] > before["max_queries"]:
+                regressions.append(
+                    f"{name}: {before['max_queries']} -> "
+                    f"{result['max_queries']} queries",
+                )
+        if regressions:
+            msg = "Regressions:\n" + "\n".join(regressions)
+            raise CommandError(msg)
+        self.stdout.write(self.style.SUCCESS("No regressions"))
@@ -0,0 +1,115 @@
+import asyncio
+import statistics
+import time
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from movies.benchmarking import seed_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "In-process load test of movie reads: the DRF viewset through the "
+        "WSGI handler (a thread per connection) and through the ASGI "
+        "handler, and the async views (`api/async/`) through the ASGI "
+        "handler. Response caching is disabled for the run."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--query", default="include=1")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="generate movies until the catalog has this many",
+        )
+
+    def handle(
+        self,
+        *args: object,  # noqa: ARG002
+        requests: int,
+        concurrency: int,
+        query: str,
+        seed: int,
+        **options: object,  # noqa: ARG002
+    ) -> None:
+        if seed:
+            self.stdout.write(f"Seeded {seed_catalog(seed)} movies")
+
+        sync_path = f"/api/movies/?{query}"
+        async_path = f"/api/async/movies/?{query}"
+        with override_settings(
+            MOVIES_RESPONSE_CACHE={"ENABLED": False},
+            ALLOWED_HOSTS=["testserver"],
+        ):
+            self.report(
+                "wsgi, DRF viewset",
+                self.run_threads(sync_path, requests, concurrency),
+            )
+            self.report(
+                "asgi, DRF viewset",
+                asyncio.run(self.run_tasks(sync_path, requests, concurrency)),
+            )
+            self.report(
+                "asgi, async views",
+                asyncio.run(self.run_tasks(async_path, requests, concurrency)),
+            )
+
+    def run_threads(
+        self,
+        path: str,
+        requests: int,
+        concurrency: int,
+    ) -> tuple[float, list[float]]:
+        def call() -> float:
+            started = time.perf_counter()
+            response = Client().get(path)
+            self.check_status(path, response.status_code)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(lambda _: call(), range(requests)))
+        return time.perf_counter() - started, latencies
+
+    async def run_tasks(
+        self,
+        path: str,
+        requests: int,
+        concurrency: int,
+    ) -> tuple[float, list[float]]:
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient()
+
+        async def call(get: Callable[[str], Awaitable]) -> float:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await get(path)
+                self.check_status(path, response.status_code)
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(call(client.get) for _ in range(requests)),
+        )
+        return time.perf_counter() - started, latencies
+
+    def check_status(self, path: str, status_code: int) -> None:
+        if status_code != 200:  # noqa: PLR2004
+            msg = f"GET {path} responded with {status_code}"
+            raise CommandError(msg)
+
+    def report(self, name: str, result: tuple[float, list[float]]) -> None:
+        elapsed, latencies = result
+        quantiles = statistics.quantiles(latencies, n=20)
+        p50, p95 = quantiles[9] * 1000, quantiles[18] * 1000
+        self.stdout.write(
+            f"{name:<20} {len(latencies) / elapsed:8.1f} req/s  "
+            f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms",
+        )
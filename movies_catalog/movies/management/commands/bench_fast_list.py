@@ -0,0 +1,89 @@
+from argparse import ArgumentParser
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from movies.benchmarking import median_ms, seed_catalog, time_calls
+from movies.fastpath import compile_plan
+from movies.includes import MOVIE_RELATIONS
+from movies.models import Movie
+from movies.serializers import MovieDetailSerializerExtended, MovieSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the serializer and the fast path (`movies.fastpath`) "
+        "on one page of movies: checks that the rendered JSON is identical "
+        "and reports the median time of each."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--include",
+            default=",".join(MOVIE_RELATIONS),
+            help="comma separated relations to embed, empty for none",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="generate movies when the catalog has less than `--rows`",
+        )
+
+    def handle(
+        self,
+        *args: object,  # noqa: ARG002
+        rows: int,
+        repeat: int,
+        include: str,
+        seed: bool,
+        **options: object,  # noqa: ARG002
+    ) -> None:
+        if seed:
+            created = seed_catalog(rows)
+            self.stdout.write(f"Seeded {created} movies")
+
+        includes = frozenset(filter(None, include.split(",")))
+        if unknown := includes - set(MOVIE_RELATIONS):
+            msg = f"Unknown relations: {', '.join(sorted(unknown))}"
+            raise CommandError(msg)
+
+        queryset = Movie.objects.order_by("id")[:rows]
+        if includes:
+            serializer_class = MovieDetailSerializerExtended
+            kwargs = {"include": includes}
+        else:
+            serializer_class = MovieSerializer
+            kwargs = {}
+        plan = compile_plan(serializer_class(**kwargs))
+        renderer = JSONRenderer()
+
+        def serialize() -> bytes:
+            qs = queryset
+            if "age_rating" in includes:
+                qs = qs.select_related("age_rating")
+            if "genres" in includes:
+                qs = qs.prefetch_related("genres")
+            return renderer.render(serializer_class(qs, many=True, **kwargs).data)
+
+        def fast() -> bytes:
+            return renderer.render(plan.represent(list(queryset.values(*plan.columns))))
+
+        expected, actual = serialize(), fast()
+        if expected != actual:
+            msg = "Fast path output differs from the serializer output"
+            raise CommandError(msg)
+
+        serializer_ms = median_ms(time_calls(serialize, repeat))
+        fast_ms = median_ms(time_calls(fast, repeat))
+        self.stdout.write(
+            f"{queryset.count()} rows, "
+            f"include={','.join(sorted(includes)) or '-'}, "
+            f"{len(expected)} bytes: identical output",
+        )
+        self.stdout.write(f"serializer: {serializer_ms:8.2f} ms")
+        self.stdout.write(f"fast path:  {fast_ms:8.2f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(f"speedup:    {serializer_ms / fast_ms:8.2f}x"),
+        )
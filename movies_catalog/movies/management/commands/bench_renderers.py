@@ -0,0 +1,81 @@
+import io
+import json
+from argparse import ArgumentParser
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from movies.benchmarking import median_ms, seed_catalog, time_calls
+from movies.models import Movie
+from movies.renderers import FastJSONParser, FastJSONRenderer, orjson
+from movies.serializers import MovieDetailSerializerExtended
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSON renderer / parser with `FastJSONRenderer` / "
+        "`FastJSONParser` on a page of `MovieDetailSerializerExtended` data "
+        "and on raw `values()` rows (with `date` objects)."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="generate movies when the catalog has less than `--rows`",
+        )
+
+    def handle(
+        self,
+        *args: object,  # noqa: ARG002
+        rows: int,
+        repeat: int,
+        seed: bool,
+        **options: object,  # noqa: ARG002
+    ) -> None:
+        if seed:
+            self.stdout.write(f"Seeded {seed_catalog(rows)} movies")
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING("orjson is not installed, using the fallback"),
+            )
+
+        movies = Movie.objects.order_by("id")[:rows]
+        payloads = {
+            "serializer": MovieDetailSerializerExtended(
+                movies.select_related("age_rating").prefetch_related("genres"),
+                many=True,
+            ).data,
+            "values": list(movies.values()),
+        }
+        for name, data in payloads.items():
+            self.bench(name, data, repeat)
+
+    def bench(self, name: str, data: object, repeat: int) -> None:
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        expected, actual = stdlib.render(data), fast.render(data)
+        if json.loads(expected) != json.loads(actual):
+            msg = f"{name}: rendered data differs"
+            raise CommandError(msg)
+
+        results = {
+            "render stdlib": time_calls(lambda: stdlib.render(data), repeat),
+            "render fast": time_calls(lambda: fast.render(data), repeat),
+            "parse stdlib": time_calls(
+                lambda: JSONParser().parse(io.BytesIO(expected)),
+                repeat,
+            ),
+            "parse fast": time_calls(
+                lambda: FastJSONParser().parse(io.BytesIO(actual)),
+                repeat,
+            ),
+        }
+        self.stdout.write(
+            f"{name}: {len(data)} rows, "
+            f"{len(expected)} bytes stdlib, {len(actual)} bytes fast",
+        )
+        for label, timings in results.items():
+            self.stdout.write(f"  {label:<14} {median_ms(timings):8.2f} ms")
@@ -0,0 +1,174 @@
+import json
+import time
+from argparse import ArgumentParser
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from itertools import batched
+from multiprocessing import get_context
+from pathlib import Path
+from typing import TextIO
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.importing import (
+    GENRE_SEPARATOR,
+    IMPORT_BATCH_SIZE,
+    ImportResult,
+    Row,
+    finish_import,
+    import_batch,
+    iter_csv_rows,
+    iter_ndjson_rows,
+)
+
+FORMATS = ("csv", "ndjson")
+# seconds between progress lines
+PROGRESS_INTERVAL = 5
+
+
+def _import_parallel(
+    batches: Iterable[list[Row]],
+    workers: int,
+) -> Iterator[ImportResult]:
+    # fresh interpreters: forked ones would share the database connections
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=django.setup,
+    ) as executor:
+        pending: set[Future] = set()
+        for batch in batches:
+            # read ahead just enough to keep the workers busy
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+            pending.add(executor.submit(import_batch, batch))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from (future.result() for future in done)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import movies from a CSV or NDJSON dump of any size, streamed in "
+        "batches. Missing age ratings and genres are created by name, movies "
+        "are always inserted. See `movies.importing` for the file format."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="file format, by default from the file extension",
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="processes importing batches in parallel",
+        )
+        parser.add_argument(
+            "--rejects",
+            type=Path,
+            help="write the rejected rows and their errors there, as NDJSON",
+        )
+        parser.add_argument(
+            "--genre-separator",
+            default=GENRE_SEPARATOR,
+            help="between the genre names of a CSV row",
+        )
+
+    def handle(  # noqa: PLR0913
+        self,
+        *args: object,  # noqa: ARG002
+        path: Path,
+        format: str | None,
+        batch_size: int,
+        workers: int,
+        rejects: Path | None,
+        genre_separator: str,
+        verbosity: int,
+        **options: object,  # noqa: ARG002
+    ) -> None:
+        file_format = format or path.suffix.lstrip(".").lower()
+        if file_format not in FORMATS:
+            msg = f"Unknown format of {path}, use --format ({', '.join(FORMATS)})."
+            raise CommandError(msg)
+        if batch_size < 1 or workers < 1:
+            msg = "--batch-size and --workers must be positive."
+            raise CommandError(msg)
+
+        with ExitStack() as stack:
+            try:
+                if file_format == "csv":
+                    file = stack.enter_context(
+                        path.open(encoding="utf-8-sig", newline=""),
+                    )
+                    rows = iter_csv_rows(file, genre_separator)
+                else:
+                    rows = iter_ndjson_rows(stack.enter_context(path.open("rb")))
+                rejects_file = rejects and stack.enter_context(
+                    rejects.open("w", encoding="utf-8"),
+                )
+            except OSError as exc:
+                raise CommandError(exc) from exc
+
+            batches = (list(batch) for batch in batched(rows, batch_size, strict=False))
+            results = (
+                map(import_batch, batches)
+                if workers == 1
+                else _import_parallel(batches, workers)
+            )
+            self.import_results(results, rejects_file, verbosity)
+
+    def import_results(
+        self,
+        results: Iterable[ImportResult],
+        rejects_file: TextIO | None,
+        verbosity: int,
+    ) -> None:
+        started = reported = time.monotonic()
+        total = ImportResult()
+        rejected = 0
+        try:
+            for result in results:
+                total.rows += result.rows
+                total.imported += result.imported
+                total.age_ratings |= result.age_ratings
+                total.genres |= result.genres
+                rejected += len(result.rejected)
+                if rejects_file:
+                    for rejection in result.rejected:
+                        rejects_file.write(
+                            json.dumps(rejection, ensure_ascii=False, default=str)
+                            + "\n",
+                        )
+                if verbosity and time.monotonic() - reported >= PROGRESS_INTERVAL:
+                    reported = time.monotonic()
+                    self.stdout.write(
+                        self.format_progress(total, rejected, reported - started),
+                    )
+        finally:
+            # also for the batches imported before a failure
+            finish_import(total.age_ratings, total.genres)
+        self.stdout.write(
+            self.style.SUCCESS(
+                self.format_progress(total, rejected, time.monotonic() - started),
+            ),
+        )
+
+    def format_progress(
+        self,
+        total: ImportResult,
+        rejected: int,
+        elapsed: float,
+    ) -> str:
+        rate = total.rows / elapsed if elapsed else 0
+        return (
+            f"{total.rows} rows: {total.imported} imported, {rejected} rejected "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/s)"
+        )
@@ -0,0 +1,49 @@
+from argparse import ArgumentParser
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+
+from movies.cache import NAMESPACE_MOVIES, bump_versions
+from movies.models import Movie
+from movies.snapshots import SNAPSHOT_BATCH_SIZE, refresh_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild `Movie.relations_snapshot` in batches, e.g. to backfill "
+        "before turning on MOVIES_RELATIONS_SNAPSHOT or after changing "
+        "the age rating / genre serializers. Only changed rows are written."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE)
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="only movies without a snapshot",
+        )
+
+    def handle(
+        self,
+        *args: object,  # noqa: ARG002
+        batch_size: int,
+        missing_only: bool,
+        verbosity: int,
+        **options: object,  # noqa: ARG002
+    ) -> None:
+        movies = Movie.objects.order_by("pk")
+        if missing_only:
+            movies = movies.filter(relations_snapshot__isnull=True)
+        ids = movies.values_list("pk", flat=True).iterator(chunk_size=batch_size)
+
+        seen = changed = 0
+        for batch in batched(ids, batch_size, strict=False):
+            changed += refresh_snapshots(batch, batch_size)
+            seen += len(batch)
+            if verbosity > 1:
+                self.stdout.write(f"{seen} movies, {changed} changed")
+        if changed:
+            bump_versions(NAMESPACE_MOVIES)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {changed} of {seen} snapshots"),
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from movies.cache import NAMESPACE_AGE_RATINGS, NAMESPACE_GENRES, bump_versions
+from movies.counters import recount
+from movies.models import AgeRating, Genre
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the movie counters of age ratings and genres from the "
+        "movies and fix the rows that drifted, e.g. after writes around "
+        "the ORM."
+    )
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        for model, namespace in (
+            (AgeRating, NAMESPACE_AGE_RATINGS),
+            (Genre, NAMESPACE_GENRES),
+        ):
+            drifted = recount(model)
+            if drifted:
+                bump_versions(namespace)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {drifted} fixed",  # noqa: SLF001
+            )
+        self.stdout.write(self.style.SUCCESS("Counters reconciled"))
@@ -0,0 +1,55 @@
+from argparse import ArgumentParser
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+
+from movies.cache import NAMESPACE_MOVIES, bump_versions
+from movies.catalog import CATALOG_BATCH_SIZE, refresh_entries
+from movies.models import CatalogPageEntry, Movie
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the `CatalogPageEntry` of every movie in batches, e.g. to "
+        "backfill before turning on MOVIES_CATALOG_PAGES or after changing "
+        "the movie serializers. Only changed entries are written."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=CATALOG_BATCH_SIZE)
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="only movies without an entry",
+        )
+
+    def handle(
+        self,
+        *args: object,  # noqa: ARG002
+        batch_size: int,
+        missing_only: bool,
+        verbosity: int,
+        **options: object,  # noqa: ARG002
+    ) -> None:
+        movies = Movie.objects.order_by("pk")
+        if missing_only:
+            movies = movies.exclude(pk__in=CatalogPageEntry.objects.values("pk"))
+        ids = movies.values_list("pk", flat=True).iterator(chunk_size=batch_size)
+
+        seen = changed = 0
+        for batch in batched(ids, batch_size, strict=False):
+            changed += refresh_entries(batch, batch_size)
+            seen += len(batch)
+            if verbosity > 1:
+                self.stdout.write(f"{seen} movies, {changed} changed")
+        # entries of movies deleted while the refresh was off
+        deleted, _ = CatalogPageEntry.objects.exclude(
+            pk__in=Movie.objects.values("pk"),
+        ).delete()
+        if changed or deleted:
+            bump_versions(NAMESPACE_MOVIES)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {changed} of {seen} entries, removed {deleted}",
+            ),
+        )
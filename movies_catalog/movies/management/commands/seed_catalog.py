@@ -0,0 +1,57 @@
+from argparse import ArgumentParser
+
+from django.core.management.base import BaseCommand
+
+from movies.benchmarking import (
+    SEED_AGE_RATINGS,
+    SEED_GENRES,
+    SEED_MAX_GENRES_PER_MOVIE,
+    seed_catalog,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the catalog with generated movies, age ratings and genres "
+        "for benchmarks. Existing rows are kept, the same arguments "
+        "always generate the same catalog."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--movies",
+            type=int,
+            default=10_000,
+            help="total number of movies in the catalog",
+        )
+        parser.add_argument("--genres", type=int, default=SEED_GENRES)
+        parser.add_argument(
+            "--age-ratings",
+            default=",".join(SEED_AGE_RATINGS),
+            help="comma separated age rating names",
+        )
+        parser.add_argument(
+            "--max-genres-per-movie",
+            type=int,
+            default=SEED_MAX_GENRES_PER_MOVIE,
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(
+        self,
+        *args: object,  # noqa: ARG002
+        movies: int,
+        genres: int,
+        age_ratings: str,
+        max_genres_per_movie: int,
+        seed: int,
+        **options: object,  # noqa: ARG002
+    ) -> None:
+        created = seed_catalog(
+            movies,
+            genres=genres,
+            age_ratings=tuple(filter(None, age_ratings.split(","))),
+            max_genres_per_movie=max_genres_per_movie,
+            seed=seed,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created {created} movies"))
@@ -0,0 +1,16 @@
+# Generated by Django 5.2 on 2026-10-18 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("movies", "0007_movie_genres"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(fields=["title", "id"], name="movie_title_id_idx"),
+        ),
+    ]
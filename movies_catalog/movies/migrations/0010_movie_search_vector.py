@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-18 01:03
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}title, '')), 'A')
+    || setweight(to_tsvector('pg_catalog.english', coalesce({row}description, '')), 'B')
+"""
+
+CREATE_SEARCH_SQL = f"""
+CREATE FUNCTION movies_movie_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row="NEW.")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER movies_movie_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector
+    ON movies_movie
+    FOR EACH ROW EXECUTE FUNCTION movies_movie_search_vector_update();
+
+UPDATE movies_movie SET search_vector = {SEARCH_VECTOR_SQL.format(row="")};
+
+CREATE INDEX movie_search_vector_idx
+    ON movies_movie USING gin (search_vector);
+CREATE INDEX movie_title_trgm_idx
+    ON movies_movie USING gin (title gin_trgm_ops);
+"""  # noqa: S608
+
+DROP_SEARCH_SQL = """
+DROP INDEX IF EXISTS movie_title_trgm_idx;
+DROP INDEX IF EXISTS movie_search_vector_idx;
+DROP TRIGGER IF EXISTS movies_movie_search_vector_trigger ON movies_movie;
+DROP FUNCTION IF EXISTS movies_movie_search_vector_update();
+"""
+
+
+def _run_on_postgres(sql: str):  # noqa: ANN202
+    def run(apps, schema_editor) -> None:  # noqa: ANN001, ARG001
+        # SQLite (tests, local runs) keeps the column NULL
+        # and the search falls back to `icontains`
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("movies", "0009_updated_at"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="movie",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(
+            _run_on_postgres(CREATE_SEARCH_SQL),
+            _run_on_postgres(DROP_SEARCH_SQL),
+        ),
+    ]
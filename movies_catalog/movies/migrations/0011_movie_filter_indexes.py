@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("movies", "0010_movie_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["release_date", "id"],
+                name="movie_release_date_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(fields=["duration", "id"], name="movie_duration_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["age_rating", "id"],
+                name="movie_age_rating_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["age_rating", "release_date", "id"],
+                name="movie_age_rating_release_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["age_rating", "duration", "id"],
+                name="movie_age_rating_duration_idx",
+            ),
+        ),
+        # `MovieFilterSet.genres` / `genres_all` look up movies by genre,
+        # the through table is auto-created so the index is added by hand
+        migrations.RunSQL(
+            sql=(
+                "CREATE INDEX movie_genres_genre_movie_idx "
+                "ON movies_movie_genres (genre_id, movie_id)"
+            ),
+            reverse_sql="DROP INDEX movie_genres_genre_movie_idx",
+        ),
+    ]
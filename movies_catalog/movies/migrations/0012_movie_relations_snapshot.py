@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("movies", "0011_movie_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="relations_snapshot",
+            field=models.JSONField(editable=False, null=True),
+        ),
+    ]
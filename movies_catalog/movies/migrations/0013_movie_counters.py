@@ -0,0 +1,82 @@
+# Generated by Django 5.2 on 2026-10-18 01:27
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def count_movies(apps, schema_editor):  # noqa: ANN001, ANN201, ARG001
+    for model_name in ("AgeRating", "Genre"):
+        model = apps.get_model("movies", model_name)
+        groups = list(
+            model.objects.annotate(
+                counted_movies=Count("movies"),
+                counted_duration_total=Sum("movies__duration"),
+                counted_duration_count=Count("movies__duration"),
+                counted_latest_release_date=Max("movies__release_date"),
+            ),
+        )
+        for group in groups:
+            group.movie_count = group.counted_movies
+            group.duration_total = group.counted_duration_total or 0
+            group.duration_count = group.counted_duration_count
+            group.latest_release_date = group.counted_latest_release_date
+        model.objects.bulk_update(
+            groups,
+            (
+                "movie_count",
+                "duration_total",
+                "duration_count",
+                "latest_release_date",
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("movies", "0012_movie_relations_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agerating",
+            name="duration_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="agerating",
+            name="duration_total",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="agerating",
+            name="latest_release_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="agerating",
+            name="movie_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="duration_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="duration_total",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="latest_release_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="movie_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_movies, migrations.RunPython.noop),
+    ]
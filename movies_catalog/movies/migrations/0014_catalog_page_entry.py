@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("movies", "0013_movie_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogPageEntry",
+            fields=[
+                (
+                    "movie",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="movies.movie",
+                    ),
+                ),
+                ("data", models.JSONField()),
+            ],
+            options={
+                "ordering": ("movie_id",),
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 01:59
+
+import textwrap
+
+from django.db import migrations, models
+
+
+def summarize(description):  # noqa: ANN001, ANN201
+    # `movies.models.summary.summarize()` as of this migration
+    paragraph = description.replace("\r\n", "\n").split("\n\n", 1)[0]
+    lines = textwrap.wrap(paragraph, width=50, max_lines=1, placeholder="")
+    return lines[0] if lines else ""
+
+
+def summarize_descriptions(apps, schema_editor):  # noqa: ANN001, ANN201, ARG001
+    for model_name in ("AgeRating", "Genre"):
+        model = apps.get_model("movies", model_name)
+        rows = list(model.objects.only("pk", "description"))
+        for row in rows:
+            row.summary = summarize(row.description)
+        model.objects.bulk_update(rows, ("summary",), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("movies", "0014_catalog_page_entry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agerating",
+            name="summary",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=50,
+            ),
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="summary",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=50,
+            ),
+        ),
+        migrations.RunPython(summarize_descriptions, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
 from movies.models.age_rating import AgeRating as AgeRating
+from movies.models.catalog import CatalogPageEntry as CatalogPageEntry
 from movies.models.genre import Genre as Genre
 from movies.models.movie import Movie as Movie
@@ -1,8 +1,11 @@
 from django.db import models
 from django.shortcuts import reverse
 
+from movies.models.counters import MovieCounters
+from movies.models.summary import DescriptionSummary
 
-class AgeRating(models.Model):
+
+class AgeRating(MovieCounters, DescriptionSummary):
     name = models.CharField(
         max_length=10,
         primary_key=True,
@@ -11,6 +14,7 @@ class AgeRating(models.Model):
         null=False,
         blank=True,
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("name",)
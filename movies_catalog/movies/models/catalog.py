@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class CatalogPageEntry(models.Model):
+    """
+    A movie as rendered for `/api/movies/?include=1`, maintained by
+    `movies.signals`, see `movies.catalog`.
+    """
+
+    # no foreign key constraint: entries of deleted movies are removed
+    # after the commit
+    movie = models.OneToOneField(
+        to="Movie",
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_constraint=False,
+        related_name="+",
+    )
+    # values in serializer field order, `jsonb` does not keep key order
+    data = models.JSONField()
+
+    class Meta:
+        # the column: ordering by `movie` would join the movies
+        ordering = ("movie_id",)
+
+    def __str__(self) -> str:
+        return f"Catalog entry of movie {self.movie_id}"
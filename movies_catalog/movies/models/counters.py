@@ -0,0 +1,51 @@
+from typing import ClassVar
+
+from django.db import models
+
+COUNTER_FIELDS = (
+    "movie_count",
+    "duration_total",
+    "duration_count",
+    "latest_release_date",
+)
+
+
+class MovieCounters(models.Model):
+    """
+    Aggregates of the movies of a group (age rating, genre), kept up to
+    date by `movies.counters`.
+    """
+
+    movie_count = models.IntegerField(default=0, editable=False)
+    # sum and number of the movies with a duration, for the average
+    duration_total = models.BigIntegerField(default=0, editable=False)
+    duration_count = models.IntegerField(default=0, editable=False)
+    latest_release_date = models.DateField(null=True, editable=False)
+
+    # columns of the computed fields, for `.only()`
+    computed_field_columns: ClassVar[dict[str, tuple[str, ...]]] = {
+        "average_duration": ("duration_total", "duration_count"),
+    }
+
+    class Meta:
+        abstract = True
+
+    def save(self, **kwargs: object) -> None:
+        # the counters are only changed by `UPDATE`s of `movies.counters`,
+        # saving a loaded row must not write back stale values
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(**kwargs)
+
+    @property
+    def average_duration(self) -> float | None:
+        if not self.duration_count:
+            return None
+        return round(self.duration_total / self.duration_count, 1)
@@ -1,7 +1,10 @@
 from django.db import models
 
+from movies.models.counters import MovieCounters
+from movies.models.summary import DescriptionSummary
 
-class Genre(models.Model):
+
+class Genre(MovieCounters, DescriptionSummary):
     name = models.CharField(
         max_length=100,
     )
@@ -9,6 +12,7 @@ class Genre(models.Model):
         null=False,
         blank=True,
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("name",)
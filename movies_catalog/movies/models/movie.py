@@ -7,9 +7,16 @@
 
 """
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
+class MovieManager(models.Manager):
+    def get_queryset(self) -> models.QuerySet:
+        # the search vector is only used in `WHERE` / `ORDER BY`
+        return super().get_queryset().defer("search_vector")
+
+
 class Movie(models.Model):
     title = models.CharField(max_length=120, db_index=True)
     description = models.TextField(blank=True, null=False)
@@ -27,9 +34,56 @@ class Movie(models.Model):
         blank=True,
         related_name="movies",
     )
+    # row version for conditional requests,
+    # also bumped when the genres of the movie change
+    updated_at = models.DateTimeField(auto_now=True)
+    # weighted `title` (A) + `description` (B), maintained by a Postgres
+    # trigger, see `0010_movie_search_vector`; always NULL on other DBs
+    search_vector = SearchVectorField(null=True, editable=False)
+    # embedded `age_rating` and `genres` as rendered for `include=`,
+    # maintained by `movies.signals`, see `movies.snapshots`
+    relations_snapshot = models.JSONField(null=True, editable=False)
+
+    objects = MovieManager()
 
     class Meta:
         ordering = ("id",)
+        indexes = (
+            # keyset pagination by title: `(title, id) > (%s, %s)`
+            models.Index(
+                fields=("title", "id"),
+                name="movie_title_id_idx",
+            ),
+            # `MovieFilterSet` ranges and `MovieOrderingFilter`,
+            # `id` last for the tie-breaker of the ordering
+            models.Index(
+                fields=("release_date", "id"),
+                name="movie_release_date_id_idx",
+            ),
+            models.Index(
+                fields=("duration", "id"),
+                name="movie_duration_id_idx",
+            ),
+            models.Index(
+                fields=("age_rating", "id"),
+                name="movie_age_rating_id_idx",
+            ),
+            models.Index(
+                fields=("age_rating", "release_date", "id"),
+                name="movie_age_rating_release_idx",
+            ),
+            models.Index(
+                fields=("age_rating", "duration", "id"),
+                name="movie_age_rating_duration_idx",
+            ),
+        )
 
     def __str__(self) -> str:
         return self.title
+
+    @classmethod
+    def from_db(cls, db: str, field_names: list[str], values: list) -> "Movie":
+        movie = super().from_db(db, field_names, values)
+        # the values as stored, for the deltas of `movies.counters`
+        movie._loaded_values = dict(zip(field_names, values, strict=True))  # noqa: SLF001
+        return movie
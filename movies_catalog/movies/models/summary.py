@@ -0,0 +1,40 @@
+import textwrap
+
+from django.db import models
+
+SUMMARY_WIDTH = 50
+
+
+def summarize(description: str) -> str:
+    """
+    The first line of the first paragraph of `description`, wrapped at
+    `SUMMARY_WIDTH` characters; empty for an empty description.
+    """
+    paragraph = description.replace("\r\n", "\n").split("\n\n", 1)[0]
+    lines = textwrap.wrap(paragraph, width=SUMMARY_WIDTH, max_lines=1, placeholder="")
+    return lines[0] if lines else ""
+
+
+class DescriptionSummary(models.Model):
+    """
+    Stores the `summarize()`d `description` of the model on save, for the
+    lists that only show the start of it.
+    """
+
+    summary = models.CharField(
+        max_length=SUMMARY_WIDTH,
+        blank=True,
+        default="",
+        editable=False,
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, **kwargs: object) -> None:
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "description" in update_fields:
+            self.summary = summarize(self.description)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "summary"}
+        super().save(**kwargs)
@@ -0,0 +1,308 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from typing import ClassVar, NamedTuple
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+
+PAGINATION_MODE_QUERY_PARAM = "pagination"
+PAGINATION_MODE_PAGE = "page"
+PAGINATION_MODE_CURSOR = "cursor"
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """
+    The Postgres planner's row estimate of the queryset, `None` elsewhere.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        (plan,) = cursor.fetchone()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Django paginator for large tables: above `exact_count_limit` rows the
+    count is the planner's estimate instead of a `COUNT(*)` scanning them
+    all, so the number of pages is approximate.
+    """
+
+    exact_count_limit = 10_000
+
+    @cached_property
+    def count(self) -> int:
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate > self.exact_count_limit:
+                return estimate
+        return super().count
+
+
+class Cursor(NamedTuple):
+    position: tuple
+    reverse: bool
+
+
+def _reverse_ordering(ordering: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(
+        field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+    )
+
+
+def _get_value(row: Model | dict, field: str) -> object:
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a unique composite ordering.
+
+    Unlike `PageNumberPagination` it never runs `COUNT(*)` and never uses
+    `OFFSET`: the cursor stores the ordering values of the last row seen,
+    so every page is a single index range scan.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    invalid_cursor_message = "Invalid cursor"
+    # Public ordering name -> unique ordering used for the keyset.
+    # Every ordering must end with a unique field.
+    orderings: ClassVar[dict[str, tuple[str, ...]]] = {
+        "id": ("id",),
+        "-id": ("-id",),
+    }
+    default_ordering = "id"
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,  # noqa: ARG002
+    ) -> list | None:
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request)
+        self.cursor = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.cursor is not None:
+            if self.cursor.reverse:
+                ordering = _reverse_ordering(ordering)
+            queryset = self.seek(queryset, ordering, self.cursor.position)
+
+        rows = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+
+        if self.cursor is not None and self.cursor.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_page_size(self, request: Request) -> int | None:
+        if self.page_size_query_param:
+            try:
+                value = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                pass
+            else:
+                if value > 0:
+                    return min(value, self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, request: Request) -> tuple[str, ...]:
+        name = request.query_params.get(self.ordering_query_param)
+        if not name:
+            name = self.default_ordering
+        if name not in self.orderings:
+            supported = ", ".join(self.orderings)
+            raise ValidationError(
+                {
+                    self.ordering_query_param: [
+                        f"Cursor pagination supports ordering by: {supported}.",
+                    ],
+                },
+            )
+        return self.orderings[name]
+
+    def seek(
+        self,
+        queryset: QuerySet,
+        ordering: tuple[str, ...],
+        position: tuple,
+    ) -> QuerySet:
+        """
+        The rows after `position`, converted by the ordered model fields;
+        a position they reject is an invalid cursor.
+        """
+        opts = queryset.model._meta  # noqa: SLF001
+        try:
+            position = tuple(
+                opts.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(ordering, position, strict=True)
+            )
+            return queryset.filter(self.get_seek_filter(ordering, position))
+        except (ValueError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    @classmethod
+    def get_seek_filter(cls, ordering: tuple[str, ...], position: tuple) -> Q:
+        """
+        Build `(a, b) > (x, y)` as `a >= x AND (a > x OR (a = x AND b > y))`.
+
+        The redundant leading `a >= x` lets the planner use the composite
+        index as a range scan instead of evaluating the OR for every row.
+        """
+        seek = Q()
+        for index in reversed(range(len(ordering))):
+            field = ordering[index].lstrip("-")
+            lookup = "lt" if ordering[index].startswith("-") else "gt"
+            step = Q(**{f"{field}__{lookup}": position[index]})
+            if index < len(ordering) - 1:
+                step |= Q(**{field: position[index]}) & seek
+            seek = step
+        field = ordering[0].lstrip("-")
+        lookup = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{field}__{lookup}": position[0]}) & seek
+
+    def decode_cursor(self, request: Request) -> Cursor | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position = tuple(payload["p"])
+            reverse = bool(payload.get("r"))
+        except (BinasciiError, UnicodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message) from None
+        if len(position) != len(self.ordering) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(position=position, reverse=reverse)
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        payload = {"p": list(cursor.position)}
+        if cursor.reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode(),
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_position(self, row: Model | dict) -> tuple:
+        return tuple(_get_value(row, field.lstrip("-")) for field in self.ordering)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(position=self.get_position(self.page[-1]), reverse=False),
+        )
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(
+            Cursor(position=self.get_position(self.page[0]), reverse=True),
+        )
+
+    def get_paginated_response(self, data: list) -> Response:
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            },
+        )
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict]:  # noqa: ARG002
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class MovieKeysetPagination(KeysetPagination):
+    # backed by `Movie.Meta.ordering` (pk) and the `(title, id)` index
+    orderings: ClassVar[dict[str, tuple[str, ...]]] = {
+        "id": ("id",),
+        "-id": ("-id",),
+        "title": ("title", "id"),
+        "-title": ("-title", "-id"),
+    }
+
+
+class SwitchablePaginationMixin:
+    """
+    Lets clients opt in to keyset pagination with `?pagination=cursor`.
+
+    Page-number pagination (`pagination_class`) stays the default.
+    """
+
+    cursor_pagination_class: type[BasePagination] | None = None
+
+    @property
+    def paginator(self) -> BasePagination | None:
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.get_pagination_class()
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
+
+    def get_pagination_class(self) -> type[BasePagination] | None:
+        mode = self.request.query_params.get(PAGINATION_MODE_QUERY_PARAM)
+        if mode == PAGINATION_MODE_CURSOR and self.cursor_pagination_class:
+            return self.cursor_pagination_class
+        return self.pagination_class
@@ -0,0 +1,222 @@
+"""
+Per-request SQL statistics: query count, duplicated queries and DB time.
+
+`QueryStatsMiddleware` records every query of a request (on any database
+connection and thread, e.g. `sync_to_async()` calls of async views),
+reports the numbers in a `Server-Timing` header and a structured log
+record, and warns about likely N+1 patterns
+(the same SQL run many times) and about API actions that went over the
+`query_budgets` declared on their viewset.
+
+Queries of streamed response bodies run after the middleware returns
+and are not counted. Configured with `MOVIES_QUERY_STATS` in the settings.
+"""
+
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponseBase
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    # the same SQL this many times in one request is logged as a likely N+1
+    "DUPLICATES_THRESHOLD": 5,
+}
+
+
+def get_query_stats_settings() -> dict:
+    return {
+        **DEFAULT_SETTINGS,
+        **getattr(settings, "MOVIES_QUERY_STATS", {}),
+    }
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    # enclosing recording, gets the same queries
+    parent: "QueryStats | None" = None
+
+    @property
+    def duplicates(self) -> int:
+        """
+        Queries that repeat an SQL statement already run, with any params.
+        """
+        return self.count - len(self.statements)
+
+    def most_repeated(self, threshold: int = 2) -> list[tuple[str, int]]:
+        return [
+            (sql, times)
+            for sql, times in self.statements.most_common()
+            if times >= threshold
+        ]
+
+    def add(self, sql: str, duration: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.statements[sql] += 1
+            stats = stats.parent
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats",
+    default=None,
+)
+
+
+def _record_query(
+    execute: Callable,
+    sql: str,
+    params: object,
+    many: bool,  # noqa: FBT001
+    context: dict,
+) -> object:
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_recorder(
+    connection: BaseDatabaseWrapper,
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryStats]:
+    """
+    Collect the queries run in the block and in the threads it awaits.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def get_query_budget(request: HttpRequest) -> tuple[str, int] | None:
+    """
+    `("ViewSet.action", budget)` of the DRF action serving the request.
+    """
+    match = request.resolver_match
+    if match is None:
+        return None
+    view_class = getattr(match.func, "cls", None)
+    actions = getattr(match.func, "actions", None) or {}
+    action = actions.get(request.method.lower())
+    budget = getattr(view_class, "query_budgets", {}).get(action)
+    if budget is None:
+        return None
+    return f"{view_class.__name__}.{action}", budget
+
+
+class QueryStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_query_stats_settings()["ENABLED"]:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with record_queries() as stats:
+            response = self.get_response(request)
+        return self.process(request, response, stats, started)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        if not get_query_stats_settings()["ENABLED"]:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with record_queries() as stats:
+            response = await self.get_response(request)
+        return self.process(request, response, stats, started)
+
+    def process(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+        stats: QueryStats,
+        started: float,
+    ) -> HttpResponseBase:
+        config = get_query_stats_settings()
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats.duration * 1000
+        if config["SERVER_TIMING"]:
+            response["Server-Timing"] = (
+                f'db;dur={db_ms:.2f};desc="{stats.count} queries, '
+                f'{stats.duplicates} duplicates", total;dur={total_ms:.2f}'
+            )
+
+        extra = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": stats.count,
+            "duplicates": stats.duplicates,
+            "db_ms": round(db_ms, 2),
+            "total_ms": round(total_ms, 2),
+        }
+        log.info(
+            "%s %s: %s queries (%s duplicates), db %.2f ms, total %.2f ms",
+            request.method,
+            request.path,
+            stats.count,
+            stats.duplicates,
+            db_ms,
+            total_ms,
+            extra=extra,
+        )
+
+        repeated = stats.most_repeated(config["DUPLICATES_THRESHOLD"])
+        if repeated:
+            sql, times = repeated[0]
+            log.warning(
+                "Likely N+1 in %s %s: %s times %s",
+                request.method,
+                request.path,
+                times,
+                sql,
+                extra=extra,
+            )
+        budget = get_query_budget(request)
+        if budget is not None and stats.count > budget[1]:
+            log.warning(
+                "%s went over its query budget: %s > %s",
+                budget[0],
+                stats.count,
+                budget[1],
+                extra=extra,
+            )
+        return response
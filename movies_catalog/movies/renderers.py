@@ -0,0 +1,121 @@
+import csv
+import io
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from movies.streaming import dumps
+
+try:
+    import orjson
+except ImportError:  # optional, `pip install example-drf-movies-catalog[fast]`
+    orjson = None
+
+# `OPT_NON_STR_KEYS`: list errors are keyed by index, `json` stringifies them
+_ORJSON_OPTIONS = (
+    orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+)
+# Decimal, lazy translations, querysets, ... the same way as DRF
+_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Compact JSON through `orjson`, `date` / `datetime` encoded natively.
+
+    Indented output (browsable API, `Accept: application/json; indent=4`)
+    and installations without `orjson` use DRF's stdlib renderer.
+    """
+
+    def render(
+        self,
+        data: object,
+        accepted_media_type: str | None = None,
+        renderer_context: dict | None = None,
+    ) -> bytes:
+        if orjson is None or self.get_indent(
+            accepted_media_type,
+            renderer_context or {},
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        ret = orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+        # same as DRF: keep the output valid JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9",
+            b"\\u2029",
+        )
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON request bodies through `orjson`, stdlib without it.
+    """
+
+    def parse(
+        self,
+        stream: object,
+        media_type: str | None = None,
+        parser_context: dict | None = None,
+    ) -> object:
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            msg = f"JSON parse error - {exc}"
+            raise ParseError(msg) from exc
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON, one object per line.
+
+    Streaming views write the body themselves, the renderer
+    is used for content negotiation and error responses.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(
+        self,
+        data: object,
+        accepted_media_type: str | None = None,  # noqa: ARG002
+        renderer_context: dict | None = None,  # noqa: ARG002
+    ) -> bytes:
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return "".join(f"{dumps(item)}\n" for item in items).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(
+        self,
+        data: object,
+        accepted_media_type: str | None = None,  # noqa: ARG002
+        renderer_context: dict | None = None,  # noqa: ARG002
+    ) -> bytes:
+        if data is None:
+            return b""
+        # only error responses get here, e.g. {"detail": "Not found."}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if isinstance(data, dict):
+            writer.writerow(data.keys())
+            writer.writerow(
+                value if isinstance(value, str) else dumps(value)
+                for value in data.values()
+            )
+        else:
+            writer.writerow([dumps(data)])
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,206 @@
+"""
+Read replicas for the safe API actions.
+
+`ReplicaReadsMixin` views run the queries of `GET` / `HEAD` / `OPTIONS`
+requests on one of the replicas of `MOVIES_READ_REPLICAS`, picked once
+per request, including prefetches and the rows streamed by the response.
+Everything else (writes, other views, management commands) uses the
+`default` primary. `ReplicaRouter` in `DATABASE_ROUTERS` does the routing.
+
+Replicas lag behind the primary, so for `MAX_LAG_SECONDS` reads still go
+to the primary:
+
+- after a write by the same client: `ReadYourWritesMiddleware` sets a
+  short lived cookie on every unsafe request,
+- after any change of the data of the response (the `movies.cache`
+  versions of `get_cache_namespaces()`), so a stale replica never fills
+  the response cache or an `ETag` of the new version.
+
+Locally, two SQLite files work as well (the "replica" is not synced,
+copy the file or write through the primary and read it back):
+
+    DATABASES = {
+        "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": "primary.db"},
+        "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": "replica.db"},
+    }
+    MOVIES_READ_REPLICAS = {"DATABASES": ["replica"]}
+"""
+
+import math
+import random
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponseBase
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+
+from movies.cache import get_versions
+
+DEFAULT_SETTINGS = {
+    # aliases of `DATABASES` replicating `default`
+    "DATABASES": [],
+    "MAX_LAG_SECONDS": 5,
+    "COOKIE_NAME": "movies_read_primary",
+}
+
+
+def get_replica_settings() -> dict:
+    return {
+        **DEFAULT_SETTINGS,
+        **getattr(settings, "MOVIES_READ_REPLICAS", {}),
+    }
+
+
+# the replica reads of the current request go to
+_read_database: ContextVar[str | None] = ContextVar("read_database", default=None)
+
+
+class ReplicaRouter:
+    """
+    Reads on the replica of the current request, writes on the primary.
+    """
+
+    def db_for_read(self, model: type[Model], **hints: object) -> str | None:  # noqa: ARG002
+        alias = _read_database.get()
+        if alias is None:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:  # noqa: SLF001
+            # related objects come from where the instance was read
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # the transaction sees its own uncommitted writes only
+            return None
+        return alias
+
+    def db_for_write(self, model: type[Model], **hints: object) -> str:  # noqa: ARG002
+        # also for instances read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: object) -> bool | None:  # noqa: ARG002
+        databases = {DEFAULT_DB_ALIAS, *get_replica_settings()["DATABASES"]}
+        if {obj1._state.db, obj2._state.db} <= databases:  # noqa: SLF001
+            return True
+        return None
+
+
+def _is_recent(versions: Iterable[str], max_lag: float) -> bool:
+    # version tokens are `time.time_ns()` of the last change
+    newest = max(map(int, versions), default=0)
+    return time.time_ns() - newest < max_lag * 1e9
+
+
+def _iter_on_database(alias: str, content: Iterable) -> Iterator:
+    # each chunk is produced in the context of the server iterating it
+    iterator = iter(content)
+    while True:
+        token = _read_database.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_database.reset(token)
+        yield chunk
+
+
+class ReplicaReadsMixin:
+    """
+    Runs the safe actions of a viewset on a read replica.
+    """
+
+    replica_database: str | None = None
+
+    def get_replica_database(self, request: Request) -> str | None:
+        """
+        The replica to read from, `None` to read from the primary.
+        """
+        config = get_replica_settings()
+        if (
+            not config["DATABASES"]
+            or request.method not in SAFE_METHODS
+            or getattr(request._request, "read_from_primary", False)  # noqa: SLF001
+        ):
+            return None
+        versions = get_versions(self.get_cache_namespaces())
+        if _is_recent(versions.values(), config["MAX_LAG_SECONDS"]):
+            return None
+        return random.choice(config["DATABASES"])  # noqa: S311
+
+    def initial(self, request: Request, *args: object, **kwargs: object) -> None:
+        # after `initialize_request()`, `self.action` is known here
+        self.replica_database = self.get_replica_database(request)
+        if self.replica_database is not None:
+            _read_database.set(self.replica_database)
+        super().initial(request, *args, **kwargs)
+
+    def dispatch(
+        self,
+        request: HttpRequest,
+        *args: object,
+        **kwargs: object,
+    ) -> HttpResponseBase:
+        token = _read_database.set(None)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_database.reset(token)
+        if response.streaming and self.replica_database is not None:
+            # the rows are read while the body streams
+            response.streaming_content = _iter_on_database(
+                self.replica_database,
+                response.streaming_content,
+            )
+        return response
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sends the reads of a client to the primary for a while after its
+    writes, see `ReplicaReadsMixin`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        self.process_request(request)
+        return self.process_response(request, await self.get_response(request))
+
+    def process_request(self, request: HttpRequest) -> None:
+        request.read_from_primary = (
+            get_replica_settings()["COOKIE_NAME"] in request.COOKIES
+        )
+
+    def process_response(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+    ) -> HttpResponseBase:
+        config = get_replica_settings()
+        if config["DATABASES"] and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                config["COOKIE_NAME"],
+                "1",
+                max_age=math.ceil(config["MAX_LAG_SECONDS"]),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -4,6 +4,7 @@ from movies.serializers.age_rating import (
 from movies.serializers.age_rating_base import (
     AgeRatingSerializer as AgeRatingSerializer,
 )
+from movies.serializers.genre_base import GenreSerializer as GenreSerializer
 from movies.serializers.movie import (
     MovieDetailSerializerExtended as MovieDetailSerializerExtended,
 )
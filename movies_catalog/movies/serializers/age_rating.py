@@ -1,15 +1,75 @@
+from django.db.models import Prefetch
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
+
+from movies.models import AgeRating, Movie
 from movies.serializers.age_rating_base import AgeRatingSerializer
 from movies.serializers.movie_base import MovieSerializer
 
+# how many movies are embedded into the age rating details
+AGE_RATING_MOVIES_PREVIEW_SIZE = 10
+# largest page of the `movies` sub-resource
+AGE_RATING_MOVIES_MAX_LIMIT = 1000
+# `to_attr` of the sliced `Prefetch` set up by the view
+AGE_RATING_MOVIES_PREVIEW_ATTR = "movies_preview"
 
-class AgeRatingDetailSerializer(AgeRatingSerializer):
-    movies = MovieSerializer(
-        many=True,
-        read_only=True,
+
+def get_movies_preview_prefetch() -> Prefetch:
+    """
+    Loads the embedded movies of many age ratings in one query.
+    """
+    return Prefetch(
+        "movies",
+        queryset=Movie.objects.order_by("id")[: AGE_RATING_MOVIES_PREVIEW_SIZE + 1],
+        to_attr=AGE_RATING_MOVIES_PREVIEW_ATTR,
     )
 
+
+class AgeRatingDetailSerializer(AgeRatingSerializer):
+    movies = serializers.SerializerMethodField()
+    movies_next = serializers.SerializerMethodField()
+
     class Meta(AgeRatingSerializer.Meta):
         fields = (
             *AgeRatingSerializer.Meta.fields,
             "movies",
+            "movies_next",
+        )
+
+    def get_movies_preview(self, obj: AgeRating) -> list[Movie]:
+        # one extra row tells whether there is a next page
+        preview = getattr(obj, AGE_RATING_MOVIES_PREVIEW_ATTR, None)
+        if preview is None:
+            preview = list(
+                obj.movies.order_by("id")[: AGE_RATING_MOVIES_PREVIEW_SIZE + 1],
+            )
+        return preview
+
+    @extend_schema_field(MovieSerializer(many=True))
+    def get_movies(self, obj: AgeRating) -> list[dict]:
+        preview = self.get_movies_preview(obj)
+        return MovieSerializer(
+            preview[:AGE_RATING_MOVIES_PREVIEW_SIZE],
+            many=True,
+            context=self.context,
+        ).data
+
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_movies_next(self, obj: AgeRating) -> str | None:
+        preview = self.get_movies_preview(obj)
+        if len(preview) <= AGE_RATING_MOVIES_PREVIEW_SIZE:
+            return None
+        url = reverse(
+            "movies:agerating-movies",
+            kwargs={"pk": obj.pk},
+            request=self.context.get("request"),
+        )
+        url = replace_query_param(
+            url,
+            "after",
+            preview[AGE_RATING_MOVIES_PREVIEW_SIZE - 1].pk,
         )
+        return replace_query_param(url, "limit", AGE_RATING_MOVIES_PREVIEW_SIZE)
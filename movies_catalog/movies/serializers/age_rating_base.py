@@ -1,12 +1,46 @@
 from rest_framework import serializers
 
+from movies.fieldsets import SparseFieldsetSerializerMixin
 from movies.models import AgeRating
 
 
-class AgeRatingSerializer(serializers.ModelSerializer):
+class AgeRatingNestedSerializer(serializers.ModelSerializer):
+    """
+    Age rating embedded into movies, without the movie counters.
+
+    Writes reference an existing rating by its name, as a string or as
+    the embedded object.
+    """
+
     class Meta:
         model = AgeRating
         fields = (
             "name",
             "description",
         )
+
+    def to_internal_value(self, data: object) -> AgeRating:
+        if isinstance(data, dict):
+            data = data.get("name")
+        if not isinstance(data, str):
+            msg = "Expected an age rating name."
+            raise serializers.ValidationError(msg)
+        age_rating = AgeRating.objects.filter(pk=data).first()
+        if age_rating is None:
+            msg = f'Invalid pk "{data}" - object does not exist.'
+            raise serializers.ValidationError(msg)
+        return age_rating
+
+
+class AgeRatingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    average_duration = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = AgeRating
+        fields = (
+            *AgeRatingNestedSerializer.Meta.fields,
+            "summary",
+            "movie_count",
+            "average_duration",
+            "latest_release_date",
+        )
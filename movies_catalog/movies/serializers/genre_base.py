@@ -1,9 +1,64 @@
+from collections import defaultdict
+
+from django.db.models import Q
 from rest_framework import serializers
 
+from movies.fieldsets import SparseFieldsetSerializerMixin
 from movies.models import Genre
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreReferenceListSerializer(serializers.ListSerializer):
+    """
+    Resolves the genres referenced by id or name in one `IN` query.
+    """
+
+    def to_internal_value(self, data: object) -> list[Genre]:
+        references = super().to_internal_value(data)
+        ids = {reference["id"] for reference in references if "id" in reference}
+        names = {reference["name"] for reference in references if "name" in reference}
+        genres_by_id = {}
+        genres_by_name = defaultdict(list)
+        for genre in Genre.objects.filter(Q(pk__in=ids) | Q(name__in=names)):
+            genres_by_id[genre.pk] = genre
+            genres_by_name[genre.name].append(genre)
+
+        # the same genre referenced twice is linked once
+        genres = {}
+        errors = []
+        for reference in references:
+            error = {}
+            if "id" in reference:
+                genre = genres_by_id.get(reference["id"])
+                if genre is None:
+                    error["id"] = [
+                        f'Invalid pk "{reference["id"]}" - object does not exist.',
+                    ]
+            else:
+                matches = genres_by_name[reference["name"]]
+                genre = matches[0] if len(matches) == 1 else None
+                if not matches:
+                    error["name"] = [f'Genre "{reference["name"]}" does not exist.']
+                elif genre is None:
+                    name = reference["name"]
+                    error["name"] = [
+                        f'More than one genre is named "{name}", reference it by id.',
+                    ]
+            errors.append(error)
+            if genre is not None:
+                genres[genre.pk] = genre
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return list(genres.values())
+
+
+class GenreNestedSerializer(serializers.ModelSerializer):
+    """
+    Genre embedded into movies, without the movie counters.
+
+    Writes reference existing genres by id or by name, as a number,
+    a string or the embedded object.
+    """
+
     class Meta:
         model = Genre
         fields = (
@@ -11,3 +66,29 @@ class GenreSerializer(serializers.ModelSerializer):
             "name",
             "description",
         )
+        list_serializer_class = GenreReferenceListSerializer
+
+    def to_internal_value(self, data: object) -> dict:
+        # resolved by `GenreReferenceListSerializer`
+        if isinstance(data, dict):
+            data = data.get("id", data.get("name"))
+        if isinstance(data, int) and not isinstance(data, bool):
+            return {"id": data}
+        if isinstance(data, str):
+            return {"name": data}
+        msg = "Expected a genre id or name."
+        raise serializers.ValidationError(msg)
+
+
+class GenreSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    average_duration = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Genre
+        fields = (
+            *GenreNestedSerializer.Meta.fields,
+            "summary",
+            "movie_count",
+            "average_duration",
+            "latest_release_date",
+        )
@@ -1,8 +1,16 @@
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Manager
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 
-from movies.models import AgeRating
-from movies.serializers.age_rating_base import AgeRatingSerializer
-from movies.serializers.genre_base import GenreSerializer
+from movies import bulk, snapshots
+from movies.includes import MOVIE_RELATIONS
+from movies.models import AgeRating, Movie
+from movies.serializers.age_rating_base import AgeRatingNestedSerializer
+from movies.serializers.genre_base import GenreNestedSerializer
 from movies.serializers.movie_base import MovieSerializer
 
 
@@ -16,13 +24,31 @@ class MovieSerializerExtended(serializers.HyperlinkedModelSerializer):
         pass
 
 
+class MovieDetailListSerializer(serializers.ListSerializer):
+    def to_representation(self, data: Iterable[Movie]) -> list[dict]:
+        movies = list(data.all() if isinstance(data, Manager) else data)
+        snapshots.prefetch_missing_relations(movies, self.child.get_embedded())
+        return super().to_representation(movies)
+
+
 class MovieDetailSerializerExtended(MovieSerializer):
-    age_rating = AgeRatingSerializer(
+    """
+    Movie with nested relations, `include=` limits the ones embedded:
+    `age_rating` falls back to its id, `genres` is left out.
+
+    Writes take the relations in the same shape, referencing existing
+    age ratings and genres, see the nested serializers.
+    """
+
+    age_rating = AgeRatingNestedSerializer(
         many=False,
+        allow_null=True,
+        required=False,
     )
-    genres = GenreSerializer(
+    genres = GenreNestedSerializer(
         many=True,
         read_only=False,
+        required=False,
     )
 
     class Meta(MovieSerializer.Meta):
@@ -30,3 +56,75 @@ class MovieDetailSerializerExtended(MovieSerializer):
             *MovieSerializer.Meta.fields,
             "genres",
         )
+        list_serializer_class = MovieDetailListSerializer
+
+    def __init__(
+        self,
+        *args: object,
+        include: Iterable[str] = MOVIE_RELATIONS,
+        **kwargs: object,
+    ) -> None:
+        self.include = frozenset(include)
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self) -> dict[str, serializers.Field]:
+        fields = super().get_fields()
+        if "age_rating" not in self.include:
+            fields["age_rating"] = serializers.PrimaryKeyRelatedField(
+                queryset=AgeRating.objects.all(),
+                allow_null=True,
+                required=False,
+            )
+        if "genres" not in self.include:
+            fields.pop("genres")
+        return fields
+
+    def get_embedded(self) -> list[str]:
+        """
+        The included relations that are rendered.
+        """
+        return [
+            name
+            for name in MOVIE_RELATIONS
+            if name in self.include and name in self.fields
+        ]
+
+    def create(self, validated_data: dict) -> Movie:
+        genres = validated_data.pop("genres", None)
+        with transaction.atomic():
+            movie = super().create(validated_data)
+            if genres:
+                bulk.write_movie_genres(movie, genres)
+                snapshots.refresh_movie_snapshot(movie)
+        return movie
+
+    def update(self, instance: Movie, validated_data: dict) -> Movie:
+        genres = validated_data.pop("genres", None)
+        with transaction.atomic():
+            # saving the movie then refreshes its snapshot and `updated_at`
+            if genres is not None:
+                bulk.write_movie_genres(instance, genres)
+            return super().update(instance, validated_data)
+
+    def to_representation(self, instance: Movie) -> dict:
+        snapshot = snapshots.get_loaded_snapshot(instance)
+        if snapshot is None:
+            if self.parent is None and isinstance(instance, Movie):
+                # lists load them for the whole page
+                snapshots.prefetch_missing_relations([instance], self.get_embedded())
+            return super().to_representation(instance)
+        # `Serializer.to_representation()`, nested relations from the snapshot
+        data = {}
+        for field in self._readable_fields:
+            if snapshots.is_snapshot_field(Movie, field):
+                data[field.field_name] = snapshots.read_snapshot(snapshot, field.source)
+                continue
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            pk = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            data[field.field_name] = (
+                None if pk is None else field.to_representation(attribute)
+            )
+        return data
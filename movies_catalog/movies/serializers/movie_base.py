@@ -1,6 +1,7 @@
 from drf_spectacular.utils import OpenApiExample, extend_schema_serializer
 from rest_framework import serializers
 
+from movies.fieldsets import SparseFieldsetSerializerMixin
 from movies.models import Movie
 
 
@@ -38,7 +39,7 @@ from movies.models import Movie
         ),
     ],
 )
-class MovieSerializer(serializers.ModelSerializer):
+class MovieSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Movie
         fields = (
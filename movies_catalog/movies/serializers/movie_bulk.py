@@ -0,0 +1,85 @@
+from rest_framework import serializers
+
+from movies.models import Movie
+
+
+class MovieBulkItemSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk write.
+
+    Relations are plain keys here: they are resolved for all rows at once
+    by `movies.bulk`, so validating a row never hits the database.
+    """
+
+    id = serializers.IntegerField(
+        required=False,
+        min_value=1,
+    )
+    age_rating = serializers.CharField(
+        max_length=10,
+        allow_null=True,
+        required=False,
+        default=None,
+    )
+    genres = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+    )
+
+    class Meta:
+        model = Movie
+        fields = (
+            "id",
+            "title",
+            "description",
+            "release_date",
+            "duration",
+            "age_rating",
+            "genres",
+        )
+
+
+class MovieImportRowSerializer(serializers.ModelSerializer):
+    """
+    One row of a catalog dump, see `movies.importing`.
+
+    Age ratings and genres are referenced by name and created when
+    missing, so validating a row never hits the database.
+    """
+
+    age_rating = serializers.CharField(
+        max_length=10,
+        allow_null=True,
+        required=False,
+        default=None,
+    )
+    genres = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        required=False,
+    )
+
+    class Meta:
+        model = Movie
+        fields = (
+            "title",
+            "description",
+            "release_date",
+            "duration",
+            "age_rating",
+            "genres",
+        )
+
+
+class MovieBulkErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField(
+        help_text="position of the rejected row in the request body",
+    )
+    errors = serializers.DictField(
+        help_text="validation errors in the same shape as for a single movie",
+    )
+
+
+class MovieBulkResultSerializer(serializers.Serializer):
+    created = serializers.ListField(child=serializers.IntegerField())
+    updated = serializers.ListField(child=serializers.IntegerField())
+    errors = MovieBulkErrorSerializer(many=True)
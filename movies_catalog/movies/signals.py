@@ -0,0 +1,236 @@
+from weakref import WeakKeyDictionary
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from movies import catalog
+from movies.cache import (
+    NAMESPACE_AGE_RATINGS,
+    NAMESPACE_GENRES,
+    NAMESPACE_MOVIES,
+    bump_versions,
+    object_namespace,
+)
+from movies.counters import (
+    count_deleted_movie,
+    count_genre_links,
+    count_saved_movie,
+    get_genre_ids,
+    load_stored_facts,
+    recount,
+)
+from movies.models import AgeRating, Genre, Movie
+from movies.snapshots import (
+    SNAPSHOT_FIELD,
+    refresh_movie_snapshot,
+    refresh_snapshots,
+)
+
+# Sent after queryset-level writes that skip model signals
+# (`bulk_create`, `bulk_update`, direct through-table writes).
+# Arguments: `movie_ids` - ids of created, changed or deleted movies,
+# `age_rating_ids` / `genre_ids` - the age ratings and genres the movies
+# had or have, to recount; `None`: unknown, all are recounted.
+movies_bulk_changed = Signal()
+
+# movies linked to a genre, between `pre_*` and `post_*` of its unlinking
+_unlinked_movie_ids: WeakKeyDictionary[Genre, set] = WeakKeyDictionary()
+# and genres linked to a movie
+_unlinked_genre_ids: WeakKeyDictionary[Movie, list] = WeakKeyDictionary()
+
+# `Movie` fields counted by `movies.counters`
+COUNTED_FIELDS = frozenset(
+    ("age_rating", "age_rating_id", "duration", "release_date"),
+)
+
+
+def movies_changed(movie_ids: set) -> None:
+    namespaces = (
+        NAMESPACE_MOVIES,
+        *(object_namespace(NAMESPACE_MOVIES, pk) for pk in movie_ids),
+    )
+    transaction.on_commit(lambda: bump_versions(*namespaces))
+    catalog.entries_changed(movie_ids)
+
+
+def movies_relations_changed(movie_ids: set) -> None:
+    """
+    Genre links changed without saving the movies themselves.
+    """
+    Movie.objects.filter(pk__in=movie_ids).update(updated_at=timezone.now())
+    movies_changed(movie_ids)
+
+
+def _embedded_changed(movie_ids: set) -> None:
+    """
+    An age rating or genre embedded in the movies changed.
+    """
+    refresh_snapshots(movie_ids)
+    catalog.entries_changed(movie_ids)
+
+
+def _genre_links_changed(movie_ids: set) -> None:
+    refresh_snapshots(movie_ids)
+    movies_relations_changed(movie_ids)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def on_movie_changed(instance: Movie, **kwargs: object) -> None:  # noqa: ARG001
+    movies_changed({instance.pk})
+
+
+@receiver(pre_save, sender=Movie)
+def on_movie_saving(
+    instance: Movie,
+    update_fields: frozenset | None,
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    if update_fields is None or update_fields & COUNTED_FIELDS:
+        load_stored_facts(instance)
+
+
+@receiver(post_save, sender=Movie)
+def on_movie_saved(
+    instance: Movie,
+    created: bool,  # noqa: FBT001
+    update_fields: frozenset | None,
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    if update_fields is None or update_fields & COUNTED_FIELDS:
+        count_saved_movie(instance, created=created)
+    # saves of deferred instances update the loaded attnames, which
+    # include the snapshot as it was loaded
+    if update_fields is not None and not update_fields & {
+        "age_rating",
+        "age_rating_id",
+        SNAPSHOT_FIELD,
+    }:
+        return
+    # a new movie has no genre links yet
+    refresh_movie_snapshot(instance, genres=() if created else None)
+
+
+@receiver(pre_delete, sender=Movie)
+def on_movie_deleting(instance: Movie, **kwargs: object) -> None:  # noqa: ARG001
+    # the cascade removes the genre links without `m2m_changed`
+    _unlinked_genre_ids[instance] = get_genre_ids(instance)
+
+
+@receiver(post_delete, sender=Movie)
+def on_movie_deleted(instance: Movie, **kwargs: object) -> None:  # noqa: ARG001
+    count_deleted_movie(instance, _unlinked_genre_ids.pop(instance, []))
+
+
+@receiver(movies_bulk_changed)
+def on_movies_bulk_changed(
+    movie_ids: set,
+    age_rating_ids: set | None = None,
+    genre_ids: set | None = None,
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    refresh_snapshots(movie_ids)
+    # the previous values of the movies are not known to apply deltas
+    recount(AgeRating, None if age_rating_ids is None else age_rating_ids - {None})
+    recount(Genre, genre_ids)
+    movies_changed(movie_ids)
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+def on_movie_genres_changed(
+    instance: Movie | Genre,
+    action: str,
+    reverse: bool,  # noqa: FBT001
+    pk_set: set | None,
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    if not reverse:
+        _movie_genres_changed(instance, action, pk_set)
+        return
+    # `genre.movies.*()`: the movies are in `pk_set`, except for `clear()`
+    if action == "pre_clear":
+        _unlinked_movie_ids[instance] = set(
+            instance.movies.values_list("pk", flat=True),
+        )
+    elif action == "post_clear":
+        _genre_links_changed(_unlinked_movie_ids.pop(instance, set()))
+    elif action in {"post_add", "post_remove"}:
+        _genre_links_changed(pk_set)
+    if action.startswith("post_"):
+        recount(Genre, [instance.pk])
+
+
+def _movie_genres_changed(movie: Movie, action: str, pk_set: set | None) -> None:
+    # `remove()` reports the ids it was given, linked or not
+    if action == "pre_remove":
+        _unlinked_genre_ids[movie] = [pk for pk in get_genre_ids(movie) if pk in pk_set]
+    elif action == "pre_clear":
+        _unlinked_genre_ids[movie] = get_genre_ids(movie)
+    if not action.startswith("post_"):
+        return
+    if action == "post_add":
+        count_genre_links(movie, pk_set, 1)
+    else:
+        count_genre_links(movie, _unlinked_genre_ids.pop(movie, []), -1)
+    # keeps the snapshot of the instance in memory current as well
+    refresh_movie_snapshot(movie)
+    movies_relations_changed({movie.pk})
+
+
+@receiver(post_save, sender=AgeRating)
+@receiver(post_delete, sender=AgeRating)
+def on_age_rating_changed(instance: AgeRating, **kwargs: object) -> None:  # noqa: ARG001
+    namespaces = (
+        NAMESPACE_AGE_RATINGS,
+        object_namespace(NAMESPACE_AGE_RATINGS, instance.pk),
+    )
+    transaction.on_commit(lambda: bump_versions(*namespaces))
+
+
+@receiver(post_save, sender=AgeRating)
+def on_age_rating_saved(
+    instance: AgeRating,
+    created: bool,  # noqa: FBT001
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    if not created:
+        _embedded_changed(set(instance.movies.values_list("pk", flat=True)))
+
+
+@receiver(pre_delete, sender=Genre)
+def on_genre_deleting(instance: Genre, **kwargs: object) -> None:  # noqa: ARG001
+    # the cascade removes the genre links without `m2m_changed`
+    _unlinked_movie_ids[instance] = set(instance.movies.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Genre)
+def on_genre_deleted(instance: Genre, **kwargs: object) -> None:  # noqa: ARG001
+    _genre_links_changed(_unlinked_movie_ids.pop(instance, set()))
+
+
+@receiver(post_save, sender=Genre)
+def on_genre_saved(
+    instance: Genre,
+    created: bool,  # noqa: FBT001
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    if not created:
+        _embedded_changed(set(instance.movies.values_list("pk", flat=True)))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def on_genre_changed(instance: Genre, **kwargs: object) -> None:  # noqa: ARG001
+    namespaces = (
+        NAMESPACE_GENRES,
+        object_namespace(NAMESPACE_GENRES, instance.pk),
+    )
+    transaction.on_commit(lambda: bump_versions(*namespaces))
@@ -0,0 +1,213 @@
+"""
+Denormalized relations of a movie: `Movie.relations_snapshot`.
+
+The snapshot holds the embedded `age_rating` and `genres` of
+`MovieDetailSerializerExtended` as their nested serializers render them,
+so `include=` reads are served from the movie rows alone, without a join
+or a genres query. Values are stored as lists in serializer field order
+(`jsonb` does not keep the order of object keys):
+
+    {"age_rating": ["PG", "Parental guidance"], "genres": [[1, "Drama", ""]]}
+
+`movies.signals` refreshes the snapshots on every ORM write of movies,
+age ratings, genres and genre links and on `movies_bulk_changed`;
+`rebuild_relations_snapshots` backfills them. Reads use the snapshots
+when `MOVIES_RELATIONS_SNAPSHOT` is on, movies without one (written
+around the ORM) fall back to the relations: from `movies.lookups` when
+`MOVIES_LOOKUP_TABLES` is on, else queried.
+"""
+
+from collections.abc import Iterable
+from itertools import batched
+
+from django.conf import settings
+from django.db.models import (
+    Model,
+    QuerySet,
+    aprefetch_related_objects,
+    prefetch_related_objects,
+)
+from rest_framework.serializers import Field, ListSerializer, Serializer
+
+from movies import lookups
+from movies.models import AgeRating, Genre, Movie
+from movies.serializers.age_rating_base import AgeRatingNestedSerializer
+from movies.serializers.genre_base import GenreNestedSerializer
+
+SNAPSHOT_FIELD = "relations_snapshot"
+SNAPSHOT_BATCH_SIZE = 1000
+
+# relation name -> the nested serializer rendering it
+SNAPSHOT_SERIALIZERS: dict[str, Serializer] = {
+    "age_rating": AgeRatingNestedSerializer(),
+    "genres": GenreNestedSerializer(many=True),
+}
+
+
+def is_snapshot_enabled() -> bool:
+    return getattr(settings, "MOVIES_RELATIONS_SNAPSHOT", False)
+
+
+def _get_child(serializer: Field) -> Field:
+    return getattr(serializer, "child", serializer)
+
+
+def is_snapshot_field(model: type[Model], field: Field) -> bool:
+    """
+    Whether the snapshot holds the data of the nested serializer `field`
+    of a `model` serializer.
+    """
+    stored = SNAPSHOT_SERIALIZERS.get(field.source)
+    return (
+        model is Movie
+        and stored is not None
+        and type(field) is type(stored)
+        and type(_get_child(field)) is type(_get_child(stored))
+    )
+
+
+def get_snapshot_columns(relations: Iterable[str]) -> tuple[str, ...]:
+    """
+    Columns to load for embedding `relations`.
+    """
+    if is_snapshot_enabled() and set(relations) & SNAPSHOT_SERIALIZERS.keys():
+        return (SNAPSHOT_FIELD,)
+    return ()
+
+
+def select_relations(queryset: QuerySet, relations: Iterable[str]) -> QuerySet:
+    """
+    Load the embedded `relations` of the movies: from the snapshot or
+    the lookup tables (see `prefetch_missing_relations()`), else joined /
+    prefetched.
+    """
+    if is_snapshot_enabled() or lookups.is_lookup_enabled():
+        return queryset
+    relations = set(relations)
+    if "age_rating" in relations:
+        queryset = queryset.select_related("age_rating")
+    if "genres" in relations:
+        queryset = queryset.prefetch_related("genres")
+    return queryset
+
+
+def build_snapshot(age_rating: AgeRating | None, genres: Iterable[Genre]) -> dict:
+    age_rating_data = (
+        None
+        if age_rating is None
+        else SNAPSHOT_SERIALIZERS["age_rating"].to_representation(age_rating)
+    )
+    return {
+        "age_rating": age_rating_data and list(age_rating_data.values()),
+        "genres": [
+            list(item.values())
+            for item in SNAPSHOT_SERIALIZERS["genres"].to_representation(genres)
+        ],
+    }
+
+
+def read_snapshot(snapshot: dict, name: str) -> dict | list[dict] | None:
+    """
+    Serializer data of relation `name` from a stored snapshot.
+    """
+    serializer = SNAPSHOT_SERIALIZERS[name]
+    fields = _get_child(serializer).Meta.fields
+    value = snapshot[name]
+    if isinstance(serializer, ListSerializer):
+        return [dict(zip(fields, item, strict=True)) for item in value]
+    return None if value is None else dict(zip(fields, value, strict=True))
+
+
+def get_loaded_snapshot(movie: Movie) -> dict | None:
+    """
+    The snapshot of `movie` when reads use it and it is loaded.
+    """
+    if (
+        not is_snapshot_enabled()
+        or not isinstance(movie, Movie)
+        or SNAPSHOT_FIELD in movie.get_deferred_fields()
+    ):
+        return None
+    return movie.relations_snapshot
+
+
+def _get_unsnapshotted(movies: Iterable[Movie]) -> list[Movie]:
+    if not is_snapshot_enabled():
+        # `select_relations()` did not join them with the lookup tables on
+        return list(movies) if lookups.is_lookup_enabled() else []
+    return [
+        movie
+        for movie in movies
+        if SNAPSHOT_FIELD not in movie.get_deferred_fields()
+        and movie.relations_snapshot is None
+    ]
+
+
+def prefetch_missing_relations(
+    movies: Iterable[Movie],
+    relations: Iterable[str],
+) -> None:
+    """
+    Load `relations` of the movies that have no snapshot (yet), one query
+    per relation instead of one per movie.
+    """
+    if not (missing := _get_unsnapshotted(movies)):
+        return
+    if lookups.is_lookup_enabled():
+        lookups.attach_relations(missing, relations)
+    else:
+        prefetch_related_objects(missing, *relations)
+
+
+async def aprefetch_missing_relations(
+    movies: Iterable[Movie],
+    relations: Iterable[str],
+) -> None:
+    if not (missing := _get_unsnapshotted(movies)):
+        return
+    if lookups.is_lookup_enabled():
+        await lookups.aattach_relations(missing, relations)
+    else:
+        await aprefetch_related_objects(missing, *relations)
+
+
+def refresh_movie_snapshot(movie: Movie, genres: Iterable[Genre] | None = None) -> None:
+    """
+    Update the snapshot of a saved `movie`, `genres` defaults to its links.
+    """
+    snapshot = build_snapshot(
+        movie.age_rating,
+        movie.genres.all() if genres is None else genres,
+    )
+    if (
+        SNAPSHOT_FIELD not in movie.get_deferred_fields()
+        and movie.relations_snapshot == snapshot
+    ):
+        return
+    Movie.objects.filter(pk=movie.pk).update(relations_snapshot=snapshot)
+    movie.relations_snapshot = snapshot
+
+
+def refresh_snapshots(
+    movie_ids: Iterable[int],
+    batch_size: int = SNAPSHOT_BATCH_SIZE,
+) -> int:
+    """
+    Rebuild the snapshots of the movies, three queries per batch at most.
+    Returns how many changed.
+    """
+    changed = 0
+    for batch in batched(movie_ids, batch_size, strict=False):
+        movies = []
+        for movie in (
+            Movie.objects.filter(pk__in=batch)
+            .select_related("age_rating")
+            .prefetch_related("genres")
+            .only(SNAPSHOT_FIELD, "age_rating")
+        ):
+            snapshot = build_snapshot(movie.age_rating, movie.genres.all())
+            if movie.relations_snapshot != snapshot:
+                movie.relations_snapshot = snapshot
+                movies.append(movie)
+        changed += Movie.objects.bulk_update(movies, [SNAPSHOT_FIELD])
+    return changed
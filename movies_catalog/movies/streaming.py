@@ -0,0 +1,124 @@
+import csv
+from collections.abc import Callable, Iterator
+from itertools import batched
+
+from django.db.models import QuerySet
+from rest_framework.serializers import Serializer
+from rest_framework.utils.encoders import JSONEncoder
+
+# rows fetched per round trip from the server-side cursor
+STREAM_CHUNK_SIZE = 2000
+
+_encoder = JSONEncoder(
+    ensure_ascii=False,
+    separators=(",", ":"),
+)
+
+
+def dumps(data: object) -> str:
+    return _encoder.encode(data)
+
+
+def iter_serialized_chunks(
+    queryset: QuerySet,
+    serializer_class: Callable[..., Serializer],
+    context: dict | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[list]:
+    """
+    Serialize a queryset chunk by chunk without loading it into memory.
+
+    `QuerySet.iterator()` uses a server-side cursor on Postgres, and runs
+    any `prefetch_related` lookups once per chunk.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    for chunk in batched(rows, chunk_size, strict=False):
+        yield serializer_class(chunk, many=True, context=context).data
+
+
+def iter_json_array(
+    queryset: QuerySet,
+    serializer_class: Callable[..., Serializer],
+    context: dict | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[str]:
+    separator = "["
+    for data in iter_serialized_chunks(
+        queryset,
+        serializer_class,
+        context,
+        chunk_size,
+    ):
+        yield separator + ",".join(map(dumps, data))
+        separator = ","
+    yield "]" if separator == "," else "[]"
+
+
+def iter_ndjson(
+    queryset: QuerySet,
+    serializer_class: Callable[..., Serializer],
+    context: dict | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[str]:
+    for data in iter_serialized_chunks(
+        queryset,
+        serializer_class,
+        context,
+        chunk_size,
+    ):
+        yield "".join(f"{dumps(item)}\n" for item in data)
+
+
+class _Echo:
+    """
+    File-like object for `csv.writer` that returns the written line.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_csv_columns(serializer: Serializer) -> list[tuple[str, ...]]:
+    """
+    Column paths for a serializer: nested objects are flattened
+    into `parent.child` columns, everything else is one column.
+    """
+    columns = []
+    for name, field in serializer.fields.items():
+        if isinstance(field, Serializer):
+            columns.extend((name, child) for child in field.fields)
+        else:
+            columns.append((name,))
+    return columns
+
+
+def _get_csv_cell(item: dict, path: tuple[str, ...]) -> object:
+    value = item
+    for key in path:
+        if value is None:
+            return None
+        value = value[key]
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    return value
+
+
+def iter_csv(
+    queryset: QuerySet,
+    serializer_class: Callable[..., Serializer],
+    context: dict | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    columns = get_csv_columns(serializer_class(context=context))
+    yield writer.writerow([".".join(path) for path in columns])
+    for data in iter_serialized_chunks(
+        queryset,
+        serializer_class,
+        context,
+        chunk_size,
+    ):
+        yield "".join(
+            writer.writerow([_get_csv_cell(item, path) for path in columns])
+            for item in data
+        )
@@ -0,0 +1,65 @@
+"""
+Test helpers for the SQL load of the API.
+
+    def test_movie_list(self):
+        assert_within_query_budget(
+            MovieViewSet,
+            "list",
+            lambda: self.client.get("/api/movies/?include=1"),
+        )
+
+Clear the response cache (`django.core.cache`) before the request:
+a cached response runs no query and passes any budget.
+"""
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from movies.querystats import QueryStats, record_queries
+
+
+def _format_failure(label: str, stats: QueryStats, budget: int) -> str:
+    lines = [f"{label} ran {stats.count} queries, the budget is {budget}"]
+    lines.extend(f"  {times} x {sql}" for sql, times in stats.statements.most_common())
+    return "\n".join(lines)
+
+
+@contextmanager
+def assert_max_queries(budget: int, label: str = "Block") -> Iterator[QueryStats]:
+    """
+    Fail when the block runs more than `budget` queries.
+    """
+    with record_queries() as stats:
+        yield stats
+    if stats.count > budget:
+        raise AssertionError(_format_failure(label, stats, budget))
+
+
+@contextmanager
+def assert_no_duplicate_queries(
+    threshold: int = 2,
+    label: str = "Block",
+) -> Iterator[QueryStats]:
+    """
+    Fail when the block runs the same SQL `threshold` times or more (N+1).
+    """
+    with record_queries() as stats:
+        yield stats
+    if repeated := stats.most_repeated(threshold):
+        sql, times = repeated[0]
+        msg = f"{label} ran {times} times: {sql}"
+        raise AssertionError(msg)
+
+
+def assert_within_query_budget[T](
+    viewset: type,
+    action: str,
+    request: Callable[[], T],
+) -> T:
+    """
+    Run `request` and fail when it goes over the `query_budgets`
+    the viewset declares for `action`.
+    """
+    budget = viewset.query_budgets[action]
+    with assert_max_queries(budget, label=f"{viewset.__name__}.{action}"):
+        return request()
@@ -1 +1,1508 @@
-# Create your tests here.
+import json
+import time
+from base64 import urlsafe_b64encode
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from datetime import date, timedelta
+from io import StringIO
+from itertools import product
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from movies.apps import check_shared_cache
+from movies.bulk import bulk_upsert_movies
+from movies.cache import (
+    NAMESPACE_AGE_RATINGS,
+    NAMESPACE_GENRES,
+    NAMESPACE_MOVIES,
+    bump_versions,
+    get_versions,
+    object_namespace,
+)
+from movies.catalog import get_entry_fields, refresh_entries
+from movies.counters import recount
+from movies.fastpath import FastListMixin
+from movies.filters import MovieFilterSet, search_movies
+from movies.lookups import LookupTable
+from movies.models import AgeRating, CatalogPageEntry, Genre, Movie
+from movies.replicas import ReplicaRouter
+from movies.serializers.genre_base import GenreNestedSerializer
+from movies.signals import movies_bulk_changed
+from movies.snapshots import refresh_snapshots
+from movies.testing import assert_within_query_budget
+from movies.views import AgeRatingViewSet, GenreViewSet, MovieViewSet
+
+LOCMEM_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+FILE_CACHE = "django.core.cache.backends.filebased.FileBasedCache"
+
+
+@contextmanager
+def shared_cache() -> Iterator[None]:
+    """
+    A cache shared by the processes, as the workers need for the versions.
+    """
+    with (
+        TemporaryDirectory() as location,
+        override_settings(
+            CACHES={"default": {"BACKEND": FILE_CACHE, "LOCATION": location}},
+        ),
+    ):
+        yield
+
+
+def _encode_cursor(payload: object) -> str:
+    return urlsafe_b64encode(json.dumps(payload).encode()).decode("ascii")
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Movie.objects.bulk_create(Movie(title=f"Movie {number}") for number in range(5))
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get_page(self, **params: str) -> object:
+        return self.client.get(
+            "/api/movies/",
+            {"pagination": "cursor", "page_size": 2, **params},
+        )
+
+    def test_pages(self) -> None:
+        titles = []
+        response = self.get_page()
+        while True:
+            titles += [movie["title"] for movie in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(titles, [f"Movie {number}" for number in range(5)])
+
+    def test_invalid_cursor(self) -> None:
+        for cursor in (
+            "not base64",
+            _encode_cursor([1]),
+            _encode_cursor({"p": [1, 2]}),
+            _encode_cursor({"p": ["x"]}),
+            _encode_cursor({"p": [None]}),
+            _encode_cursor({"p": [{}]}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.get_page(cursor=cursor)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.get_page(
+            ordering="title",
+            cursor=_encode_cursor({"p": [1, "x"]}),
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkUpsertTests(APITestCase):
+    def test_matches_natural_key(self) -> None:
+        movie = Movie.objects.create(title="Alien", release_date="1979-05-25")
+        response = self.client.post(
+            "/api/movies/bulk/",
+            [
+                {"title": "Alien", "release_date": "1979-05-25", "duration": 117},
+                {"title": "Alien", "release_date": "1986-07-18"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], [movie.pk])
+        self.assertEqual(len(response.data["created"]), 1)
+        movie.refresh_from_db()
+        self.assertEqual(movie.duration, 117)
+
+    def test_counters(self) -> None:
+        pg = AgeRating.objects.create(name="PG")
+        AgeRating.objects.bulk_create(AgeRating(name=name) for name in ("R", "G"))
+        drama, comedy, action = (
+            Genre.objects.create(name=name) for name in ("Drama", "Comedy", "Action")
+        )
+        kept = Movie.objects.create(title="Kept", duration=90, age_rating=pg)
+        kept.genres.set([drama, comedy])
+        moved = Movie.objects.create(title="Moved", duration=100, age_rating=pg)
+        moved.genres.set([comedy])
+
+        with mock.patch("movies.signals.recount", wraps=recount) as recount_mock:
+            response = self.client.post(
+                "/api/movies/bulk/",
+                [
+                    # the durations of its genres change, they stay linked
+                    {
+                        "id": kept.pk,
+                        "title": "Kept",
+                        "duration": 95,
+                        "age_rating": "PG",
+                    },
+                    {"id": moved.pk, "title": "Moved", "age_rating": "R", "genres": []},
+                    {"title": "New", "age_rating": "R", "genres": [action.pk]},
+                ],
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # only the age ratings and genres of the movies, before and after
+        self.assertEqual(
+            [tuple(call.args) for call in recount_mock.call_args_list],
+            [(AgeRating, {"PG", "R"}), (Genre, {drama.pk, comedy.pk, action.pk})],
+        )
+        self.assertEqual(recount(AgeRating), 0)
+        self.assertEqual(recount(Genre), 0)
+
+
+@skipUnless(connection.vendor == "postgresql", "advisory locks are Postgres only")
+class ConcurrentBulkUpsertTests(TransactionTestCase):
+    def test_same_new_movie(self) -> None:
+        def upsert() -> None:
+            try:
+                bulk_upsert_movies([{"title": "Alien", "release_date": "1979-05-25"}])
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for future in [executor.submit(upsert) for _ in range(8)]:
+                future.result()
+        self.assertEqual(Movie.objects.filter(title="Alien").count(), 1)
+
+
+GENRE_LINK_INDEXES = "movie_genres_genre_movie_idx|movies_movie_genres_genre_id_"
+
+
+@skipUnless(connection.vendor == "postgresql", "the indexes are planned by Postgres")
+class FilterIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        ratings = [AgeRating.objects.create(name=name) for name in ("G", "PG", "R")]
+        genres = [Genre.objects.create(name=f"Genre {number}") for number in range(10)]
+        movies = Movie.objects.bulk_create(
+            Movie(
+                title=f"Movie {number}",
+                description=f"A story number {number}",
+                release_date=date(2000, 1, 1) + timedelta(days=number),
+                duration=60 + number % 120,
+                age_rating=ratings[number % len(ratings)],
+            )
+            for number in range(500)
+        )
+        Movie.genres.through.objects.bulk_create(
+            Movie.genres.through(movie_id=movie.pk, genre_id=genre.pk)
+            for number, movie in enumerate(movies)
+            for genre in genres[number % 10 : number % 10 + 2]
+        )
+        cls.genre_ids = ",".join(str(genre.pk) for genre in genres[:2])
+
+    def setUp(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE movies_movie, movies_movie_genres")
+            # too few rows for the planner to prefer an index on its own
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assert_uses_index(self, queryset: QuerySet, index: str) -> None:
+        # `index`: a pattern of the index names
+        plan = queryset.order_by().explain()
+        self.assertRegex(plan, index)
+        self.assertRegex(plan, r"Index Scan|Index Only Scan|Bitmap Index Scan")
+
+    def filter(self, **params: str) -> QuerySet:
+        filterset = MovieFilterSet(params, queryset=Movie.objects.all())
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return filterset.qs
+
+    def test_filters(self) -> None:
+        for params, index in (
+            ({"age_rating": "PG,R"}, "movie_age_rating_"),
+            (
+                {
+                    "release_date_after": "2000-03-01",
+                    "release_date_before": "2000-04-01",
+                },
+                "movie_release_date_id_idx",
+            ),
+            ({"duration_min": "100", "duration_max": "110"}, "movie_duration_id_idx"),
+            # or the index Django adds on the `genre_id` foreign key
+            ({"genres": self.genre_ids}, GENRE_LINK_INDEXES),
+            ({"genres_all": self.genre_ids}, GENRE_LINK_INDEXES),
+        ):
+            with self.subTest(params=params):
+                self.assert_uses_index(self.filter(**params), index)
+
+    def test_search(self) -> None:
+        queryset = search_movies(Movie.objects.all(), "story")
+        self.assert_uses_index(queryset, "movie_search_vector_idx")
+        self.assert_uses_index(queryset, "movie_title_trgm_idx")
+
+
+class FastListParityTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        ratings = [
+            AgeRating.objects.create(name="PG", description="Parental guidance"),
+            AgeRating.objects.create(name="R", description="Restricted"),
+        ]
+        genres = [
+            Genre.objects.create(name=name, description=f"{name} movies")
+            for name in ("Drama", "Comédie", "Action")
+        ]
+        for number in range(12):
+            movie = Movie.objects.create(
+                title=f"Movie «{number}»",
+                description="" if number % 4 else f"Line one\nline {number}",
+                release_date=None if number % 5 == 0 else date(2001, 1, number + 1),
+                duration=None if number % 3 == 0 else 80 + number,
+                age_rating=None if number % 6 == 0 else ratings[number % 2],
+            )
+            movie.genres.set(genres[: number % 4])
+        refresh_snapshots(Movie.objects.values_list("id", flat=True))
+
+    def get(self, url: str, *, fast: bool) -> bytes:
+        cache.clear()
+        with (
+            override_settings(MOVIES_FAST_LIST=fast),
+            mock.patch.object(
+                FastListMixin,
+                "get_fast_list_columns",
+                autospec=True,
+                side_effect=FastListMixin.get_fast_list_columns,
+            ) as get_columns,
+        ):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_columns.called, fast)
+        return response.content
+
+    def test_same_response(self) -> None:
+        for snapshot in (False, True):
+            for query in (
+                "",
+                "include=1",
+                "include=age_rating",
+                "include=genres",
+                "include=age_rating,genres&page=2",
+                "fields=id,title",
+                "fields=title,age_rating&include=1",
+                "fields=genres&include=genres",
+                "ordering=-release_date",
+                "age_rating=PG&include=1",
+                "search=movie&include=genres",
+                "pagination=cursor&ordering=-title&include=1",
+            ):
+                with (
+                    self.subTest(query=query, snapshot=snapshot),
+                    override_settings(MOVIES_RELATIONS_SNAPSHOT=snapshot),
+                ):
+                    url = f"/api/movies/?{query}"
+                    self.assertEqual(
+                        self.get(url, fast=True),
+                        self.get(url, fast=False),
+                    )
+
+
+# the settings that change the queries of the actions
+BUDGET_PROFILES = [
+    {
+        "MOVIES_RELATIONS_SNAPSHOT": snapshot,
+        "MOVIES_LOOKUP_TABLES": lookups,
+        "MOVIES_CATALOG_PAGES": catalog,
+    }
+    for snapshot, lookups, catalog in product((False, True), repeat=3)
+]
+
+
+class QueryBudgetTests(APITransactionTestCase):
+    """
+    Every action declared in `query_budgets`, in every `BUDGET_PROFILES`.
+
+    Not in a transaction, so that the writes commit (and run their
+    `on_commit()` callbacks) within the request as they do when served.
+    SQLite counts the `BEGIN` of a transaction, Postgres does not.
+    """
+
+    def setUp(self) -> None:
+        self.age_rating = AgeRating.objects.create(name="PG", description="Guidance")
+        AgeRating.objects.create(name="R")
+        self.genres = [
+            Genre.objects.create(name=name) for name in ("Drama", "Comedy", "Action")
+        ]
+        for number in range(15):
+            movie = Movie.objects.create(
+                title=f"Movie {number}",
+                duration=90 + number,
+                release_date=date(2001, 1, number + 1),
+                age_rating=self.age_rating if number % 2 else None,
+            )
+            movie.genres.set(self.genres[: number % 4])
+        refresh_snapshots(Movie.objects.values_list("id", flat=True))
+
+    @contextmanager
+    def profile(self, **settings: bool) -> Iterator[None]:
+        with self.subTest(**settings), override_settings(**settings):
+            yield
+
+    def assert_within_budget(
+        self,
+        viewset: type,
+        action: str,
+        method: str,
+        url: str,
+        data: object = None,
+    ) -> Response:
+        # a cached response runs no query
+        cache.clear()
+
+        response = assert_within_query_budget(
+            viewset,
+            action,
+            lambda: getattr(self.client, method)(url, data, format="json"),
+        )
+        self.assertLess(response.status_code, status.HTTP_400_BAD_REQUEST)
+        return response
+
+    def new_movie(self) -> Movie:
+        movie = Movie.objects.create(title="New", age_rating=self.age_rating)
+        movie.genres.set(self.genres[:2])
+        return movie
+
+    def movie_body(self, number: int = 0) -> dict:
+        return {
+            "title": f"Budget movie {number}",
+            "duration": 100 + number,
+            "release_date": "2020-01-01",
+            "age_rating": "R",
+            "genres": [genre.pk for genre in self.genres[1:]],
+        }
+
+    def test_movie_reads(self) -> None:
+        movie = Movie.objects.first()
+        for settings in BUDGET_PROFILES:
+            with self.profile(**settings):
+                for action, url in (
+                    ("list", "/api/movies/"),
+                    ("list", "/api/movies/?include=1"),
+                    ("list", "/api/movies/?include=genres&pagination=cursor"),
+                    ("retrieve", f"/api/movies/{movie.pk}/"),
+                    ("retrieve", f"/api/movies/{movie.pk}/?include=1"),
+                    ("export", "/api/movies/export/?include=1"),
+                ):
+                    self.assert_within_budget(MovieViewSet, action, "get", url)
+
+    def test_movie_writes(self) -> None:
+        for number, settings in enumerate(BUDGET_PROFILES):
+            with self.profile(**settings):
+                self.assert_within_budget(
+                    MovieViewSet,
+                    "create",
+                    "post",
+                    "/api/movies/?include=1",
+                    self.movie_body(number),
+                )
+                movie = self.new_movie()
+                url = f"/api/movies/{movie.pk}/?include=1"
+                self.assert_within_budget(
+                    MovieViewSet,
+                    "update",
+                    "put",
+                    url,
+                    self.movie_body(number),
+                )
+                self.assert_within_budget(
+                    MovieViewSet,
+                    "partial_update",
+                    "patch",
+                    url,
+                    {"duration": 70, "age_rating": "PG", "genres": [self.genres[0].pk]},
+                )
+                self.assert_within_budget(MovieViewSet, "destroy", "delete", url)
+                self.assert_within_budget(
+                    MovieViewSet,
+                    "bulk",
+                    "post",
+                    "/api/movies/bulk/",
+                    [
+                        {"id": self.new_movie().pk, **self.movie_body(number)},
+                        # by natural key
+                        {**self.movie_body(number), "duration": 120},
+                        {**self.movie_body(number + 100), "genres": []},
+                    ],
+                )
+
+    def test_age_ratings(self) -> None:
+        pk = self.age_rating.pk
+        for number, settings in enumerate(BUDGET_PROFILES):
+            with self.profile(**settings):
+                for action, url in (
+                    ("list", "/api/age-ratings/"),
+                    ("retrieve", f"/api/age-ratings/{pk}/"),
+                    ("movies", f"/api/age-ratings/{pk}/movies/"),
+                ):
+                    self.assert_within_budget(AgeRatingViewSet, action, "get", url)
+                self.assert_within_budget(
+                    AgeRatingViewSet,
+                    "create",
+                    "post",
+                    "/api/age-ratings/",
+                    {"name": f"C{number}", "description": "Created"},
+                )
+                self.assert_within_budget(
+                    AgeRatingViewSet,
+                    "update",
+                    "put",
+                    f"/api/age-ratings/{pk}/",
+                    {"name": pk, "description": f"Updated {number}"},
+                )
+                self.assert_within_budget(
+                    AgeRatingViewSet,
+                    "partial_update",
+                    "patch",
+                    f"/api/age-ratings/{pk}/",
+                    {"description": f"Patched {number}"},
+                )
+                self.assert_within_budget(
+                    AgeRatingViewSet,
+                    "destroy",
+                    "delete",
+                    f"/api/age-ratings/C{number}/",
+                )
+
+    def test_genres(self) -> None:
+        pk = self.genres[0].pk
+        for number, settings in enumerate(BUDGET_PROFILES):
+            with self.profile(**settings):
+                self.assert_within_budget(GenreViewSet, "list", "get", "/api/genres/")
+                self.assert_within_budget(
+                    GenreViewSet,
+                    "retrieve",
+                    "get",
+                    f"/api/genres/{pk}/",
+                )
+                created = self.assert_within_budget(
+                    GenreViewSet,
+                    "create",
+                    "post",
+                    "/api/genres/",
+                    {"name": f"Genre {number}"},
+                )
+                self.assert_within_budget(
+                    GenreViewSet,
+                    "update",
+                    "put",
+                    f"/api/genres/{pk}/",
+                    {"name": "Drama", "description": f"Updated {number}"},
+                )
+                self.assert_within_budget(
+                    GenreViewSet,
+                    "partial_update",
+                    "patch",
+                    f"/api/genres/{pk}/",
+                    {"description": f"Patched {number}"},
+                )
+                Movie.objects.first().genres.add(created.data["id"])
+                self.assert_within_budget(
+                    GenreViewSet,
+                    "destroy",
+                    "delete",
+                    f"/api/genres/{created.data['id']}/",
+                )
+
+
+class SharedCacheCheckTests(TestCase):
+    def check(self) -> list[str]:
+        return [message.id for message in check_shared_cache()]
+
+    def test_local_cache(self) -> None:
+        # list validators are off whatever the settings
+        for settings in (
+            {"MOVIES_LOOKUP_TABLES": True},
+            {
+                "MOVIES_LOOKUP_TABLES": False,
+                "MOVIES_RESPONSE_CACHE": {"ENABLED": False},
+            },
+        ):
+            with (
+                self.subTest(**settings),
+                override_settings(
+                    CACHES={"default": {"BACKEND": LOCMEM_CACHE}},
+                    **settings,
+                ),
+            ):
+                self.assertEqual(self.check(), ["movies.W001"])
+
+    def test_shared_cache(self) -> None:
+        with shared_cache(), override_settings(MOVIES_LOOKUP_TABLES=True):
+            self.assertEqual(self.check(), [])
+
+    def test_deploy_only(self) -> None:
+        with override_settings(CACHES={"default": {"BACKEND": LOCMEM_CACHE}}):
+            for deploy in (False, True):
+                messages = checks.run_checks(include_deployment_checks=deploy)
+                self.assertEqual(
+                    "movies.W001" in [message.id for message in messages],
+                    deploy,
+                )
+
+
+class LookupTableTests(TestCase):
+    def test_max_age(self) -> None:
+        genre = Genre.objects.create(name="Drama")
+        table = LookupTable(Genre, (NAMESPACE_GENRES,))
+        with (
+            override_settings(MOVIES_LOOKUP_TABLES_MAX_AGE=60),
+            mock.patch("movies.lookups.time.monotonic") as monotonic,
+        ):
+            monotonic.return_value = 1000
+            self.assertEqual(table.get()[genre.pk].name, "Drama")
+            # a write of another worker, which does not bump these versions
+            Genre.objects.filter(pk=genre.pk).update(name="Comedy")
+
+            monotonic.return_value = 1059
+            self.assertEqual(table.get()[genre.pk].name, "Drama")
+            monotonic.return_value = 1060
+            self.assertEqual(table.get()[genre.pk].name, "Comedy")
+
+
+class ConditionalGetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.age_rating = AgeRating.objects.create(name="PG")
+        Movie.objects.create(title="Alien", age_rating=cls.age_rating)
+
+    def test_list(self) -> None:
+        with shared_cache():
+            response = self.client.get("/api/movies/")
+            etag = response["ETag"]
+            self.assertIn("Last-Modified", response)
+            response = self.client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Movie.objects.create(title="Aliens")
+            response = self.client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_local_cache(self) -> None:
+        # the versions of this process would miss the writes of the others
+        with override_settings(CACHES={"default": {"BACKEND": LOCMEM_CACHE}}):
+            for url in ("/api/movies/", f"/api/age-ratings/{self.age_rating.pk}/"):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertNotIn("ETag", response)
+                    self.assertNotIn("Last-Modified", response)
+            movie = Movie.objects.get()
+            response = self.client.get(f"/api/movies/{movie.pk}/")
+            self.assertIn("ETag", response)
+
+
+class AsyncMovieViewTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        ratings = [AgeRating.objects.create(name=name) for name in ("PG", "R")]
+        genres = [Genre.objects.create(name=name) for name in ("Drama", "Comedy")]
+        for number in range(25):
+            movie = Movie.objects.create(
+                title=f"M{number:02}",
+                description="A sequel" if number % 3 else "An original",
+                release_date=date(2001, 1, 1) + timedelta(days=number * 7 % 25),
+                duration=90 + number % 4,
+                age_rating=ratings[number % 2],
+            )
+            movie.genres.set(genres[: number % 3])
+
+    def test_same_response(self) -> None:
+        for query in (
+            "",
+            "page=3",
+            "search=M01",
+            "search=original&include=1",
+            "ordering=-title",
+            "ordering=duration&page=2",
+            "ordering=-release_date,title&fields=id,title",
+            "age_rating=PG&search=sequel&ordering=-duration&include=genres",
+        ):
+            with self.subTest(query=query):
+                cache.clear()
+                expected = self.client.get(f"/api/movies/?{query}")
+                response = self.client.get(f"/api/async/movies/?{query}")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response["Content-Type"], expected["Content-Type"])
+                self.assertEqual(
+                    response.content.replace(b"/api/async/movies/", b"/api/movies/"),
+                    expected.content,
+                )
+
+    def test_search(self) -> None:
+        response = self.client.get("/api/async/movies/?search=M01")
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_cursor_pagination(self) -> None:
+        response = self.client.get("/api/async/movies/?pagination=cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pagination", response.json())
+
+
+class AgeRatingMoviesTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.age_rating, other = (
+            AgeRating.objects.create(name=name) for name in ("PG", "R")
+        )
+        for number in range(30):
+            Movie.objects.create(
+                title=f"M{number:02}",
+                age_rating=cls.age_rating if number % 3 else other,
+            )
+        cls.movie_ids = list(
+            cls.age_rating.movies.order_by("id").values_list("id", flat=True),
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get_movies(self, url: str, **params: object) -> tuple[Response, list]:
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        movies = json.loads(b"".join(response.streaming_content))
+        return response, [movie["id"] for movie in movies]
+
+    def test_preview(self) -> None:
+        response = self.client.get(f"/api/age-ratings/{self.age_rating.pk}/")
+        self.assertEqual(
+            [movie["id"] for movie in response.data["movies"]],
+            self.movie_ids[:10],
+        )
+        self.assertEqual(
+            response.data["movies_next"],
+            f"http://testserver/api/age-ratings/{self.age_rating.pk}/movies/"
+            f"?after={self.movie_ids[9]}&limit=10",
+        )
+
+        response, ids = self.get_movies(response.data["movies_next"])
+        self.assertEqual(ids, self.movie_ids[10:])
+        self.assertNotIn("Link", response)
+
+    def test_preview_without_next(self) -> None:
+        Movie.objects.filter(pk__in=self.movie_ids[10:]).delete()
+        response = self.client.get(f"/api/age-ratings/{self.age_rating.pk}/")
+        self.assertEqual(len(response.data["movies"]), 10)
+        self.assertIsNone(response.data["movies_next"])
+
+    def test_pages(self) -> None:
+        url = f"/api/age-ratings/{self.age_rating.pk}/movies/?limit=7"
+        pages = []
+        while url:
+            response, ids = self.get_movies(url)
+            pages.append(ids)
+            url = response.get("Link", "").removeprefix("<").partition(">")[0]
+        self.assertEqual(
+            pages,
+            [self.movie_ids[:7], self.movie_ids[7:14], self.movie_ids[14:]],
+        )
+
+    def test_stream(self) -> None:
+        url = f"/api/age-ratings/{self.age_rating.pk}/movies/"
+        _, ids = self.get_movies(url)
+        self.assertEqual(ids, self.movie_ids)
+        _, ids = self.get_movies(url, after=self.movie_ids[3])
+        self.assertEqual(ids, self.movie_ids[4:])
+        _, ids = self.get_movies(url, after=self.movie_ids[-1])
+        self.assertEqual(ids, [])
+
+    def test_invalid_params(self) -> None:
+        url = f"/api/age-ratings/{self.age_rating.pk}/movies/"
+        for params in (
+            {"after": "x"},
+            {"after": -1},
+            {"limit": "x"},
+            {"limit": 0},
+            {"limit": 1001},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(next(iter(params)), response.json())
+
+
+class ConsistencyAssertionsMixin:
+    def assert_consistent(self) -> None:
+        """
+        Counters and snapshots are what rebuilding them gives.
+        """
+        self.assertEqual(recount(AgeRating), 0, "age rating counters drifted")
+        self.assertEqual(recount(Genre), 0, "genre counters drifted")
+        self.assertEqual(
+            refresh_snapshots(Movie.objects.values_list("id", flat=True)),
+            0,
+            "stale snapshots",
+        )
+
+
+class NestedMovieWriteTests(ConsistencyAssertionsMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        AgeRating.objects.create(name="PG", description="Parental guidance")
+        AgeRating.objects.create(name="R")
+        cls.drama, cls.comedy, cls.action = (
+            Genre.objects.create(name=name) for name in ("Drama", "Comedy", "Action")
+        )
+
+    def write(self, method: str, url: str, data: dict) -> Response:
+        return getattr(self.client, method)(f"{url}?include=1", data, format="json")
+
+    def genre_names(self, response: Response) -> list[str]:
+        return [genre["name"] for genre in response.data["genres"]]
+
+    def test_create_update_clear(self) -> None:
+        response = self.write(
+            "post",
+            "/api/movies/",
+            {
+                "title": "Alien",
+                "duration": 117,
+                "age_rating": {"name": "PG", "description": "ignored"},
+                # by id, by name, as embedded, twice
+                "genres": [
+                    self.drama.pk,
+                    "Comedy",
+                    {"id": self.action.pk, "name": "ignored"},
+                    self.drama.pk,
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["age_rating"]["name"], "PG")
+        self.assertEqual(self.genre_names(response), ["Action", "Comedy", "Drama"])
+        self.assert_consistent()
+
+        url = f"/api/movies/{response.data['id']}/"
+        response = self.write(
+            "patch",
+            url,
+            {"age_rating": "R", "genres": [{"name": "Drama"}, self.action.pk]},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.genre_names(response), ["Action", "Drama"])
+        self.assert_consistent()
+
+        response = self.write(
+            "put",
+            url,
+            {"title": "Alien", "duration": 120, "genres": ["Comedy"]},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.genre_names(response), ["Comedy"])
+        self.assert_consistent()
+
+        # without `genres` the links are kept
+        response = self.write("patch", url, {"duration": 121})
+        self.assertEqual(self.genre_names(response), ["Comedy"])
+
+        response = self.write("patch", url, {"age_rating": None, "genres": []})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["age_rating"])
+        self.assertEqual(response.data["genres"], [])
+        self.assertEqual(Movie.genres.through.objects.count(), 0)
+        self.assert_consistent()
+
+    def test_resolves_in_one_query(self) -> None:
+        serializer = GenreNestedSerializer(
+            many=True,
+            data=[self.drama.pk, "Comedy", {"name": "Action"}],
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            serializer.validated_data,
+            [self.drama, self.comedy, self.action],
+        )
+
+    def test_writes_the_link_diff(self) -> None:
+        movie = Movie.objects.create(title="Alien")
+        movie.genres.set([self.drama, self.comedy])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.write(
+                "patch",
+                f"/api/movies/{movie.pk}/",
+                {"genres": [self.comedy.pk, self.action.pk]},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        link_writes = [
+            query["sql"].split()[0]
+            for query in queries
+            if 'INTO "movies_movie_genres"' in query["sql"]
+            or query["sql"].startswith('DELETE FROM "movies_movie_genres"')
+        ]
+        self.assertEqual(link_writes, ["DELETE", "INSERT"])
+        self.assert_consistent()
+
+    def test_invalid_references(self) -> None:
+        Genre.objects.bulk_create(Genre(name="Twin") for _ in range(2))
+        movie = Movie.objects.create(title="Alien")
+        movie.genres.set([self.drama])
+
+        for genres, errors in (
+            (
+                [self.drama.pk, {"slug": "drama"}, True, 1.5],
+                {
+                    # keyed by index: the renderer allows non string keys
+                    "1": ["Expected a genre id or name."],
+                    "2": ["Expected a genre id or name."],
+                    "3": ["Expected a genre id or name."],
+                },
+            ),
+            (
+                [self.drama.pk, 999, "Unknown", "Twin"],
+                [
+                    {},
+                    {"id": ['Invalid pk "999" - object does not exist.']},
+                    {"name": ['Genre "Unknown" does not exist.']},
+                    {
+                        "name": [
+                            'More than one genre is named "Twin", reference it by id.',
+                        ],
+                    },
+                ],
+            ),
+            ("Drama", {"non_field_errors": [mock.ANY]}),
+        ):
+            with self.subTest(genres=genres):
+                response = self.write(
+                    "patch",
+                    f"/api/movies/{movie.pk}/",
+                    {"genres": genres},
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.json(), {"genres": errors})
+
+        response = self.write("post", "/api/movies/", {"title": "X", "age_rating": 1})
+        self.assertEqual(
+            response.json(),
+            {"age_rating": ["Expected an age rating name."]},
+        )
+        self.assertEqual(list(movie.genres.all()), [self.drama])
+        self.assert_consistent()
+
+
+class RelationsSnapshotTests(ConsistencyAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.pg = AgeRating.objects.create(name="PG", description="Parental guidance")
+        cls.r = AgeRating.objects.create(name="R")
+        cls.drama, cls.comedy, cls.action = (
+            Genre.objects.create(name=name) for name in ("Drama", "Comedy", "Action")
+        )
+        cls.alien = Movie.objects.create(title="Alien", age_rating=cls.r)
+        cls.alien.genres.set([cls.drama, cls.action])
+        cls.up = Movie.objects.create(title="Up", age_rating=cls.pg)
+        cls.up.genres.set([cls.comedy])
+        Movie.objects.create(title="Untitled")
+
+    def setUp(self) -> None:
+        self.assert_consistent()
+
+    def test_movie_save(self) -> None:
+        movie = Movie.objects.create(title="Heat", age_rating=self.r)
+        self.assert_consistent()
+        movie.age_rating = self.pg
+        movie.save()
+        self.assert_consistent()
+        movie = Movie.objects.only("title").get(pk=movie.pk)
+        movie.age_rating = None
+        movie.save(update_fields=["age_rating"])
+        self.assert_consistent()
+
+    def test_embedded_save(self) -> None:
+        self.pg.description = "Some material may not be suitable"
+        self.pg.save()
+        self.assert_consistent()
+        self.drama.name = "Thriller"
+        self.drama.save()
+        self.assert_consistent()
+
+    def test_genre_delete(self) -> None:
+        self.drama.delete()
+        self.assert_consistent()
+
+    def test_movie_links(self) -> None:
+        movie = Movie.objects.get(pk=self.alien.pk)
+        for write in (
+            lambda: movie.genres.add(self.comedy),
+            lambda: movie.genres.remove(self.drama, self.comedy),
+            lambda: movie.genres.set([self.drama, self.comedy]),
+            movie.genres.clear,
+        ):
+            write()
+            self.assert_consistent()
+
+    def test_genre_links(self) -> None:
+        genre = Genre.objects.get(pk=self.comedy.pk)
+        for write in (
+            lambda: genre.movies.add(self.alien),
+            lambda: genre.movies.remove(self.up),
+            lambda: genre.movies.set([self.up]),
+            genre.movies.clear,
+        ):
+            write()
+            self.assert_consistent()
+
+    def test_bulk_changed(self) -> None:
+        bulk_upsert_movies(
+            [
+                {"id": self.alien.pk, "title": "Alien", "genres": [self.comedy.pk]},
+                {"title": "Heat", "age_rating": "R", "genres": [self.drama.pk]},
+            ],
+        )
+        self.assert_consistent()
+
+        # written around the ORM signals
+        Movie.genres.through.objects.filter(movie_id=self.up.pk).delete()
+        Movie.objects.filter(pk=self.up.pk).update(age_rating=self.r)
+        movies_bulk_changed.send(Movie, movie_ids={self.up.pk})
+        self.assert_consistent()
+
+
+class RelationsSnapshotParityTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        age_rating = AgeRating.objects.create(name="PG", description="Guidance")
+        genres = [
+            Genre.objects.create(name=name, description=f"{name} movies")
+            for name in ("Drama", "Comédie")
+        ]
+        cls.movies = [
+            Movie.objects.create(title="Alien", age_rating=age_rating),
+            Movie.objects.create(title="Up"),
+        ]
+        cls.movies[0].genres.set(genres)
+
+    def test_retrieve(self) -> None:
+        for movie, query in product(
+            self.movies,
+            (
+                "",
+                "include=1",
+                "include=age_rating",
+                "include=genres",
+                "include=1&fields=title,genres",
+                "include=1&fields=age_rating",
+            ),
+        ):
+            url = f"/api/movies/{movie.pk}/?{query}"
+            with self.subTest(url=url):
+                responses = []
+                for snapshot in (False, True):
+                    cache.clear()
+                    with override_settings(MOVIES_RELATIONS_SNAPSHOT=snapshot):
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    responses.append(response.content)
+                self.assertEqual(*responses)
+
+
+class ResponseCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.pg = AgeRating.objects.create(name="PG")
+        cls.drama, cls.comedy, cls.action = (
+            Genre.objects.create(name=name) for name in ("Drama", "Comedy", "Action")
+        )
+        cls.alien = Movie.objects.create(title="Alien", age_rating=cls.pg)
+        cls.alien.genres.set([cls.drama])
+        cls.up = Movie.objects.create(title="Up")
+        cls.up.genres.set([cls.comedy])
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get(self, url: str) -> Response:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_hit_and_miss(self) -> None:
+        self.assertEqual(self.get("/api/movies/")["X-Cache"], "MISS")
+        self.assertEqual(self.get("/api/movies/")["X-Cache"], "HIT")
+        # the same query, the parameters in another order
+        self.assertEqual(self.get("/api/movies/?fields=id&page=1")["X-Cache"], "MISS")
+        self.assertEqual(self.get("/api/movies/?page=1&fields=id")["X-Cache"], "HIT")
+
+    def test_key_varies(self) -> None:
+        urls = [
+            f"/api/movies/?{query}"
+            for query in ("", "include=1", "include=genres", "fields=title")
+        ]
+        contents = {self.get(url).content for url in urls}
+        self.assertEqual(len(contents), len(urls))
+        for url in urls:
+            self.assertEqual(self.get(url)["X-Cache"], "HIT")
+
+    def test_invalidation(self) -> None:
+        alien = f"/api/movies/{self.alien.pk}/"
+        alien_include = f"{alien}?include=1"
+        up = f"/api/movies/{self.up.pk}/"
+        movies = "/api/movies/"
+        movies_include = "/api/movies/?include=1"
+        age_ratings = "/api/age-ratings/"
+        genres = "/api/genres/"
+
+        def save_movie() -> None:
+            self.alien.title = "Alien 2"
+            self.alien.save()
+
+        def save_age_rating() -> None:
+            self.pg.description = "Parental guidance"
+            self.pg.save()
+
+        def save_genre() -> None:
+            self.drama.name = "Thriller"
+            self.drama.save()
+
+        # the responses each write must invalidate, and those it must not
+        for name, write, stale, fresh in (
+            (
+                "movie save",
+                save_movie,
+                [alien, alien_include, movies, movies_include, age_ratings, genres],
+                [up],
+            ),
+            (
+                "age rating save",
+                save_age_rating,
+                [alien_include, movies_include, age_ratings],
+                [alien, up, movies, genres],
+            ),
+            (
+                "genre save",
+                save_genre,
+                [alien_include, movies_include, genres],
+                [alien, up, movies, age_ratings],
+            ),
+            (
+                "genre link",
+                lambda: self.up.genres.add(self.action),
+                [up, movies, movies_include, genres],
+                [alien, alien_include],
+            ),
+            (
+                "bulk write",
+                lambda: bulk_upsert_movies([{"id": self.up.pk, "title": "Up!"}]),
+                [up, movies, movies_include],
+                [alien, alien_include],
+            ),
+            (
+                "movie create",
+                lambda: Movie.objects.create(title="Heat"),
+                [movies, movies_include, age_ratings, genres],
+                [alien, up],
+            ),
+            (
+                "genre delete",
+                self.action.delete,
+                # and every `include=genres` response
+                [up, movies_include, alien_include, genres],
+                [alien],
+            ),
+            (
+                "movie delete",
+                self.up.delete,
+                [movies, movies_include, age_ratings, genres],
+                [alien, alien_include],
+            ),
+        ):
+            with self.subTest(write=name):
+                for url in stale + fresh:
+                    self.get(url)
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                for url in stale:
+                    self.assertEqual(self.get(url)["X-Cache"], "MISS", url)
+                for url in fresh:
+                    self.assertEqual(self.get(url)["X-Cache"], "HIT", url)
+
+        self.assertEqual(self.get(alien).data["title"], "Alien 2")
+        self.assertEqual(
+            self.get(alien_include).data["genres"][0]["name"],
+            "Thriller",
+        )
+
+
+@override_settings(MOVIES_CATALOG_PAGES=True)
+class CatalogPagesTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.age_rating = AgeRating.objects.create(name="PG", description="Guidance")
+        cls.genres = [
+            Genre.objects.create(name=name) for name in ("Drama", "Comédie", "Action")
+        ]
+        for number in range(23):
+            movie = Movie.objects.create(
+                title=f"Movie {number}",
+                release_date=date(2001, 1, number + 1) if number % 2 else None,
+                age_rating=cls.age_rating if number % 3 else None,
+            )
+            movie.genres.set(cls.genres[: number % 4])
+
+    def setUp(self) -> None:
+        refresh_entries(Movie.objects.values_list("id", flat=True))
+
+    def assert_entries_fresh(self) -> None:
+        ids = {*Movie.objects.values_list("id", flat=True)}
+        ids |= {*CatalogPageEntry.objects.values_list("movie_id", flat=True)}
+        self.assertEqual(refresh_entries(sorted(ids)), 0, "stale entries")
+
+    def test_same_pages(self) -> None:
+        for query in ("include=1", "include=1&page=2", "include=1&page=3"):
+            responses = []
+            for catalog in (False, True):
+                cache.clear()
+                with (
+                    override_settings(MOVIES_CATALOG_PAGES=catalog),
+                    mock.patch(
+                        "movies.catalog.get_entry_fields",
+                        wraps=get_entry_fields,
+                    ) as get_fields,
+                ):
+                    response = self.client.get(f"/api/movies/?{query}")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(get_fields.called, catalog)
+                responses.append(response.content)
+            with self.subTest(query=query):
+                self.assertEqual(*responses)
+
+    def test_writes_refresh(self) -> None:
+        movie = Movie.objects.get(title="Movie 5")
+        genre = self.genres[0]
+
+        def save_movie() -> None:
+            movie.title = "Renamed"
+            movie.save()
+
+        def save_genre() -> None:
+            genre.name = "Thriller"
+            genre.save()
+
+        def save_age_rating() -> None:
+            self.age_rating.description = "Parental guidance"
+            self.age_rating.save()
+
+        def rolled_back_then_saved() -> None:
+            # the savepoint drops its callback, not the movies after it
+            with suppress(IntegrityError), transaction.atomic():
+                Movie.objects.create(title="Rolled back")
+                raise IntegrityError
+            movie.genres.add(self.genres[2])
+
+        for write in (
+            save_movie,
+            save_genre,
+            save_age_rating,
+            lambda: movie.genres.set([self.genres[1]]),
+            lambda: Movie.objects.create(title="New", age_rating=self.age_rating),
+            lambda: bulk_upsert_movies([{"id": movie.pk, "title": "Bulk"}]),
+            rolled_back_then_saved,
+            movie.delete,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            self.assert_entries_fresh()
+
+
+IMPORT_CSV = """\
+title,description,release_date,duration,age_rating,genres
+Alien,"In space,
+no one can hear you scream",1979-05-25,117,R,Horror|Sci-Fi
+Up,,2009-05-29,96,PG, Animation | Comedy |
+"Broken
+title",,not a date,,,
+Heat,,,170,R,
+"""
+
+IMPORT_NDJSON = b"""\
+{"title": "Alien", "duration": 117, "age_rating": "R", "genres": ["Horror"]}
+not json
+
+["Up"]
+{"title": "Up", "duration": 96, "age_rating": "PG", "genres": ["Animation", "Comedy"]}
+{"title": "Heat", "duration": -1}
+"""
+
+
+class InlineExecutor(Executor):
+    # the workers in this process: spawned ones miss the test database
+    def __init__(self, **kwargs: object) -> None:
+        pass
+
+    def submit(self, fn: Callable, /, *args: object, **kwargs: object) -> Future:
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class ImportMoviesCommandTests(ConsistencyAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        AgeRating.objects.create(name="R", description="Restricted")
+        Genre.objects.create(name="Horror", description="Scary movies")
+
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def import_movies(self, name: str, content: str | bytes, *args: str) -> str:
+        path = self.directory / name
+        if isinstance(content, str):
+            path.write_text(content, encoding="utf-8")
+        else:
+            path.write_bytes(content)
+        stdout = StringIO()
+        call_command(
+            "import_movies",
+            path,
+            "--rejects",
+            self.directory / "rejects.ndjson",
+            *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def get_rejects(self) -> list[dict]:
+        with (self.directory / "rejects.ndjson").open(encoding="utf-8") as file:
+            return [json.loads(line) for line in file]
+
+    def assert_imported(self) -> None:
+        alien = Movie.objects.get(title="Alien")
+        self.assertEqual(alien.age_rating_id, "R")
+        self.assertEqual(
+            Movie.objects.get(title="Up").genres.count(),
+            2,
+        )
+        # kept as they were, not created again
+        self.assertEqual(AgeRating.objects.get(name="R").description, "Restricted")
+        self.assertEqual(Genre.objects.filter(name="Horror").count(), 1)
+        self.assertEqual(Genre.objects.get(name="Horror").description, "Scary movies")
+        self.assertEqual(AgeRating.objects.get(name="PG").movie_count, 1)
+        self.assertEqual(Genre.objects.get(name="Horror").movie_count, 1)
+        self.assert_consistent()
+
+    def test_csv(self) -> None:
+        output = self.import_movies("movies.csv", IMPORT_CSV)
+
+        self.assertIn("4 rows: 3 imported, 1 rejected", output)
+        alien = Movie.objects.get(title="Alien")
+        self.assertEqual(alien.description, "In space,\nno one can hear you scream")
+        self.assertEqual(
+            sorted(alien.genres.values_list("name", flat=True)),
+            ["Horror", "Sci-Fi"],
+        )
+        self.assertIsNone(Movie.objects.get(title="Heat").release_date)
+        self.assertEqual(AgeRating.objects.get(name="R").movie_count, 2)
+        self.assert_imported()
+        [reject] = self.get_rejects()
+        # the first line of the row
+        self.assertEqual(reject["line"], 5)
+        self.assertEqual(reject["row"]["title"], "Broken\ntitle")
+        self.assertEqual(list(reject["errors"]), ["release_date"])
+
+    def test_ndjson(self) -> None:
+        output = self.import_movies("movies.ndjson", IMPORT_NDJSON)
+
+        self.assertIn("5 rows: 2 imported, 3 rejected", output)
+        self.assert_imported()
+        self.assertEqual(
+            [(reject["line"], reject["errors"]) for reject in self.get_rejects()],
+            [
+                (2, {"non_field_errors": ["Invalid JSON."]}),
+                (4, {"non_field_errors": ["Expected an object."]}),
+                (6, {"duration": [mock.ANY]}),
+            ],
+        )
+
+    def test_workers(self) -> None:
+        with mock.patch(
+            "movies.management.commands.import_movies.ProcessPoolExecutor",
+            InlineExecutor,
+        ):
+            output = self.import_movies(
+                "movies.csv",
+                IMPORT_CSV,
+                "--workers=2",
+                "--batch-size=1",
+            )
+        self.assertIn("4 rows: 3 imported, 1 rejected", output)
+        self.assertEqual(AgeRating.objects.get(name="R").movie_count, 2)
+        self.assert_imported()
+        self.assertEqual([reject["line"] for reject in self.get_rejects()], [5])
+
+    def test_invalid_arguments(self) -> None:
+        for name, args in (("movies.txt", ()), ("movies.csv", ("--workers=0",))):
+            with self.subTest(name=name, args=args), self.assertRaises(CommandError):
+                self.import_movies(name, "", *args)
+
+
+@override_settings(
+    MOVIES_READ_REPLICAS={"DATABASES": ["replica"], "MAX_LAG_SECONDS": 5},
+    MOVIES_RESPONSE_CACHE={"ENABLED": False},
+)
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    Not in a transaction: the router keeps the reads of one on the primary.
+    """
+
+    def setUp(self) -> None:
+        self.movie = Movie.objects.create(title="Alien")
+        # versions are created by their first read, as changed then
+        get_versions(
+            (
+                NAMESPACE_MOVIES,
+                NAMESPACE_AGE_RATINGS,
+                NAMESPACE_GENRES,
+                object_namespace(NAMESPACE_MOVIES, self.movie.pk),
+            ),
+        )
+        self.reads = []
+        self.writes = []
+        route_read = ReplicaRouter.db_for_read
+        route_write = ReplicaRouter.db_for_write
+
+        def db_for_read(router: ReplicaRouter, *args: object, **hints: object) -> None:
+            self.reads.append(route_read(router, *args, **hints) or DEFAULT_DB_ALIAS)
+            # there is no replica: run the query on the primary
+
+        def db_for_write(router: ReplicaRouter, *args: object, **hints: object) -> str:
+            alias = route_write(router, *args, **hints)
+            self.writes.append(alias)
+            return alias
+
+        for name, route in (
+            ("db_for_read", db_for_read),
+            ("db_for_write", db_for_write),
+        ):
+            patcher = mock.patch.object(ReplicaRouter, name, route)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @contextmanager
+    def lag_elapsed(self) -> Iterator[None]:
+        # more than `MAX_LAG_SECONDS` after the versions changed
+        now = time.time_ns() + 6 * 10**9
+        with mock.patch("movies.replicas.time.time_ns", return_value=now):
+            yield
+
+    def request(self, method: str, url: str, data: object = None) -> set[str]:
+        """
+        The databases read by the request.
+        """
+        self.reads.clear()
+        response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, status.HTTP_400_BAD_REQUEST)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return set(self.reads)
+
+    def test_reads_on_replica(self) -> None:
+        with self.lag_elapsed():
+            for url in (
+                "/api/movies/",
+                "/api/movies/?include=1",
+                f"/api/movies/{self.movie.pk}/?include=genres",
+                # rows read while the body streams
+                "/api/movies/export/",
+            ):
+                with self.subTest(url=url):
+                    self.assertEqual(self.request("get", url), {"replica"})
+
+    def test_writes_on_primary(self) -> None:
+        with self.lag_elapsed():
+            self.assertEqual(
+                self.request(
+                    "patch",
+                    f"/api/movies/{self.movie.pk}/?include=1",
+                    {"title": "Aliens", "genres": []},
+                ),
+                {DEFAULT_DB_ALIAS},
+            )
+        self.assertEqual(set(self.writes), {DEFAULT_DB_ALIAS})
+
+        # even for an instance read from a replica
+        self.movie._state.db = "replica"  # noqa: SLF001
+        self.assertEqual(
+            ReplicaRouter().db_for_write(Movie, instance=self.movie),
+            DEFAULT_DB_ALIAS,
+        )
+
+    def test_read_your_writes(self) -> None:
+        response = self.client.post("/api/movies/", {"title": "Up"}, format="json")
+        cookie = response.cookies["movies_read_primary"]
+        self.assertEqual(cookie["max-age"], 5)
+        self.assertTrue(cookie["httponly"])
+
+        with self.lag_elapsed():
+            # the client keeps the cookie until it expires
+            self.assertEqual(self.request("get", "/api/movies/"), {DEFAULT_DB_ALIAS})
+            del self.client.cookies["movies_read_primary"]
+            self.assertEqual(self.request("get", "/api/movies/"), {"replica"})
+
+    def test_lag_after_a_change(self) -> None:
+        # any client, no cookie: the version of the movies just changed
+        bump_versions(NAMESPACE_MOVIES)
+        self.assertEqual(self.request("get", "/api/movies/"), {DEFAULT_DB_ALIAS})
+        with self.lag_elapsed():
+            self.assertEqual(self.request("get", "/api/movies/"), {"replica"})
+
+
+class DescriptionSummaryTests(TestCase):
+    def test_summary(self) -> None:
+        for description, summary in (
+            ("", ""),
+            ("   ", ""),
+            ("\r\n\r\n", ""),
+            ("Parental guidance", "Parental guidance"),
+            ("First paragraph\r\n\r\nSecond one", "First paragraph"),
+            ("word " * 20, "word word word word word word word word word word"),
+        ):
+            with self.subTest(description=description):
+                age_rating = AgeRating.objects.create(
+                    name=str(len(description)),
+                    description=description,
+                )
+                self.assertEqual(age_rating.summary, summary)
+                age_rating.delete()
+
+    def test_updated_with_the_description(self) -> None:
+        genre = Genre.objects.create(name="Drama", description="Tears")
+        genre.description = ""
+        genre.save(update_fields=["description"])
+        genre.refresh_from_db()
+        self.assertEqual(genre.summary, "")
+
+    def test_changelists(self) -> None:
+        age_rating = AgeRating.objects.create(name="PG", description="")
+        Genre.objects.create(name="Drama", description="  ")
+        Movie.objects.create(title="Alien", age_rating=age_rating)
+        self.client.force_login(
+            get_user_model().objects.create_superuser("admin", "admin@example.com"),
+        )
+        for model in (AgeRating, Genre, Movie):
+            with self.subTest(model=model.__name__):
+                response = self.client.get(
+                    reverse(f"admin:movies_{model._meta.model_name}_changelist"),  # noqa: SLF001
+                )
+                self.assertContains(response, 'id="result_list"')
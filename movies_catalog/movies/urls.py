@@ -1,14 +1,35 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from movies import views
+from movies import async_views, views
 
 router = DefaultRouter()
 router.register("movies", views.MovieViewSet)
 router.register("age-ratings", views.AgeRatingViewSet)
+router.register("genres", views.GenreViewSet)
 
 app_name = "movies"
 
 urlpatterns = [
     path("", include(router.urls)),
+    path(
+        "async/movies/",
+        async_views.AsyncMovieView.as_view(),
+        name="async-movie-list",
+    ),
+    path(
+        "async/movies/<int:pk>/",
+        async_views.AsyncMovieView.as_view(),
+        name="async-movie-detail",
+    ),
+    path(
+        "async/age-ratings/",
+        async_views.AsyncAgeRatingView.as_view(),
+        name="async-agerating-list",
+    ),
+    path(
+        "async/age-ratings/<str:pk>/",
+        async_views.AsyncAgeRatingView.as_view(),
+        name="async-agerating-detail",
+    ),
 ]
@@ -1,6 +1,12 @@
+from datetime import datetime
+from functools import partial
 from textwrap import dedent
+from typing import ClassVar
 
-from django.db.models import QuerySet
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Max, QuerySet
+from django.http import StreamingHttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     OpenApiExample,
@@ -9,25 +15,94 @@ from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
 )
-from rest_framework import status, viewsets
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.serializers import Serializer
-
-from movies.models import AgeRating, Movie
+from rest_framework.utils.urls import replace_query_param
+
+from movies.bulk import BULK_MAX_ROWS, bulk_upsert_movies
+from movies.cache import (
+    NAMESPACE_AGE_RATINGS,
+    NAMESPACE_GENRES,
+    NAMESPACE_MOVIES,
+    CachedResponseMixin,
+    object_namespace,
+)
+from movies.catalog import CatalogPagesMixin
+from movies.conditional import ConditionalGetMixin, get_collection_validators
+from movies.fastpath import FastListMixin
+from movies.fieldsets import FIELDS_QUERY_PARAM, SparseFieldsetViewMixin
+from movies.filters import MovieFilterSet, MovieOrderingFilter, MovieSearchFilter
+from movies.includes import INCLUDE_QUERY_PARAM, MOVIE_RELATIONS, parse_include
+from movies.lookups import AGE_RATINGS, GENRES, is_lookup_enabled
+from movies.models import AgeRating, Genre, Movie
+from movies.pagination import (
+    PAGINATION_MODE_CURSOR,
+    PAGINATION_MODE_PAGE,
+    PAGINATION_MODE_QUERY_PARAM,
+    MovieKeysetPagination,
+    SwitchablePaginationMixin,
+)
+from movies.renderers import CSVRenderer, NDJSONRenderer
+from movies.replicas import ReplicaReadsMixin
 from movies.serializers import (
     AgeRatingDetailSerializer,
     AgeRatingSerializer,
+    GenreSerializer,
     MovieDetailSerializerExtended,
     MovieSerializer,
 )
+from movies.serializers.age_rating import (
+    AGE_RATING_MOVIES_MAX_LIMIT,
+    get_movies_preview_prefetch,
+)
+from movies.serializers.movie_bulk import (
+    MovieBulkItemSerializer,
+    MovieBulkResultSerializer,
+)
+from movies.snapshots import get_snapshot_columns, select_relations
+from movies.streaming import iter_csv, iter_json_array, iter_ndjson
 
 INCLUDE_MOVIE_RELATIONS_QUERY_PARAM = OpenApiParameter(
-    "include",
+    INCLUDE_QUERY_PARAM,
     OpenApiTypes.STR,
     # OpenApiParameter.QUERY,
-    description="include age_rating and genre",
+    description=(
+        "Comma separated relations to embed: `age_rating`, `genres`; "
+        "`1` embeds all of them"
+    ),
     default="1",
 )
 
+SPARSE_FIELDS_PARAM = OpenApiParameter(
+    FIELDS_QUERY_PARAM,
+    OpenApiTypes.STR,
+    description=(
+        "comma separated fields to return, e.g. `id,title`; "
+        "relations that are not listed are not loaded"
+    ),
+)
+
+PAGINATION_MODE_PARAM = OpenApiParameter(
+    PAGINATION_MODE_QUERY_PARAM,
+    OpenApiTypes.STR,
+    enum=[PAGINATION_MODE_PAGE, PAGINATION_MODE_CURSOR],
+    description=(
+        "`cursor` switches to keyset pagination: no total count, "
+        "constant cost for deep pages, follow `next`/`previous` links"
+    ),
+    default=PAGINATION_MODE_PAGE,
+)
+
+CURSOR_PARAM = OpenApiParameter(
+    MovieKeysetPagination.cursor_query_param,
+    OpenApiTypes.STR,
+    description="opaque cursor from `next`/`previous` for `pagination=cursor`",
+)
+
 # Reusable inner data structures for Movie response examples
 _MOVIE_BASE_FIELDS = {
     "title": "Movie Name",
@@ -136,10 +211,31 @@ MOVIE_LIST_RESPONSE_WITH_INCLUDE = OpenApiExample(
             ```bash
             curl -X 'GET' 'http://127.0.0.1:8000/api/movies/'
             ```
+
+            **Keyset pagination (no count, fast deep pages):**
+
+            ```bash
+            curl -X 'GET' 'http://127.0.0.1:8000/api/movies/?pagination=cursor&ordering=title'
+            ```
+
+            **Filter and order:**
+
+            ```bash
+            curl -X 'GET' 'http://127.0.0.1:8000/api/movies/?age_rating=R,PG-13&genres=1,2&release_date_after=2020-01-01&ordering=-release_date'
+            ```
+
+            **Search, most relevant first:**
+
+            ```bash
+            curl -X 'GET' 'http://127.0.0.1:8000/api/movies/?search=termnator'
+            ```
             """,
         ),
         parameters=[
             INCLUDE_MOVIE_RELATIONS_QUERY_PARAM,
+            SPARSE_FIELDS_PARAM,
+            PAGINATION_MODE_PARAM,
+            CURSOR_PARAM,
         ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
@@ -178,13 +274,62 @@ MOVIE_LIST_RESPONSE_WITH_INCLUDE = OpenApiExample(
             ),
         },
     ),
+    bulk=extend_schema(
+        description=dedent(
+            f"""
+            ## Create or update many movies at once
+
+            Takes a list of up to {BULK_MAX_ROWS} movies. Each row replaces
+            the movie with the same `id`, or, without `id`, the movie with
+            the same `title` and `release_date`; other rows are created.
+            `genres` is a list of genre ids and is only changed when present.
+
+            Valid rows are written in a single transaction, invalid rows are
+            reported in `errors` by their position in the request.
+            Responds with 400 only when no row could be written.
+            """,
+        ),
+        request=MovieBulkItemSerializer(many=True),
+        responses={
+            status.HTTP_200_OK: MovieBulkResultSerializer,
+            status.HTTP_400_BAD_REQUEST: MovieBulkResultSerializer,
+        },
+    ),
+    export=extend_schema(
+        description=dedent(
+            """
+            ## Export the whole catalog
+
+            Streams every movie as NDJSON (default) or CSV, ordered by `id`.
+            Memory use does not depend on the catalog size: rows are read
+            in chunks, with `age_rating` and `genres` loaded per chunk.
+            Nested objects are flattened into `parent.child` CSV columns,
+            `genres` is a JSON array cell.
+
+            **Example API calls:**
+
+            ```bash
+            curl -X 'GET' 'http://127.0.0.1:8000/api/movies/export/?include=1'
+            curl -X 'GET' 'http://127.0.0.1:8000/api/movies/export/?format=csv'
+            ```
+            """,
+        ),
+        parameters=[
+            INCLUDE_MOVIE_RELATIONS_QUERY_PARAM,
+        ],
+        responses={
+            (status.HTTP_200_OK, NDJSONRenderer.media_type): OpenApiTypes.STR,
+            (status.HTTP_200_OK, CSVRenderer.media_type): OpenApiTypes.STR,
+        },
+    ),
     retrieve=extend_schema(
         description=dedent(
             """
             ## Retrieve Movie details by id
 
             Returns movie details. Use the `include` query parameter to
-            include nested `age_rating` and `genres` relationships.
+            include nested `age_rating` and `genres` relationships:
+            `include=1` for both, `include=genres` for only one of them.
 
             **Example API call (without include):**
 
@@ -196,11 +341,13 @@ MOVIE_LIST_RESPONSE_WITH_INCLUDE = OpenApiExample(
 
             ```bash
             curl -X 'GET' 'http://127.0.0.1:8000/api/movies/1/?include=1'
+            curl -X 'GET' 'http://127.0.0.1:8000/api/movies/1/?include=genres'
             ```
             """,
         ),
         parameters=[
             INCLUDE_MOVIE_RELATIONS_QUERY_PARAM,
+            SPARSE_FIELDS_PARAM,
         ],
         responses={
             status.HTTP_200_OK: OpenApiResponse(
@@ -215,35 +362,345 @@ MOVIE_LIST_RESPONSE_WITH_INCLUDE = OpenApiExample(
         },
     ),
 )
-class MovieViewSet(viewsets.ModelViewSet):
+class MovieViewSet(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsetViewMixin,
+    SwitchablePaginationMixin,
+    CatalogPagesMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Movie.objects.all()
+    cursor_pagination_class = MovieKeysetPagination
+    filter_backends = (
+        DjangoFilterBackend,
+        MovieSearchFilter,
+        MovieOrderingFilter,
+    )
+    filterset_class = MovieFilterSet
+    # most queries an action may run, see `movies.querystats`
+    query_budgets: ClassVar[dict[str, int]] = {
+        # + reloading the lookup tables after an age rating or genre write
+        "list": 5,
+        "retrieve": 5,
+        # + updating the movie counters, + nested genres (`include=genres`):
+        # resolving them, diffing and writing the links, whatever their number,
+        # + 4 refreshing the catalog page entries (`MOVIES_CATALOG_PAGES`),
+        # in every write
+        "create": 17,
+        # + rebuilding the relations snapshot, + taking the movie off the
+        # counters of its previous age rating and genres
+        "update": 22,
+        "partial_update": 22,
+        "destroy": 11,
+        # + recounting the age ratings and genres of the movies,
+        # + the natural key lock on Postgres
+        "bulk": 22,
+        # rows are read while the response streams
+        "export": 0,
+    }
+
+    def get_includes(self) -> frozenset[str]:
+        return parse_include(self.request, MOVIE_RELATIONS)
 
     def get_queryset(self) -> QuerySet:
         qs = self.queryset
         # if self.action == "retrieve":
-        if self.request.method == "GET" and self.request.GET.get("include"):
-            qs = qs.select_related("age_rating")
-            qs = qs.prefetch_related("genres")
-        return qs
+        if self.request.method != "GET":
+            return self.narrow_queryset(qs)
+        relations = [
+            name for name in self.get_includes() if self.is_field_requested(name)
+        ]
+        return self.narrow_queryset(
+            select_relations(qs, relations),
+            *get_snapshot_columns(relations),
+        )
 
     def get_serializer_class(self) -> type[Serializer]:
-        if self.request.GET.get("include"):
+        if self.get_includes():
             # if self.action == "retrieve":
             #     return MovieDetailSerializerExtended
             return MovieDetailSerializerExtended
         return MovieSerializer
 
+    def get_serializer(self, *args: object, **kwargs: object) -> Serializer:
+        includes = self.get_includes()
+        if includes:
+            kwargs.setdefault("include", includes)
+        return super().get_serializer(*args, **kwargs)
 
-class AgeRatingViewSet(viewsets.ModelViewSet):
-    queryset = AgeRating.objects.all()
+    def get_cache_namespaces(self) -> tuple[str, ...]:
+        if self.action == "retrieve":
+            namespaces = (object_namespace(NAMESPACE_MOVIES, self.kwargs["pk"]),)
+        else:
+            namespaces = (NAMESPACE_MOVIES,)
+        includes = self.get_includes()
+        if "age_rating" in includes:
+            namespaces += (NAMESPACE_AGE_RATINGS,)
+        if "genres" in includes:
+            namespaces += (NAMESPACE_GENRES,)
+        return namespaces
+
+    def get_object_validators(self) -> tuple[tuple, datetime | None] | None:
+        qs = Movie.objects.all()
+        fields = ("updated_at",)
+        includes = self.get_includes()
+        if "age_rating" in includes:
+            qs = qs.annotate(age_rating_updated_at=F("age_rating__updated_at"))
+            fields += ("age_rating_updated_at",)
+        if "genres" in includes:
+            qs = qs.annotate(genres_updated_at=Max("genres__updated_at"))
+            fields += ("genres_updated_at",)
+        try:
+            row = qs.filter(pk=self.kwargs["pk"]).values_list(*fields).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            return None
+        if row is None:
+            return None
+        return row, max(filter(None, row))
+
+    @action(detail=False, methods=["post"], pagination_class=None)
+    def bulk(self, request: Request) -> Response:
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of movies."]})
+        if len(rows) > BULK_MAX_ROWS:
+            raise ValidationError(
+                {
+                    "non_field_errors": [
+                        f"Ensure this list has no more than {BULK_MAX_ROWS} movies.",
+                    ],
+                },
+            )
+
+        result = bulk_upsert_movies(rows)
+        written = result.created or result.updated
+        return Response(
+            MovieBulkResultSerializer(result).data,
+            status=(
+                status.HTTP_400_BAD_REQUEST
+                if result.errors and not written
+                else status.HTTP_200_OK
+            ),
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        pagination_class=None,
+    )
+    def export(self, request: Request) -> StreamingHttpResponse:
+        renderer = request.accepted_renderer
+        iter_rows = iter_csv if renderer.format == CSVRenderer.format else iter_ndjson
+        serializer_class = self.get_serializer_class()
+        includes = self.get_includes()
+        if includes:
+            serializer_class = partial(serializer_class, include=includes)
+        response = StreamingHttpResponse(
+            iter_rows(
+                self.filter_queryset(self.get_queryset()),
+                serializer_class,
+                context=self.get_serializer_context(),
+            ),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="movies.{renderer.format}"'
+        )
+        return response
+
+
+class AgeRatingMoviesQuerySerializer(serializers.Serializer):
+    after = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="stream movies with `id` greater than this one",
+    )
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=AGE_RATING_MOVIES_MAX_LIMIT,
+        help_text="at most this many movies, all of them by default",
+    )
 
-    def get_queryset(self) -> QuerySet:
+
+@extend_schema_view(
+    list=extend_schema(parameters=[SPARSE_FIELDS_PARAM]),
+    retrieve=extend_schema(parameters=[SPARSE_FIELDS_PARAM]),
+    movies=extend_schema(
+        description=dedent(
+            """
+            ## Stream all movies of the age rating
+
+            Movies are ordered by `id` and streamed as a JSON array,
+            read from the database through a server-side cursor.
+            Age rating details embed the first page of movies and link here
+            (`movies_next`) for the next one.
+
+            With `limit`, the response is one page: the `Link` header
+            (`rel="next"`) points to the next page, when there is one.
+            Without it, every movie after `after` is streamed.
+            """,
+        ),
+        parameters=[AgeRatingMoviesQuerySerializer],
+        responses={status.HTTP_200_OK: MovieSerializer(many=True)},
+    ),
+)
+class AgeRatingViewSet(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsetViewMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = AgeRating.objects.all()
+    query_budgets: ClassVar[dict[str, int]] = {
+        "list": 2,
+        "retrieve": 3,
+        "create": 2,
+        # + 3 per `SNAPSHOT_BATCH_SIZE` movies of the rating to re-snapshot,
+        # + 4 per `CATALOG_BATCH_SIZE` to refresh the catalog page entries
+        "update": 12,
+        "partial_update": 11,
+        "destroy": 4,
+        # + the end of the page with `limit`
+        "movies": 2,
+    }
+
+    def get_queryset(self) -> QuerySet | list[AgeRating]:
+        if self.action == "list" and is_lookup_enabled():
+            # the pagination slices the shared rows
+            return list(AGE_RATINGS.get().values())
         qs = self.queryset
-        if self.action == "retrieve":
-            qs = qs.prefetch_related("movies")
-        return qs
+        if self.action == "retrieve" and (
+            self.is_field_requested("movies") or self.is_field_requested("movies_next")
+        ):
+            qs = qs.prefetch_related(get_movies_preview_prefetch())
+        return self.narrow_queryset(qs)
 
     def get_serializer_class(self) -> type[Serializer]:
         if self.action == "retrieve":
             return AgeRatingDetailSerializer
+        if self.action == "movies":
+            return MovieSerializer
         return AgeRatingSerializer
+
+    def get_cache_namespaces(self) -> tuple[str, ...]:
+        # details embed the first movies of the rating,
+        # the movie counters change with the movies
+        if self.action == "retrieve":
+            return (
+                object_namespace(NAMESPACE_AGE_RATINGS, self.kwargs["pk"]),
+                NAMESPACE_MOVIES,
+            )
+        return (NAMESPACE_AGE_RATINGS, NAMESPACE_MOVIES)
+
+    def get_object_validators(self) -> tuple[tuple, datetime | None] | None:
+        updated_at = (
+            AgeRating.objects.filter(pk=self.kwargs["pk"])
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+        if updated_at is None:
+            return None
+        # the embedded movies are covered by the movies collection version
+        collection = get_collection_validators((NAMESPACE_MOVIES,))
+        if collection is None:
+            return None
+        movies, movies_modified_at = collection
+        return (updated_at, movies), max(updated_at, movies_modified_at)
+
+    @action(detail=True, methods=["get"], pagination_class=None)
+    def movies(
+        self,
+        request: Request,
+        pk: str | None = None,  # noqa: ARG002
+    ) -> StreamingHttpResponse:
+        age_rating = self.get_object()
+        query = AgeRatingMoviesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        qs = age_rating.movies.order_by("id")
+        if "after" in query.validated_data:
+            qs = qs.filter(id__gt=query.validated_data["after"])
+        limit = query.validated_data.get("limit")
+        next_url = None
+        if limit is not None:
+            # the last movie of the page, and whether another one follows
+            ids = list(qs.values_list("id", flat=True)[limit - 1 : limit + 1])
+            if len(ids) > 1:
+                next_url = replace_query_param(
+                    request.build_absolute_uri(),
+                    "after",
+                    ids[0],
+                )
+            qs = qs[:limit]
+        response = StreamingHttpResponse(
+            iter_json_array(
+                qs,
+                MovieSerializer,
+                context=self.get_serializer_context(),
+            ),
+            content_type="application/json",
+        )
+        if next_url is not None:
+            response["Link"] = f'<{next_url}>; rel="next"'
+        return response
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=[SPARSE_FIELDS_PARAM]),
+    retrieve=extend_schema(parameters=[SPARSE_FIELDS_PARAM]),
+)
+class GenreViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsetViewMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Genre.objects.all()
+    serializer_class = GenreSerializer
+    query_budgets: ClassVar[dict[str, int]] = {
+        "list": 2,
+        "retrieve": 2,
+        "create": 1,
+        # + 3 per `SNAPSHOT_BATCH_SIZE` movies of the genre to re-snapshot,
+        # + 4 per `CATALOG_BATCH_SIZE` to refresh the catalog page entries
+        "update": 11,
+        "partial_update": 11,
+        "destroy": 13,
+    }
+
+    def get_queryset(self) -> QuerySet | list[Genre]:
+        if self.action == "list" and is_lookup_enabled():
+            return list(GENRES.get().values())
+        return self.narrow_queryset(self.queryset)
+
+    def get_cache_namespaces(self) -> tuple[str, ...]:
+        # the movie counters change with the movies
+        if self.action == "retrieve":
+            return (
+                object_namespace(NAMESPACE_GENRES, self.kwargs["pk"]),
+                NAMESPACE_MOVIES,
+            )
+        return (NAMESPACE_GENRES, NAMESPACE_MOVIES)
+
+    def get_object_validators(self) -> tuple[tuple, datetime | None] | None:
+        try:
+            updated_at = (
+                Genre.objects.filter(pk=self.kwargs["pk"])
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            return None
+        if updated_at is None:
+            return None
+        collection = get_collection_validators((NAMESPACE_MOVIES,))
+        if collection is None:
+            return None
+        movies, movies_modified_at = collection
+        return (updated_at, movies), max(updated_at, movies_modified_at)
@@ -21,12 +21,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-kb()179190$kxo1h8@%n(_!(m2rhx4#ji!yla0&r$e0k&#ve)s"
+SECRET_KEY = getenv(
+    "DJANGO_SECRET_KEY",
+    "django-insecure-kb()179190$kxo1h8@%n(_!(m2rhx4#ji!yla0&r$e0k&#ve)s",
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = getenv("DJANGO_DEBUG", "1") == "1"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = list(filter(None, getenv("DJANGO_ALLOWED_HOSTS", "").split(",")))
+
+# clients of the internal endpoints, e.g. `/internal/db-pools/`
+INTERNAL_IPS = getenv("INTERNAL_IPS", "127.0.0.1,::1").split(",")
 
 
 # Application definition
@@ -38,8 +44,10 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # site packages
     "rest_framework",
+    "django_filters",
     "drf_spectacular",
     "drf_spectacular_sidecar",  # required for Django collectstatic discovery
     # my
@@ -47,6 +55,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "movies.querystats.QueryStatsMiddleware",
+    "movies.replicas.ReadYourWritesMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -87,9 +97,122 @@ DATABASES = {
         "PASSWORD": getenv("DB_PASSWORD", "supersecretpassword"),
         "HOST": getenv("DB_HOST", "localhost"),
         "PORT": getenv("DB_PORT", 5432),
+        # seconds to reuse a connection for, 0: one per request
+        "CONN_MAX_AGE": int(getenv("DB_CONN_MAX_AGE", 0)),
+        # check a reused connection before its first query of a request
+        "CONN_HEALTH_CHECKS": getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
+    },
+}
+
+# A psycopg pool per worker process instead, `max_size` about the number
+# of threads of a worker; see `movies.internal` for the pool statistics
+if getenv("DB_POOL", "0") == "1":
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(getenv("DB_POOL_MAX_SIZE", 4)),
+            # seconds a request waits for a free connection, then fails
+            "timeout": float(getenv("DB_POOL_TIMEOUT", 10)),
+            **(
+                {"check": ConnectionPool.check_connection}
+                if DATABASES["default"]["CONN_HEALTH_CHECKS"]
+                else {}
+            ),
+        },
+    }
+
+# Read replicas of `default` for the API reads, see `movies.replicas`:
+# DB_REPLICAS="replica-1,replica-2:5433" or "localhost/movies_catalog_replica"
+for number, address in enumerate(filter(None, getenv("DB_REPLICAS", "").split(","))):
+    location, _, name = address.strip().partition("/")
+    host, _, port = location.partition(":")
+    DATABASES[f"replica_{number + 1}"] = {
+        **DATABASES["default"],
+        "HOST": host or DATABASES["default"]["HOST"],
+        "PORT": port or DATABASES["default"]["PORT"],
+        "NAME": name or DATABASES["default"]["NAME"],
+        # tests run against the primary only
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["movies.replicas.ReplicaRouter"]
+
+MOVIES_READ_REPLICAS = {
+    "DATABASES": [alias for alias in DATABASES if alias != "default"],
+    # reads go to the primary this long after a write
+    "MAX_LAG_SECONDS": float(getenv("DB_REPLICA_MAX_LAG_SECONDS", 5)),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# The response cache versions (`movies.cache`), which also invalidate the
+# lookup tables (`movies.lookups`) and make the list ETags
+# (`movies.conditional`), live in this cache. With more than one worker
+# process, share it (e.g. Redis or Memcached): with the default per process
+# LocMemCache, the writes of one worker reach the others once their cached
+# responses and lookup tables expire, and lists have no ETag
+# (`check --deploy` warns).
+
+CACHES = {
+    "default": {
+        "BACKEND": getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": getenv("CACHE_LOCATION", "movies-catalog"),
     },
 }
 
+# API responses cache, see `movies.cache`
+MOVIES_RESPONSE_CACHE = {
+    "ENABLED": getenv("MOVIES_RESPONSE_CACHE_ENABLED", "1") == "1",
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": int(getenv("MOVIES_RESPONSE_CACHE_TIMEOUT", 300)),
+}
+
+# SQL statistics of every request, see `movies.querystats`
+MOVIES_QUERY_STATS = {
+    "ENABLED": getenv("MOVIES_QUERY_STATS_ENABLED", "1") == "1",
+    # `Server-Timing` reveals the SQL load, only expose it while debugging
+    "SERVER_TIMING": DEBUG,
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # INFO: one record per request, WARNING: N+1 and budget overruns
+        "movies.querystats": {
+            "handlers": ["console"],
+            "level": getenv("MOVIES_QUERY_STATS_LOG_LEVEL", "WARNING"),
+        },
+    },
+}
+
+# Serve movie lists from `QuerySet.values()`, see `movies.fastpath`
+MOVIES_FAST_LIST = getenv("MOVIES_FAST_LIST", "1") == "1"
+
+# Embed `include=` relations from `Movie.relations_snapshot`, see
+# `movies.snapshots`; run `rebuild_relations_snapshots` before turning on
+MOVIES_RELATIONS_SNAPSHOT = getenv("MOVIES_RELATIONS_SNAPSHOT", "0") == "1"
+
+# Serve age ratings and genres from per process tables, see `movies.lookups`
+MOVIES_LOOKUP_TABLES = getenv("MOVIES_LOOKUP_TABLES", "1") == "1"
+# seconds, bounds the staleness of the tables with a per process cache
+MOVIES_LOOKUP_TABLES_MAX_AGE = int(getenv("MOVIES_LOOKUP_TABLES_MAX_AGE", 60))
+
+# Serve `include=1` list pages from `CatalogPageEntry`, see `movies.catalog`;
+# run `refresh_catalog_pages` before turning on
+MOVIES_CATALOG_PAGES = getenv("MOVIES_CATALOG_PAGES", "0") == "1"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,6 +260,15 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "movies.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "movies.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -0,0 +1,50 @@
+"""
+Settings of the API workers: JSON only, without the admin, sessions,
+CSRF, messages and templates.
+
+    DJANGO_SETTINGS_MODULE=movies_catalog.settings_api \
+        gunicorn movies_catalog.wsgi
+
+Only `/api/` and `/internal/` are routed (`urls_api`). The admin, the
+browsable API and the schema UIs stay on workers running with
+`movies_catalog.settings`; route those paths to them at the proxy.
+"""
+
+from os import getenv
+
+from movies_catalog.settings import *  # noqa: F403
+from movies_catalog.settings import MOVIES_QUERY_STATS, REST_FRAMEWORK
+
+DEBUG = getenv("DJANGO_DEBUG", "0") == "1"
+
+INSTALLED_APPS = [
+    "django.contrib.postgres",
+    "rest_framework",
+    "django_filters",
+    "movies.apps.MoviesConfig",
+]
+
+MIDDLEWARE = [
+    "movies.querystats.QueryStatsMiddleware",
+    "movies.replicas.ReadYourWritesMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+ROOT_URLCONF = "movies_catalog.urls_api"
+
+TEMPLATES = []
+
+MOVIES_QUERY_STATS = {**MOVIES_QUERY_STATS, "SERVER_TIMING": DEBUG}
+
+REST_FRAMEWORK = {
+    **{
+        name: value
+        for name, value in REST_FRAMEWORK.items()
+        if name != "DEFAULT_SCHEMA_CLASS"
+    },
+    "DEFAULT_RENDERER_CLASSES": ("movies.renderers.FastJSONRenderer",),
+    # the API is anonymous: no session / basic auth, no `django.contrib.auth`
+    "DEFAULT_AUTHENTICATION_CLASSES": (),
+    "UNAUTHENTICATED_USER": None,
+}
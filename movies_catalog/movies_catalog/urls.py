@@ -23,6 +23,8 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from movies import internal
+
 urlpatterns = [
     path("api/", include("movies.urls")),
     path(
@@ -51,4 +53,5 @@ urlpatterns = [
     ),
     # // DRF-spectacular
     path("admin/", admin.site.urls),
+    path("internal/db-pools/", internal.db_pools, name="internal-db-pools"),
 ]
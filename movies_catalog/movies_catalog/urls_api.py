@@ -0,0 +1,12 @@
+"""
+URL configuration of the API workers, see `settings_api`.
+"""
+
+from django.urls import include, path
+
+from movies import internal
+
+urlpatterns = [
+    path("api/", include("movies.urls")),
+    path("internal/db-pools/", internal.db_pools, name="internal-db-pools"),
+]